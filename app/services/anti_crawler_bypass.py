@@ -15,15 +15,32 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
+from .arxiv_harvester import parse_arxiv_feed
+from .pubmed_client import PubMedClient
+from .search_federator import SearchFederator, default_sources
+from ..utils.identifiers import normalize_arxiv_id, normalize_doi, normalize_pmid
+from ..utils.response_cache import ResponseCache, get_default_cache, install_cache
+
 logger = logging.getLogger(__name__)
 
 class AntiCrawlerBypass:
     """反爬虫绕过类"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        """
+        Args:
+            cache: 元数据 API (Semantic Scholar / arXiv / PubMed) 的响应缓存，
+                默认按 HTTP_CACHE_PATH 环境变量创建，未设置时不缓存
+        """
         self.session = requests.Session()
         self.driver = None
         self._setup_session()
+        
+        cache = cache or get_default_cache()
+        if cache is not None:
+            install_cache(self.session, cache)
+        # 共享会话（含缓存），限速器在进程内所有 PubMed 客户端间共享
+        self.pubmed = PubMedClient(session=self.session)
     
     def _setup_session(self):
         """设置会话"""
@@ -149,34 +166,12 @@ class AntiCrawlerBypass:
             self.driver = None
     
     def search_alternative_sources(self, query: str) -> List[Dict]:
-        """搜索替代学术源"""
-        results = []
-        
-        # 1. Semantic Scholar API
-        try:
-            semantic_results = self._search_semantic_scholar(query)
-            results.extend(semantic_results)
-            logger.info(f"Semantic Scholar找到 {len(semantic_results)} 篇论文")
-        except Exception as e:
-            logger.error(f"Semantic Scholar搜索失败: {e}")
-        
-        # 2. arXiv API
-        try:
-            arxiv_results = self._search_arxiv(query)
-            results.extend(arxiv_results)
-            logger.info(f"arXiv找到 {len(arxiv_results)} 篇论文")
-        except Exception as e:
-            logger.error(f"arXiv搜索失败: {e}")
-        
-        # 3. PubMed API
-        try:
-            pubmed_results = self._search_pubmed(query)
-            results.extend(pubmed_results)
-            logger.info(f"PubMed找到 {len(pubmed_results)} 篇论文")
-        except Exception as e:
-            logger.error(f"PubMed搜索失败: {e}")
-        
-        return results
+        """搜索替代学术源（三个来源并发检索，结果合并去重）"""
+        return self.search_alternative_sources_many([query])
+    
+    def search_alternative_sources_many(self, queries: List[str]) -> List[Dict]:
+        """并发检索多个检索词，返回合并去重后的结果"""
+        return SearchFederator(default_sources(self)).search_sync(queries)
     
     def _search_semantic_scholar(self, query: str) -> List[Dict]:
         """搜索Semantic Scholar"""
@@ -194,13 +189,17 @@ class AntiCrawlerBypass:
         results = []
         
         for paper in data.get('data', []):
+            external_ids = paper.get('externalIds') or {}
             results.append({
                 'title': paper.get('title', ''),
                 'authors': ', '.join([author['name'] for author in paper.get('authors', [])]),
                 'year': paper.get('year', 0),
                 'abstract': paper.get('abstract', ''),
-                'pdf_url': paper.get('openAccessPdf', {}).get('url'),
-                'doi': paper.get('externalIds', {}).get('DOI'),
+                'pdf_url': (paper.get('openAccessPdf') or {}).get('url'),
+                'doi': normalize_doi(external_ids.get('DOI')),
+                'paper_id': paper.get('paperId'),
+                'arxiv_id': normalize_arxiv_id(external_ids.get('ArXiv')),
+                'pmid': normalize_pmid(external_ids.get('PubMed')),
                 'source': 'Semantic Scholar'
             })
         
@@ -216,104 +215,16 @@ class AntiCrawlerBypass:
             'sortOrder': 'descending'
         }
         
-        response = self.session.get(url, params=params)
+        response = self.session.get(url, params=params, stream=True)
         response.raise_for_status()
         
-        # 解析XML响应
-        import xml.etree.ElementTree as ET
-        root = ET.fromstring(response.text)
-        
-        results = []
-        for entry in root.findall('{http://www.w3.org/2005/Atom}entry'):
-            title = entry.find('{http://www.w3.org/2005/Atom}title').text
-            authors = [author.find('{http://www.w3.org/2005/Atom}name').text 
-                      for author in entry.findall('{http://www.w3.org/2005/Atom}author')]
-            published = entry.find('{http://www.w3.org/2005/Atom}published').text
-            year = int(published[:4]) if published else 0
-            
-            # arXiv PDF链接
-            pdf_url = None
-            for link in entry.findall('{http://www.w3.org/2005/Atom}link'):
-                if link.get('type') == 'application/pdf':
-                    pdf_url = link.get('href')
-                    break
-            
-            results.append({
-                'title': title,
-                'authors': ', '.join(authors),
-                'year': year,
-                'abstract': entry.find('{http://www.w3.org/2005/Atom}summary').text,
-                'pdf_url': pdf_url,
-                'doi': None,
-                'source': 'arXiv'
-            })
-        
-        return results
+        # 流式解析XML响应，逐条生成精简记录
+        with response:
+            return list(parse_arxiv_feed(response.iter_content(chunk_size=64 * 1024)))
     
     def _search_pubmed(self, query: str) -> List[Dict]:
-        """搜索PubMed"""
-        # 搜索PMID
-        search_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-        search_params = {
-            'db': 'pubmed',
-            'term': query,
-            'retmax': 10,
-            'retmode': 'json'
-        }
-        
-        search_response = self.session.get(search_url, params=search_params)
-        search_response.raise_for_status()
-        
-        search_data = search_response.json()
-        pmids = search_data.get('esearchresult', {}).get('idlist', [])
-        
-        if not pmids:
-            return []
-        
-        # 获取详细信息
-        fetch_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
-        fetch_params = {
-            'db': 'pubmed',
-            'id': ','.join(pmids),
-            'retmode': 'xml'
-        }
-        
-        fetch_response = self.session.get(fetch_url, params=fetch_params)
-        fetch_response.raise_for_status()
-        
-        # 解析XML响应
-        import xml.etree.ElementTree as ET
-        root = ET.fromstring(fetch_response.text)
-        
-        results = []
-        for article in root.findall('.//PubmedArticle'):
-            title_elem = article.find('.//ArticleTitle')
-            title = title_elem.text if title_elem is not None else ''
-            
-            authors = []
-            for author in article.findall('.//Author'):
-                last_name = author.find('LastName')
-                first_name = author.find('ForeName')
-                if last_name is not None and first_name is not None:
-                    authors.append(f"{first_name.text} {last_name.text}")
-            
-            year_elem = article.find('.//PubDate/Year')
-            year = int(year_elem.text) if year_elem is not None else 0
-            
-            abstract_elem = article.find('.//AbstractText')
-            abstract = abstract_elem.text if abstract_elem is not None else ''
-            
-            results.append({
-                'title': title,
-                'authors': ', '.join(authors),
-                'year': year,
-                'abstract': abstract,
-                'pdf_url': None,  # PubMed通常不直接提供PDF
-                'doi': None,
-                'source': 'PubMed'
-            })
-        
-        return results
+        """搜索PubMed（历史服务器 + 流式解析，包含 DOI 和完整摘要）"""
+        return list(self.pubmed.search(query, max_results=10))
     
     def close(self):
         """关闭资源"""
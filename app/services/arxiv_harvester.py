@@ -0,0 +1,257 @@
+"""
+arXiv 流式收割器
+按 start/max_results 分页请求 arXiv API，用 XMLPullParser 边下载边解析，
+每解析完一个 <entry> 就产出一条精简记录并释放对应的 XML 元素，内存占用与收割总量无关
+"""
+
+import json
+import logging
+import os
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional
+
+import requests
+
+from ..utils.identifiers import normalize_arxiv_id, normalize_doi
+from ..utils.response_cache import ResponseCache, get_default_cache, install_cache
+
+logger = logging.getLogger(__name__)
+
+ARXIV_API_URL = "http://export.arxiv.org/api/query"
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+ARXIV = '{http://arxiv.org/schemas/atom}'
+OPENSEARCH = '{http://a9.com/-/spec/opensearch/1.1/}'
+
+# arXiv API 单次请求的最大条目数
+MAX_PAGE_SIZE = 2000
+
+
+def _text(elem: ET.Element, tag: str) -> str:
+    """子元素文本，合并换行和多余空白"""
+    value = elem.findtext(tag)
+    return ' '.join(value.split()) if value else ''
+
+
+def parse_arxiv_time(value: Optional[str]) -> Optional[datetime]:
+    """解析 arXiv 的 ISO 8601 时间 (2024-01-02T03:04:05Z)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def entry_to_record(entry: ET.Element) -> Dict:
+    """把 <entry> 转为与各检索服务一致的精简记录"""
+    pdf_url = None
+    for link in entry.iterfind(f'{ATOM}link'):
+        if link.get('type') == 'application/pdf' or link.get('title') == 'pdf':
+            pdf_url = link.get('href')
+            break
+
+    published = _text(entry, f'{ATOM}published')
+    doi = entry.findtext(f'{ARXIV}doi')
+    return {
+        'title': _text(entry, f'{ATOM}title'),
+        'authors': ', '.join(_text(author, f'{ATOM}name') for author in entry.iterfind(f'{ATOM}author')),
+        'year': int(published[:4]) if published[:4].isdigit() else 0,
+        'abstract': _text(entry, f'{ATOM}summary'),
+        'pdf_url': pdf_url,
+        'doi': normalize_doi(doi) if doi else None,
+        'arxiv_id': normalize_arxiv_id(entry.findtext(f'{ATOM}id')),
+        'published': published,
+        'updated': _text(entry, f'{ATOM}updated'),
+        'categories': [c.get('term') for c in entry.iterfind(f'{ATOM}category') if c.get('term')],
+        'source': 'arXiv'
+    }
+
+
+class ArxivFeedParser:
+    """Atom 响应的增量解析器：feed() 喂入字节块并产出其中已解析完的记录"""
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._root: Optional[ET.Element] = None
+        self.total_results: Optional[int] = None
+        self.entries = 0
+
+    def feed(self, data: bytes) -> Iterator[Dict]:
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self) -> Iterator[Dict]:
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> Iterator[Dict]:
+        for event, elem in self._parser.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._root = elem
+                continue
+            if elem.tag == f'{OPENSEARCH}totalResults':
+                self.total_results = int(elem.text or 0)
+            elif elem.tag == f'{ATOM}entry':
+                self.entries += 1
+                yield entry_to_record(elem)
+                # 释放已处理的条目（feed 的直接子元素）
+                self._root.clear()
+
+
+def parse_arxiv_feed(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """流式解析 arXiv Atom 响应"""
+    parser = ArxivFeedParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+class ArxivHarvester:
+    """arXiv 分页收割器
+
+    按 submittedDate 升序翻页，支持按提交时间水位增量收割；
+    请求间隔遵守 arXiv API 的使用建议（每 3 秒一次）。
+    """
+
+    def __init__(self, page_size: int = 1000, delay: float = 3.0, max_retries: int = 3,
+                 timeout: float = 60.0, session: Optional[requests.Session] = None,
+                 cache: Optional[ResponseCache] = None, api_url: str = ARXIV_API_URL):
+        """
+        Args:
+            page_size: 每页条目数（上限 2000）
+            delay: 相邻请求的最小间隔 (秒)
+            max_retries: 单页请求失败或返回空页时的重试次数
+            timeout: 请求超时 (秒)
+            session: 自定义会话
+            cache: 响应缓存，默认按 HTTP_CACHE_PATH 环境变量创建
+            api_url: API 地址
+        """
+        self.page_size = min(page_size, MAX_PAGE_SIZE)
+        self.delay = delay
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.api_url = api_url
+        self.session = session or requests.Session()
+        self.last_submitted: Optional[datetime] = None
+        self._last_request = 0.0
+
+        cache = cache or get_default_cache()
+        if cache is not None and session is None:
+            install_cache(self.session, cache)
+
+    def _wait_turn(self):
+        wait = self._last_request + self.delay - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_request = time.monotonic()
+
+    def _fetch_page(self, query: str, start: int, page_size: int) -> requests.Response:
+        """请求一页（流式响应，按 submittedDate 升序）"""
+        params = {
+            'search_query': query,
+            'start': start,
+            'max_results': page_size,
+            'sortBy': 'submittedDate',
+            'sortOrder': 'ascending'
+        }
+        self._wait_turn()
+        response = self.session.get(self.api_url, params=params, timeout=self.timeout, stream=True)
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _page_records(response: requests.Response, parser: ArxivFeedParser) -> Iterator[Dict]:
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            yield from parser.feed(chunk)
+        yield from parser.close()
+
+    def harvest(self, query: str, since: Optional[datetime] = None,
+                max_results: Optional[int] = None) -> Iterator[Dict]:
+        """逐条产出查询结果
+
+        Args:
+            query: arXiv 检索式，例如 'cat:cond-mat.mtrl-sci AND all:"flux growth"'
+            since: 只收割提交时间晚于该时间的论文（水位）
+            max_results: 最多收割的条目数
+
+        产出过程中 self.last_submitted 记录已产出记录的最大提交时间，可作为下一次的 since。
+        """
+        self.last_submitted = None
+        if since is not None:
+            since = since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+            # submittedDate 精确到分钟，边界所在分钟内已收割的记录在下方按时间跳过
+            query = f"({query}) AND submittedDate:[{since:%Y%m%d%H%M} TO 999912312359]"
+            self.last_submitted = since
+
+        start = 0
+        returned = 0
+        total = None
+        retries = 0
+        # 当前页在失败前已处理的条目数，重试同一页时跳过，避免重复产出
+        done_in_page = 0
+
+        while (total is None or start < total) and (max_results is None or returned < max_results):
+            page_size = self.page_size if max_results is None else min(self.page_size, max_results - returned)
+            parser = ArxivFeedParser()
+            try:
+                with self._fetch_page(query, start, page_size) as response:
+                    for record in self._page_records(response, parser):
+                        if parser.entries <= done_in_page:
+                            continue
+                        done_in_page = parser.entries
+
+                        submitted = parse_arxiv_time(record['published'])
+                        if since is not None and submitted is not None and submitted <= since:
+                            continue
+                        if submitted is not None and (self.last_submitted is None or submitted > self.last_submitted):
+                            self.last_submitted = submitted
+                        returned += 1
+                        yield record
+                        if max_results is not None and returned >= max_results:
+                            return
+            except (requests.RequestException, ET.ParseError) as e:
+                if retries >= self.max_retries:
+                    raise
+                retries += 1
+                logger.warning(f"arXiv 请求失败 (start={start}): {e}，重试 {retries}/{self.max_retries}")
+                continue
+
+            total = parser.total_results if parser.total_results is not None else start + parser.entries
+            if parser.entries == 0 and start < total:
+                # arXiv API 偶尔在未到末尾时返回空页，重试同一页
+                if retries >= self.max_retries:
+                    logger.warning(f"arXiv 在 start={start} 处连续返回空页，停止收割")
+                    return
+                retries += 1
+                continue
+
+            retries = 0
+            done_in_page = 0
+            start += parser.entries
+            logger.info(f"arXiv 收割进度: {start}/{total}")
+
+    def harvest_incremental(self, query: str, state_file: str,
+                            max_results: Optional[int] = None) -> Iterator[Dict]:
+        """按保存在 state_file 中的提交时间水位增量收割
+
+        每个查询单独记录水位，生成器正常结束（或被关闭）时写回。
+        """
+        state = {}
+        if os.path.exists(state_file):
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+
+        since = parse_arxiv_time(state.get(query))
+        try:
+            yield from self.harvest(query, since=since, max_results=max_results)
+        finally:
+            if self.last_submitted is not None:
+                state[query] = self.last_submitted.strftime('%Y-%m-%dT%H:%M:%SZ')
+                tmp_file = f"{state_file}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_file, state_file)
@@ -14,6 +14,8 @@ import re
 from dataclasses import dataclass
 from datetime import datetime
 
+from ..utils.minhash import merge_clusters
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -34,7 +36,12 @@ class SearchResult:
 class GoogleScholarService:
     """Google Scholar搜索服务"""
     
-    def __init__(self):
+    def __init__(self, near_duplicate_threshold: Optional[float] = None):
+        """
+        Args:
+            near_duplicate_threshold: 标题+摘要近似重复的 Jaccard 相似度阈值（例如 0.7），默认 None 只做精确去重
+        """
+        self.near_duplicate_threshold = near_duplicate_threshold
         self.base_url = "https://scholar.google.com"
         self.session = requests.Session()
         self._setup_session()
@@ -275,16 +282,23 @@ class GoogleScholarService:
         return False
     
     def _deduplicate_results(self, results: List[SearchResult]) -> List[SearchResult]:
-        """去重搜索结果"""
+        """去重搜索结果
+        
+        先按 URL 精确去重；设置了 near_duplicate_threshold 时再把标题+摘要近似重复的结果归为一簇，
+        保留簇内第一条，缺失的 DOI 和 PDF 链接从其他版本补全（标识符冲突的结果不合并）。
+        """
         seen_urls = set()
-        unique_results = []
+        url_unique = []
         
         for result in results:
             if result.url not in seen_urls:
                 seen_urls.add(result.url)
-                unique_results.append(result)
+                url_unique.append(result)
         
-        return unique_results
+        if self.near_duplicate_threshold is None:
+            return url_unique
+        return merge_clusters(url_unique, lambda r: (r.title, r.abstract),
+                              fields=('doi', 'pdf_url', 'is_aps'), threshold=self.near_duplicate_threshold)
     
     def get_paper_details(self, url: str) -> Optional[SearchResult]:
         """获取论文详细信息"""
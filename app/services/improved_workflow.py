@@ -12,6 +12,9 @@ from pathlib import Path
 
 from .anti_crawler_bypass import AntiCrawlerBypass
 from .pdf_downloader import PDFDownloader, DownloadResult
+from ..utils.identifiers import default_work_id
+from ..utils.minhash import merge_clusters
+from ..utils.pdf_store import PDFStore
 
 logger = logging.getLogger(__name__)
 
@@ -30,10 +33,18 @@ class ImprovedSearchResult:
 class ImprovedWorkflow:
     """改进的工作流程"""
     
-    def __init__(self, download_dir: str = "downloads"):
+    def __init__(self, download_dir: str = "downloads", near_duplicate_threshold: Optional[float] = None):
+        """
+        Args:
+            download_dir: 下载目录
+            near_duplicate_threshold: 标题+摘要近似重复的 Jaccard 相似度阈值（例如 0.7），默认 None 只做精确去重
+        """
         self.download_dir = download_dir
+        self.near_duplicate_threshold = near_duplicate_threshold
         self.bypass = AntiCrawlerBypass()
-        self.downloader = PDFDownloader(download_dir=download_dir)
+        # 下载结果按内容去重存放在 <download_dir>/store，同一论文经不同来源下载只存一份
+        self.store = PDFStore(Path(download_dir) / "store")
+        self.downloader = PDFDownloader(download_dir=download_dir, store=self.store)
         self.results = []
         
         # 创建下载目录
@@ -56,25 +67,22 @@ class ImprovedWorkflow:
         
         all_results = []
         
-        for keyword in keywords:
-            logger.info(f"搜索关键词: {keyword}")
-            
-            # 使用替代搜索源
-            results = self.bypass.search_alternative_sources(keyword)
-            
-            # 转换为统一格式
-            for result in results:
-                search_result = ImprovedSearchResult(
-                    title=result['title'],
-                    authors=result['authors'],
-                    year=result['year'],
-                    abstract=result['abstract'],
-                    pdf_url=result['pdf_url'],
-                    doi=result['doi'],
-                    source=result['source'],
-                    is_aps=self._is_aps_journal(result['title'], result['source'])
-                )
-                all_results.append(search_result)
+        # 使用替代搜索源：全部 来源 × 关键词 组合并发检索，结果在线合并去重
+        results = self.bypass.search_alternative_sources_many(keywords)
+        
+        # 转换为统一格式
+        for result in results:
+            search_result = ImprovedSearchResult(
+                title=result['title'],
+                authors=result['authors'],
+                year=result['year'],
+                abstract=result['abstract'],
+                pdf_url=result['pdf_url'],
+                doi=result['doi'],
+                source=result['source'],
+                is_aps=self._is_aps_journal(result['title'], result['source'])
+            )
+            all_results.append(search_result)
         
         # 去重和排序
         unique_results = self._deduplicate_results(all_results)
@@ -119,51 +127,61 @@ class ImprovedWorkflow:
         return any(keyword in title_lower for keyword in aps_keywords)
     
     def _deduplicate_results(self, results: List[ImprovedSearchResult]) -> List[ImprovedSearchResult]:
-        """去重搜索结果"""
+        """去重搜索结果
+        
+        先按标题精确去重；设置了 near_duplicate_threshold 时再把标题+摘要近似重复的结果
+        （如 arXiv 预印本与正式发表版本）归为一簇，保留簇内第一条，缺失的 DOI 和 PDF 链接从其他版本补全
+        （标识符冲突的结果不合并）。
+        """
         seen_titles = set()
-        unique_results = []
+        title_unique = []
         
         for result in results:
             # 使用标题作为去重键
             title_key = result.title.lower().strip()
             if title_key not in seen_titles:
                 seen_titles.add(title_key)
-                unique_results.append(result)
+                title_unique.append(result)
         
-        return unique_results
+        if self.near_duplicate_threshold is None:
+            return title_unique
+        return merge_clusters(title_unique, lambda r: (r.title, r.abstract),
+                              fields=('doi', 'pdf_url', 'is_aps'), threshold=self.near_duplicate_threshold)
     
     def download_papers(self, search_results: List[ImprovedSearchResult]) -> List[DownloadResult]:
-        """下载论文PDF"""
+        """下载论文PDF（有 PDF 链接的论文并发下载，结果顺序与 search_results 一致）"""
         logger.info(f"开始下载 {len(search_results)} 篇论文...")
         
-        download_results = []
+        download_results: List[Optional[DownloadResult]] = [None] * len(search_results)
+        pdf_infos = []
+        positions = []
         
-        for i, result in enumerate(search_results, 1):
-            logger.info(f"下载 {i}/{len(search_results)}: {result.title[:50]}...")
-            
+        for i, result in enumerate(search_results):
             if not result.pdf_url:
                 logger.warning(f"论文 {result.title[:50]}... 没有PDF链接")
-                download_results.append(DownloadResult(
+                download_results[i] = DownloadResult(
                     success=False,
                     error_message="没有PDF链接",
                     access_type="unknown"
-                ))
+                )
                 continue
             
-            # 生成文件名
-            filename = self._generate_filename(result)
-            
-            # 下载PDF
-            download_result = self.downloader.download_pdf(
-                pdf_url=result.pdf_url,
-                filename=filename,
-                access_type="open" if result.source in ["arXiv", "Semantic Scholar"] else "unknown"
-            )
-            
-            download_results.append(download_result)
-            
+            pdf_infos.append({
+                "pdf_url": result.pdf_url,
+                "filename": self._generate_filename(result),
+                "access_type": "open" if result.source in ["arXiv", "Semantic Scholar"] else "unknown",
+                "paper_id": default_work_id({"doi": result.doi, "pdf_url": result.pdf_url})
+            })
+            positions.append(i)
+        
+        def progress_callback(current, total, message):
+            logger.info(f"下载进度 {current}/{total}: {message}")
+        
+        batch_results = self.downloader.batch_download(pdf_infos, progress_callback)
+        for i, pdf_info, download_result in zip(positions, pdf_infos, batch_results):
+            download_results[i] = download_result
             if download_result.success:
-                logger.info(f"✅ 下载成功: {filename}")
+                logger.info(f"✅ 下载成功: {pdf_info['filename']}")
             else:
                 logger.warning(f"❌ 下载失败: {download_result.error_message}")
         
@@ -279,6 +297,8 @@ class ImprovedWorkflow:
         """关闭资源"""
         self.bypass.close()
         self.downloader.cleanup_failed_downloads()
+        self.downloader.close()
+        self.store.close()
 
 # 测试函数
 def test_improved_workflow():
@@ -7,7 +7,12 @@ import os
 import requests
 import time
 import logging
-from typing import List, Dict, Optional, Callable
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Callable, Tuple
 from pathlib import Path
 from urllib.parse import urlparse
 import hashlib
@@ -15,6 +20,11 @@ from dataclasses import dataclass
 from datetime import datetime
 import PyPDF2
 import json
+from requests.adapters import HTTPAdapter
+
+from ..utils.jsonl_journal import JSONLJournal
+from ..utils.pdf_store import PDFStore, file_digest
+from ..utils.rate_limit import TokenBucket
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -30,29 +40,236 @@ class DownloadResult:
     error_message: Optional[str] = None
     requires_manual_intervention: bool = False
     access_type: str = "unknown"
+    sha256: Optional[str] = None
+
+@dataclass
+class HostPolicy:
+    """单个主机的下载礼貌策略"""
+    max_concurrency: int = 2   # 同时进行的下载数
+    interval: float = 0.5      # 相邻请求开始的最小间隔 (秒)
+
+
+# 各主机的默认策略（按域名后缀匹配，未列出的主机使用 HostPolicy()）
+DEFAULT_HOST_POLICIES = {
+    'arxiv.org': HostPolicy(max_concurrency=2, interval=1.0),
+    'export.arxiv.org': HostPolicy(max_concurrency=1, interval=3.0),
+}
+
+
+def url_host(url: Optional[str]) -> str:
+    """url 的主机名（小写），无法解析时为空字符串"""
+    return (urlparse(url or '').hostname or '').lower()
+
+
+class HostLimiter:
+    """按主机限制并发数和请求间隔，不同主机之间互不影响"""
+    
+    def __init__(self, default_policy: Optional[HostPolicy] = None,
+                 policies: Optional[Dict[str, HostPolicy]] = None):
+        self.default_policy = default_policy or HostPolicy()
+        self.policies = dict(DEFAULT_HOST_POLICIES if policies is None else policies)
+        self._hosts: Dict[str, Tuple[threading.BoundedSemaphore, Optional[TokenBucket]]] = {}
+        self._lock = threading.Lock()
+    
+    def policy_for(self, host: str) -> HostPolicy:
+        """最长后缀匹配的策略"""
+        labels = host.split('.')
+        for i in range(len(labels)):
+            policy = self.policies.get('.'.join(labels[i:]))
+            if policy is not None:
+                return policy
+        return self.default_policy
+    
+    def _limits(self, host: str) -> Tuple[threading.BoundedSemaphore, Optional[TokenBucket]]:
+        with self._lock:
+            if host not in self._hosts:
+                policy = self.policy_for(host)
+                bucket = TokenBucket(1.0 / policy.interval) if policy.interval > 0 else None
+                self._hosts[host] = (threading.BoundedSemaphore(policy.max_concurrency), bucket)
+            return self._hosts[host]
+    
+    @contextmanager
+    def slot(self, url: str):
+        """占用 url 所在主机的一个下载槽位（等待并发槽位和请求间隔）"""
+        semaphore, bucket = self._limits(url_host(url))
+        with semaphore:
+            if bucket is not None:
+                bucket.wait()
+            yield
+
+
+# PDF 验证级别（可按批次选择）
+VALIDATION_NONE = 'none'    # 不验证
+VALIDATION_BASIC = 'basic'  # 边下载边检查 %PDF- 文件头和 %%EOF 文件尾，几乎没有额外开销
+VALIDATION_DEEP = 'deep'    # basic 之后再用 PyMuPDF 打开检查页面和文本（在进程池中执行）
+VALIDATION_LEVELS = (VALIDATION_NONE, VALIDATION_BASIC, VALIDATION_DEEP)
+
+# 文件头中 %PDF- 允许出现的范围、文件尾中查找 %%EOF 的范围 (字节)
+PDF_HEADER_WINDOW = 1024
+PDF_TRAILER_WINDOW = 2048
+MIN_PDF_SIZE = 1024
+
+
+class InvalidPDFError(Exception):
+    """下载内容不是有效的 PDF"""
+
+
+class PDFStreamCheck:
+    """边下载边做的 PDF 快速检查
+    
+    feed() 在文件头的前 1KB 内找不到 %PDF- 时立即报错（例如返回的是 HTML 错误页），
+    finish() 检查文件大小和文件尾的 %%EOF（截断的文件没有文件尾）。
+    """
+    
+    def __init__(self):
+        self.size = 0
+        self.header_ok = False
+        self._head = b''
+        self._tail = b''
+    
+    def feed(self, chunk: bytes):
+        self.size += len(chunk)
+        if not self.header_ok:
+            self._head += chunk[:PDF_HEADER_WINDOW + 5]
+            if b'%PDF-' in self._head:
+                self.header_ok = True
+                self._head = b''
+            elif len(self._head) >= PDF_HEADER_WINDOW + 5:
+                preview = self._head[:40].decode('latin-1').strip()
+                raise InvalidPDFError(f"缺少 %PDF- 文件头: {preview!r}")
+        self._tail = (self._tail + chunk)[-PDF_TRAILER_WINDOW:]
+    
+    def finish(self):
+        if not self.header_ok:
+            raise InvalidPDFError("缺少 %PDF- 文件头")
+        if self.size < MIN_PDF_SIZE:
+            raise InvalidPDFError("PDF文件太小")
+        if b'%%EOF' not in self._tail:
+            raise InvalidPDFError("缺少 %%EOF 文件尾，文件可能不完整")
+    
+    @classmethod
+    def from_file(cls, path: Path) -> 'PDFStreamCheck':
+        """从已有的部分文件恢复检查状态（续传时只读取文件头和文件尾）"""
+        check = cls()
+        size = path.stat().st_size
+        with open(path, 'rb') as f:
+            check.feed(f.read(PDF_HEADER_WINDOW + 5))
+            if size > PDF_HEADER_WINDOW + 5:
+                f.seek(max(PDF_HEADER_WINDOW + 5, size - PDF_TRAILER_WINDOW))
+                check.feed(f.read())
+        return check
+
+
+def check_pdf_structure(path: str) -> Optional[str]:
+    """深度检查：打开 PDF，检查页数和第一页文本
+    
+    Returns:
+        Optional[str]: 不通过的原因，通过时为 None
+    """
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        fitz = None
+    
+    try:
+        if fitz is not None:
+            with fitz.open(path) as document:
+                if document.page_count < 1:
+                    return "PDF文件没有页面"
+                text = document.load_page(0).get_text()
+        else:
+            with open(path, 'rb') as file:
+                reader = PyPDF2.PdfReader(file)
+                if len(reader.pages) < 1:
+                    return "PDF文件没有页面"
+                text = reader.pages[0].extract_text()
+    except Exception as e:
+        return f"无法解析PDF: {e}"
+    
+    if len(text.strip()) < 10:  # 文本太少
+        return "PDF文件文本内容太少"
+    return None
+
+
+# 下载日志（只追加的 JSONL）及旧版整体重写的 JSON 日志
+DOWNLOAD_LOG = 'download_log.jsonl'
+LEGACY_DOWNLOAD_LOG = 'download_log.json'
+
+
+def outcome_key(entry: Dict) -> Optional[str]:
+    """同一下载目标的键：论文 ID，其次文件名，再次 PDF 地址；都没有时为 None"""
+    return entry.get('paper_id') or entry.get('filename') or entry.get('pdf_url')
+
+
+# 未完成下载的临时文件和续传记录的后缀
+PARTIAL_SUFFIX = '.part'
+JOURNAL_SUFFIX = '.json'
+
+# 超过该时间 (秒) 未更新的未完成下载视为过期
+STALE_PARTIAL_AGE = 7 * 24 * 3600
+
 
 class PDFDownloader:
-    """PDF下载器"""
+    """PDF下载器
+    
+    batch_download 用线程池并发下载：总并发数由 max_workers 限制，
+    每个主机的并发数和请求间隔由 HostLimiter 控制；会话的连接池按主机保持长连接。
+    """
     
-    def __init__(self, download_dir: str = "downloads", max_retries: int = 3):
+    def __init__(self, download_dir: str = "downloads", max_retries: int = 3,
+                 max_workers: int = 8, host_policy: Optional[HostPolicy] = None,
+                 host_policies: Optional[Dict[str, HostPolicy]] = None,
+                 store: Optional[PDFStore] = None, validation: str = VALIDATION_BASIC,
+                 validation_workers: Optional[int] = None, database=None):
+        """
+        Args:
+            download_dir: 下载目录（未使用 store 时存放下载结果，使用时只存放未完成的下载）
+            max_retries: 单个文件的最大尝试次数
+            max_workers: 全局并发下载数
+            host_policy: 未单独配置的主机使用的策略
+            host_policies: 按域名配置的主机策略，默认 DEFAULT_HOST_POLICIES
+            store: 内容寻址存储；提供时下载结果按 SHA-256 去重存放，并按论文 ID 建立索引
+            validation: 默认验证级别，见 VALIDATION_LEVELS
+            validation_workers: 深度验证的进程数，默认 CPU 核数
+            database: 记录每次下载尝试的数据库（提供 record_download 的对象，例如 LiteratureDatabase），
+                只记录带论文 ID 的下载；记录由调用 download_pdf/batch_download 的线程写入
+        """
+        if validation not in VALIDATION_LEVELS:
+            raise ValueError(f"不支持的验证级别: {validation}")
         self.download_dir = Path(download_dir)
         self.max_retries = max_retries
+        self.max_workers = max_workers
+        self.host_limiter = HostLimiter(host_policy, host_policies)
+        self.store = store
+        self.database = database
+        self.validation = validation
+        self.validation_workers = validation_workers
+        self._validation_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
         self.session = requests.Session()
-        self.download_log = []
         
         # 创建下载目录
         self.download_dir.mkdir(exist_ok=True)
         
+        # 下载日志：每个结果追加一行，跨运行保留
+        self.journal = JSONLJournal(self.download_dir / DOWNLOAD_LOG)
+        self._migrate_legacy_log()
+        
         # 设置会话
         self._setup_session()
     
     def _setup_session(self):
         """设置请求会话"""
+        # 每个主机的连接池至少容纳全部工作线程，保证并发下载时连接被复用而不是丢弃
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=max(10, self.max_workers))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'application/pdf,application/octet-stream,*/*',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
+            # 不接受压缩编码：Range 续传的偏移量和 Content-Length 都按原始字节计算
+            'Accept-Encoding': 'identity',
             'Connection': 'keep-alive',
             'Cache-Control': 'no-cache'
         })
@@ -60,36 +277,68 @@ class PDFDownloader:
     def download_pdf(self, pdf_url: str, filename: str, 
                     access_type: str = "unknown", 
                     requires_auth: bool = False,
-                    progress_callback: Optional[Callable] = None) -> DownloadResult:
+                    progress_callback: Optional[Callable] = None,
+                    paper_id: Optional[str] = None,
+                    validation: Optional[str] = None) -> DownloadResult:
         """
         下载PDF文件
         
         Args:
             pdf_url: PDF下载URL
-            filename: 文件名
+            filename: 文件名（使用 store 时只用于命名未完成的下载）
             access_type: 访问类型
             requires_auth: 是否需要认证
             progress_callback: 进度回调函数
+            paper_id: 规范论文 ID（例如 identifiers 表的 work_id），使用 store 时按它判断是否已下载
+            validation: 验证级别，默认使用构造时的 validation
             
         Returns:
             DownloadResult: 下载结果
         """
+        result, log_entry = self._download_pdf(pdf_url, filename, access_type, requires_auth,
+                                               progress_callback, paper_id, validation)
+        self._record_to_database(log_entry)
+        return result
+    
+    def _download_pdf(self, pdf_url: str, filename: str, access_type: str, requires_auth: bool,
+                      progress_callback: Optional[Callable], paper_id: Optional[str],
+                      validation: Optional[str]) -> Tuple[DownloadResult, Optional[Dict]]:
+        """下载并写入下载日志，返回 (下载结果, 日志记录)；未发起下载时日志记录为 None
+        
+        数据库记录由调用线程写入（见 _record_to_database），下载线程不持有数据库连接。
+        """
         start_time = time.time()
+        validation = validation or self.validation
         
         try:
             # 检查是否需要人工干预
             if requires_auth and access_type == "subscription":
                 logger.warning(f"需要认证访问: {pdf_url}")
-                return DownloadResult(
+                result = DownloadResult(
                     success=False,
                     error_message="需要认证访问",
                     requires_manual_intervention=True,
                     access_type=access_type
                 )
+                return result, self._log_download(pdf_url, filename, result, paper_id)
             
             # 检查文件是否已存在
+            if self.store is not None and paper_id:
+                # 未完成的下载按论文 ID 命名，标题截断后相同的不同论文不会写同一个文件
+                filename = hashlib.sha1(paper_id.encode('utf-8')).hexdigest()[:20] + '.pdf'
             file_path = self.download_dir / filename
-            if file_path.exists():
+            stored = self.store.get(paper_id) if self.store is not None and paper_id else None
+            if stored is not None:
+                logger.info(f"论文已存储: {paper_id} -> {stored.path}")
+                return DownloadResult(
+                    success=True,
+                    file_path=stored.path,
+                    file_size=stored.size,
+                    download_time=0.0,
+                    access_type=access_type,
+                    sha256=stored.digest
+                ), None
+            if self.store is None and file_path.exists():
                 logger.info(f"文件已存在: {file_path}")
                 return DownloadResult(
                     success=True,
@@ -97,79 +346,206 @@ class PDFDownloader:
                     file_size=file_path.stat().st_size,
                     download_time=0.0,
                     access_type=access_type
-                )
+                ), None
             
-            # 执行下载
-            result = self._download_with_retry(pdf_url, file_path, progress_callback)
+            # 执行下载（写入 .part 文件，验证通过后才改名为最终文件）
+            result = self._download_with_retry(pdf_url, file_path, progress_callback, validation)
+            result.access_type = access_type
             
             if result.success:
-                # 验证PDF文件
-                if self._validate_pdf(file_path):
+                part_path = Path(result.file_path)
+                # 验证PDF文件（basic 检查已在下载过程中完成）
+                if validation != VALIDATION_DEEP or self._validate_pdf(part_path):
+                    if self.store is not None:
+                        # 相同内容已存储时只建立论文 ID 映射，不再保存第二份
+                        stored = self.store.ingest(part_path, digest=result.sha256, paper_id=paper_id,
+                                                   source_url=pdf_url)
+                        file_path = Path(stored.path)
+                    else:
+                        os.replace(part_path, file_path)
+                    self._journal_path(part_path).unlink(missing_ok=True)
                     download_time = time.time() - start_time
+                    result.file_path = str(file_path)
                     result.download_time = download_time
                     result.file_size = file_path.stat().st_size
                     
-                    # 记录下载日志
-                    self._log_download(pdf_url, filename, result)
-                    
                     logger.info(f"PDF下载成功: {filename} ({result.file_size} bytes)")
                 else:
                     result.success = False
+                    result.file_path = None
                     result.error_message = "PDF文件验证失败"
-                    if file_path.exists():
-                        file_path.unlink()  # 删除无效文件
+                    self._discard_partial(part_path)  # 删除无效文件
             
-            return result
+            # 记录下载日志（成功和失败都记录，供重试和统计使用）
+            return result, self._log_download(pdf_url, filename, result, paper_id)
             
         except Exception as e:
             logger.error(f"PDF下载失败: {e}")
-            return DownloadResult(
+            result = DownloadResult(
                 success=False,
                 error_message=str(e),
                 access_type=access_type
             )
+            return result, self._log_download(pdf_url, filename, result, paper_id)
+    
+    @staticmethod
+    def _partial_path(file_path: Path) -> Path:
+        return file_path.with_name(file_path.name + PARTIAL_SUFFIX)
+    
+    @staticmethod
+    def _journal_path(part_path: Path) -> Path:
+        return part_path.with_name(part_path.name + JOURNAL_SUFFIX)
+    
+    def _load_journal(self, part_path: Path, pdf_url: str) -> Optional[Dict]:
+        """读取与 .part 文件配套的记录；URL 不一致或缺少校验信息时不能续传"""
+        journal_path = self._journal_path(part_path)
+        if not part_path.exists() or not journal_path.exists():
+            return None
+        try:
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                journal = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if journal.get('url') != pdf_url or not self._if_range(journal):
+            return None
+        return journal
+    
+    @staticmethod
+    def _if_range(journal: Dict) -> Optional[str]:
+        """If-Range 的值：强 ETag 优先，其次 Last-Modified（弱 ETag 不能用于 If-Range）"""
+        etag = journal.get('etag')
+        if etag and not etag.startswith('W/'):
+            return etag
+        return journal.get('last_modified')
+    
+    def _save_journal(self, part_path: Path, journal: Dict):
+        journal['updated_at'] = time.time()
+        journal_path = self._journal_path(part_path)
+        tmp_path = journal_path.with_name(journal_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(journal, f, ensure_ascii=False)
+        os.replace(tmp_path, journal_path)
+    
+    def _discard_partial(self, part_path: Path):
+        part_path.unlink(missing_ok=True)
+        self._journal_path(part_path).unlink(missing_ok=True)
     
     def _download_with_retry(self, pdf_url: str, file_path: Path, 
-                           progress_callback: Optional[Callable] = None) -> DownloadResult:
-        """带重试的下载"""
+                           progress_callback: Optional[Callable] = None,
+                           validation: str = VALIDATION_BASIC) -> DownloadResult:
+        """带重试的下载
+        
+        数据写入 file_path 旁的 .part 文件，配套的 .part.json 记录 URL、预期长度和
+        ETag/Last-Modified。重试（包括进程重启后的再次下载）时用 Range + If-Range 从已有长度续传，
+        服务端资源变化或不支持 Range 时从头下载。成功时返回的 file_path 为 .part 文件，由调用方验证后改名。
+        validation 不为 none 时边下载边做 PDFStreamCheck，内容不是 PDF 时立即停止下载、不再重试。
+        """
+        part_path = self._partial_path(file_path)
+        last_error = None
+        
         for attempt in range(self.max_retries):
+            journal = self._load_journal(part_path, pdf_url)
+            if journal is None:
+                self._discard_partial(part_path)
+                journal = {'url': pdf_url}
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            
+            headers = {}
+            if offset:
+                headers['Range'] = f"bytes={offset}-"
+                headers['If-Range'] = self._if_range(journal)
+            
             try:
-                logger.info(f"下载尝试 {attempt + 1}/{self.max_retries}: {pdf_url}")
-                
-                response = self.session.get(pdf_url, stream=True, timeout=30)
-                response.raise_for_status()
-                
-                # 检查响应内容类型
-                content_type = response.headers.get('content-type', '').lower()
-                if 'pdf' not in content_type and not pdf_url.endswith('.pdf'):
-                    logger.warning(f"可能不是PDF文件: {content_type}")
+                logger.info(f"下载尝试 {attempt + 1}/{self.max_retries}: {pdf_url}"
+                            + (f" (从 {offset} 字节续传)" if offset else ""))
                 
-                # 下载文件
-                total_size = int(response.headers.get('content-length', 0))
-                downloaded_size = 0
+                with self.host_limiter.slot(pdf_url):
+                    with self.session.get(pdf_url, stream=True, timeout=30, headers=headers) as response:
+                        if response.status_code == 416 and offset and offset == journal.get('expected_length'):
+                            # 上次已完整下载
+                            if validation != VALIDATION_NONE:
+                                PDFStreamCheck.from_file(part_path).finish()
+                            return DownloadResult(success=True, file_path=str(part_path),
+                                                  sha256=file_digest(part_path).hexdigest())
+                        if response.status_code == 416:
+                            self._discard_partial(part_path)
+                            raise requests.exceptions.HTTPError(f"416 Range Not Satisfiable: {pdf_url}",
+                                                                response=response)
+                        response.raise_for_status()
+                        
+                        if response.status_code == 206 and offset:
+                            content_range = response.headers.get('content-range', '')
+                            if not content_range.startswith(f"bytes {offset}-"):
+                                self._discard_partial(part_path)
+                                raise requests.exceptions.ContentDecodingError(
+                                    f"Content-Range 与续传位置不一致: {content_range}")
+                            mode = 'ab'
+                            total_size = journal.get('expected_length') or 0
+                        else:
+                            # 不支持 Range 或资源已变化，从头下载
+                            offset = 0
+                            mode = 'wb'
+                            total_size = int(response.headers.get('content-length', 0))
+                            journal = {
+                                'url': pdf_url,
+                                'expected_length': total_size or None,
+                                'etag': response.headers.get('etag'),
+                                'last_modified': response.headers.get('last-modified')
+                            }
+                        self._save_journal(part_path, journal)
+                        
+                        # 检查响应内容类型
+                        content_type = response.headers.get('content-type', '').lower()
+                        if 'pdf' not in content_type and not pdf_url.endswith('.pdf'):
+                            logger.warning(f"可能不是PDF文件: {content_type}")
+                        
+                        # 连接提前断开时由下方的长度检查报错，已收到的数据保留在 .part 文件中
+                        # （urllib3 的长度校验会丢弃最后一个未读满的块）
+                        response.raw.enforce_content_length = False
+                        
+                        # 下载文件，边写边计算 SHA-256（续传时先读入已有部分）
+                        downloaded_size = offset
+                        hasher = file_digest(part_path) if offset else hashlib.sha256()
+                        check = None
+                        if validation != VALIDATION_NONE:
+                            check = PDFStreamCheck.from_file(part_path) if offset else PDFStreamCheck()
+                        
+                        with open(part_path, mode) as f:
+                            for chunk in response.iter_content(chunk_size=64 * 1024):
+                                if chunk:
+                                    if check is not None:
+                                        check.feed(chunk)
+                                    f.write(chunk)
+                                    hasher.update(chunk)
+                                    downloaded_size += len(chunk)
+                                    
+                                    # 调用进度回调
+                                    if progress_callback and total_size > 0:
+                                        progress = (downloaded_size / total_size) * 100
+                                        progress_callback(progress)
                 
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded_size += len(chunk)
-                            
-                            # 调用进度回调
-                            if progress_callback and total_size > 0:
-                                progress = (downloaded_size / total_size) * 100
-                                progress_callback(progress)
+                if total_size and downloaded_size < total_size:
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f"连接提前结束: {downloaded_size}/{total_size} 字节")
+                if check is not None:
+                    check.finish()
                 
-                return DownloadResult(success=True, file_path=str(file_path))
+                return DownloadResult(success=True, file_path=str(part_path), sha256=hasher.hexdigest())
                 
+            except InvalidPDFError as e:
+                logger.warning(f"PDF文件验证失败: {e} ({pdf_url})")
+                self._discard_partial(part_path)
+                return DownloadResult(success=False, error_message=f"PDF文件验证失败: {e}")
+
             except requests.exceptions.RequestException as e:
+                last_error = e
                 logger.warning(f"下载尝试 {attempt + 1} 失败: {e}")
+                # 客户端错误（404 等）重试无意义；.part 文件保留以便之后续传
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if status is not None and 400 <= status < 500 and status not in (408, 429):
+                    break
                 if attempt < self.max_retries - 1:
                     time.sleep(2 ** attempt)  # 指数退避
-                else:
-                    return DownloadResult(
-                        success=False,
-                        error_message=f"下载失败: {e}"
-                    )
             except Exception as e:
                 logger.error(f"下载过程中发生错误: {e}")
                 return DownloadResult(
@@ -177,93 +553,206 @@ class PDFDownloader:
                     error_message=f"下载错误: {e}"
                 )
         
+        if last_error is not None:
+            return DownloadResult(success=False, error_message=f"下载失败: {last_error}")
         return DownloadResult(success=False, error_message="所有重试尝试都失败了")
     
+    def cleanup_stale_partials(self, max_age: float = STALE_PARTIAL_AGE) -> int:
+        """删除超过 max_age 秒未更新的 .part 文件及其记录（以及失去 .part 文件的记录）
+        
+        Returns:
+            int: 删除的未完成下载数
+        """
+        now = time.time()
+        removed = 0
+        for part_path in self.download_dir.glob(f"*{PARTIAL_SUFFIX}"):
+            journal_path = self._journal_path(part_path)
+            updated = max(part_path.stat().st_mtime,
+                          journal_path.stat().st_mtime if journal_path.exists() else 0)
+            if now - updated > max_age:
+                self._discard_partial(part_path)
+                removed += 1
+        for journal_path in self.download_dir.glob(f"*{PARTIAL_SUFFIX}{JOURNAL_SUFFIX}"):
+            if not journal_path.with_name(journal_path.name[:-len(JOURNAL_SUFFIX)]).exists():
+                journal_path.unlink(missing_ok=True)
+        if removed:
+            logger.info(f"清理了 {removed} 个过期的未完成下载")
+        return removed
+    
+    def _get_validation_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._validation_pool is None:
+                # 下载线程仍在运行，用 spawn 启动子进程，避免 fork 复制线程持有的锁
+                self._validation_pool = ProcessPoolExecutor(
+                    max_workers=self.validation_workers or os.cpu_count(),
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._validation_pool
+    
     def _validate_pdf(self, file_path: Path) -> bool:
-        """验证PDF文件"""
-        try:
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                
-                # 检查页数
-                if len(reader.pages) < 1:
-                    logger.warning("PDF文件没有页面")
-                    return False
-                
-                # 检查文件大小
-                if file_path.stat().st_size < 1024:  # 小于1KB
-                    logger.warning("PDF文件太小")
-                    return False
-                
-                # 尝试提取第一页文本
-                try:
-                    first_page = reader.pages[0]
-                    text = first_page.extract_text()
-                    if len(text.strip()) < 10:  # 文本太少
-                        logger.warning("PDF文件文本内容太少")
-                        return False
-                except Exception:
-                    logger.warning("无法提取PDF文本")
-                    return False
-                
-                return True
-                
-        except Exception as e:
-            logger.error(f"PDF验证失败: {e}")
+        """深度验证PDF文件（在进程池中解析，不占用下载线程的 GIL）"""
+        reason = self._get_validation_pool().submit(check_pdf_structure, str(file_path)).result()
+        if reason is not None:
+            logger.warning(f"{reason}: {file_path}")
             return False
+        return True
+    
+    @property
+    def download_log(self) -> List[Dict]:
+        """全部下载日志（首次访问时从 download_log.jsonl 读入，包含以往运行的记录）"""
+        return self.journal.entries
+    
+    def _migrate_legacy_log(self):
+        """把旧版的 download_log.json 转入 JSONL 日志（只执行一次）"""
+        legacy = self.download_dir / LEGACY_DOWNLOAD_LOG
+        if not legacy.exists() or self.journal.path.exists():
+            return
+        try:
+            with open(legacy, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"无法读取旧版下载日志 {legacy}: {e}")
+            return
+        for entry in entries:
+            self.journal.append(entry)
+        self.journal.sync()
+        legacy.rename(legacy.with_name(legacy.name + '.migrated'))
+        logger.info(f"已将 {len(entries)} 条旧版下载日志转入 {self.journal.path}")
     
-    def _log_download(self, pdf_url: str, filename: str, result: DownloadResult):
-        """记录下载日志"""
+    def _log_download(self, pdf_url: str, filename: str, result: DownloadResult,
+                      paper_id: Optional[str] = None):
+        """记录下载日志（追加一行），返回日志记录"""
         log_entry = {
             "timestamp": datetime.now().isoformat(),
             "pdf_url": pdf_url,
             "filename": filename,
+            "paper_id": paper_id,
             "success": result.success,
+            "file_path": result.file_path,
             "file_size": result.file_size,
             "download_time": result.download_time,
             "error_message": result.error_message,
-            "access_type": result.access_type
+            "requires_manual_intervention": result.requires_manual_intervention,
+            "access_type": result.access_type,
+            "sha256": result.sha256
         }
-        
-        self.download_log.append(log_entry)
-        
-        # 保存到文件
-        log_file = self.download_dir / "download_log.json"
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(self.download_log, f, indent=2, ensure_ascii=False)
+        self.journal.append(log_entry)
+        return log_entry
+    
+    def _record_to_database(self, entry: Optional[Dict]):
+        """把带论文 ID 的日志记录写入数据库的下载记录表；写入失败只记录警告，不影响下载结果"""
+        if self.database is None or entry is None or not entry["paper_id"]:
+            return
+        if entry["success"]:
+            status = "success"
+        elif entry["requires_manual_intervention"]:
+            status = "manual"
+        else:
+            status = "failed"
+        try:
+            self.database.record_download(
+                entry["paper_id"], status,
+                download_url=entry["pdf_url"],
+                file_path=entry["file_path"],
+                error_message=entry["error_message"],
+                file_size=entry["file_size"],
+                sha256=entry["sha256"],
+                access_type=entry["access_type"],
+                elapsed=entry["download_time"]
+            )
+        except Exception as e:
+            logger.warning(f"写入下载记录失败 ({entry['paper_id']}): {e}")
+    
+    def latest_outcomes(self) -> List[Dict]:
+        """每个下载目标（论文 ID 或文件名）的最后一次结果"""
+        return list(self.journal.latest(outcome_key).values())
+    
+    def compact_log(self) -> int:
+        """压缩下载日志：每个下载目标只保留最后一次结果，返回删除的记录数"""
+        removed = self.journal.compact(outcome_key)
+        logger.info(f"下载日志压缩完成，删除 {removed} 条历史记录")
+        return removed
     
     def batch_download(self, pdf_infos: List[Dict], 
-                      progress_callback: Optional[Callable] = None) -> List[DownloadResult]:
+                      progress_callback: Optional[Callable] = None,
+                      max_workers: Optional[int] = None,
+                      validation: Optional[str] = None) -> List[DownloadResult]:
         """
-        批量下载PDF文件
+        批量下载PDF文件（并发执行，结果顺序与 pdf_infos 一致）
         
         Args:
-            pdf_infos: PDF信息列表，每个元素包含pdf_url, filename, access_type等
-            progress_callback: 进度回调函数
+            pdf_infos: PDF信息列表，每个元素包含pdf_url, filename, access_type, paper_id等
+            progress_callback: 进度回调函数，每完成一个文件调用一次 (已完成数, 总数, 消息)
+            max_workers: 本批的全局并发数，默认使用构造时的 max_workers
+            validation: 本批的验证级别，默认使用构造时的 validation
             
         Returns:
             List[DownloadResult]: 下载结果列表
         """
-        results = []
         total = len(pdf_infos)
+        results: List[Optional[DownloadResult]] = [None] * total
         
         logger.info(f"开始批量下载 {total} 个PDF文件")
+        self.cleanup_stale_partials()
         
+        # 同一论文（或同名文件）只下载一次，避免多个线程同时写同一个文件
+        positions: Dict[object, List[int]] = {}
         for i, pdf_info in enumerate(pdf_infos):
-            if progress_callback:
-                progress_callback(i, total, f"下载 {pdf_info.get('filename', 'unknown')}")
-            
-            result = self.download_pdf(
-                pdf_url=pdf_info.get('pdf_url'),
-                filename=pdf_info.get('filename'),
-                access_type=pdf_info.get('access_type', 'unknown'),
-                requires_auth=pdf_info.get('requires_auth', False)
-            )
-            
-            results.append(result)
-            
-            # 添加延迟避免过于频繁的请求
-            time.sleep(1)
+            key = outcome_key(pdf_info)
+            # 无法识别下载目标的条目各自单独处理，不与其他条目合并
+            positions.setdefault(key if key is not None else ('#', i), []).append(i)
+        
+        # 按主机排队，只在主机还有空闲并发槽位时提交：
+        # 受限主机的排队任务不会占住全局线程等待槽位，其他主机的下载不被饿死
+        queues: Dict[str, deque] = {}
+        for indices in positions.values():
+            queues.setdefault(url_host(pdf_infos[indices[0]].get('pdf_url')), deque()).append(indices)
+        in_flight = {host: 0 for host in queues}
+        workers = max_workers or self.max_workers
+        
+        completed = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            while queues or futures:
+                # 各主机轮流提交，每轮每个主机最多一个
+                submitted = True
+                while submitted and len(futures) < workers:
+                    submitted = False
+                    for host in list(queues):
+                        if len(futures) >= workers:
+                            break
+                        if in_flight[host] >= self.host_limiter.policy_for(host).max_concurrency:
+                            continue
+                        indices = queues[host].popleft()
+                        if not queues[host]:
+                            del queues[host]
+                        pdf_info = pdf_infos[indices[0]]
+                        future = executor.submit(
+                            self._download_pdf,
+                            pdf_url=pdf_info.get('pdf_url'),
+                            filename=pdf_info.get('filename'),
+                            access_type=pdf_info.get('access_type', 'unknown'),
+                            requires_auth=pdf_info.get('requires_auth', False),
+                            progress_callback=None,
+                            paper_id=pdf_info.get('paper_id'),
+                            validation=validation
+                        )
+                        futures[future] = (host, indices)
+                        in_flight[host] += 1
+                        submitted = True
+                
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host, indices = futures.pop(future)
+                    in_flight[host] -= 1
+                    result, log_entry = future.result()
+                    # 数据库记录在调用线程中写入，线程池的临时线程不创建数据库连接
+                    self._record_to_database(log_entry)
+                    for i in indices:
+                        results[i] = result
+                        completed += 1
+                        if progress_callback:
+                            progress_callback(completed, total, f"下载 {pdf_infos[i].get('filename', 'unknown')}")
         
         # 统计结果
         successful = sum(1 for r in results if r.success)
@@ -274,19 +763,29 @@ class PDFDownloader:
         
         return results
     
+    def close(self):
+        """关闭会话、深度验证进程池和下载日志"""
+        with self._pool_lock:
+            if self._validation_pool is not None:
+                self._validation_pool.shutdown()
+                self._validation_pool = None
+        self.journal.close()
+        self.session.close()
+    
     def get_download_stats(self) -> Dict:
-        """获取下载统计信息"""
-        if not self.download_log:
+        """获取下载统计信息（按每个下载目标的最后一次结果统计，包含以往运行）"""
+        outcomes = self.latest_outcomes()
+        if not outcomes:
             return {"total": 0, "successful": 0, "failed": 0, "success_rate": 0.0}
         
-        total = len(self.download_log)
-        successful = sum(1 for log in self.download_log if log["success"])
+        total = len(outcomes)
+        successful = sum(1 for log in outcomes if log["success"])
         failed = total - successful
         success_rate = (successful / total) * 100 if total > 0 else 0.0
         
         # 按访问类型统计
         access_types = {}
-        for log in self.download_log:
+        for log in outcomes:
             access_type = log.get("access_type", "unknown")
             if access_type not in access_types:
                 access_types[access_type] = {"total": 0, "successful": 0}
@@ -316,11 +815,15 @@ class PDFDownloader:
         logger.info(f"清理了 {cleaned_count} 个失败的下载文件")
     
     def get_manual_intervention_list(self) -> List[Dict]:
-        """获取需要人工干预的下载列表"""
+        """获取需要人工干预的下载列表（最后一次结果仍需人工干预的下载目标）"""
         return [
-            log for log in self.download_log 
+            log for log in self.latest_outcomes() 
             if log.get("requires_manual_intervention", False)
         ]
+    
+    def get_failed_downloads(self) -> List[Dict]:
+        """最后一次结果为失败的下载目标"""
+        return [log for log in self.latest_outcomes() if not log["success"]]
 
 # 测试函数
 def test_pdf_downloader():
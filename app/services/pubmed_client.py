@@ -0,0 +1,290 @@
+"""
+PubMed E-utilities 批量客户端
+esearch 使用历史服务器 (usehistory=y) 保存检索结果，efetch 按 WebEnv/query_key 分批取回；
+响应用 iterparse 边下载边解析，每解析完一篇 <PubmedArticle> 就产出记录并释放对应元素
+"""
+
+import io
+import logging
+import os
+import random
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import requests
+
+from ..utils.identifiers import normalize_doi, normalize_pmid
+from ..utils.rate_limit import TokenBucket, get_shared_limiter, parse_retry_after
+from ..utils.response_cache import ResponseCache, get_default_cache, install_cache
+
+logger = logging.getLogger(__name__)
+
+EUTILS_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+
+# NCBI 的请求频率上限：无 API key 每秒 3 次，有 API key 每秒 10 次
+RATE_WITHOUT_KEY = 3.0
+RATE_WITH_KEY = 10.0
+
+# efetch 每批的默认条目数
+DEFAULT_BATCH_SIZE = 200
+
+# 可重试的状态码：限速和服务端临时错误
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# 依赖历史服务器会话状态 (WebEnv) 的请求不能缓存：WebEnv 数小时后失效
+NO_STORE = {'Cache-Control': 'no-store'}
+
+
+class PubMedError(Exception):
+    """E-utilities 请求失败（重试耗尽或服务端返回错误）"""
+
+
+class _ChunkReader(io.RawIOBase):
+    """把字节块迭代器包装为 iterparse 可读取的文件对象"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+def _text(elem: Optional[ET.Element]) -> str:
+    """元素的全部文本（包含 <i>、<sup> 等内联标记中的文本），合并多余空白"""
+    if elem is None:
+        return ''
+    return ' '.join(''.join(elem.itertext()).split())
+
+
+def _publication_year(article: ET.Element) -> int:
+    for path in ('MedlineCitation/Article/Journal/JournalIssue/PubDate/Year',
+                 'MedlineCitation/Article/ArticleDate/Year'):
+        year = article.findtext(path)
+        if year and year.strip().isdigit():
+            return int(year)
+    # 例如 <MedlineDate>1998 Dec-1999 Jan</MedlineDate>
+    medline_date = article.findtext('MedlineCitation/Article/Journal/JournalIssue/PubDate/MedlineDate') or ''
+    return int(medline_date[:4]) if medline_date[:4].isdigit() else 0
+
+
+def article_to_record(article: ET.Element) -> Dict:
+    """把 <PubmedArticle> 转为与各检索服务一致的精简记录"""
+    citation = article.find('MedlineCitation')
+    info = citation.find('Article') if citation is not None else None
+    if info is None:
+        info = ET.Element('Article')
+
+    authors = []
+    for author in info.iterfind('AuthorList/Author'):
+        last_name = author.findtext('LastName')
+        if last_name:
+            fore_name = author.findtext('ForeName') or author.findtext('Initials')
+            authors.append(f"{fore_name} {last_name}" if fore_name else last_name)
+        elif author.find('CollectiveName') is not None:
+            authors.append(_text(author.find('CollectiveName')))
+
+    # 结构化摘要由多个带 Label 的 AbstractText 组成，全部保留
+    sections = []
+    for section in info.iterfind('Abstract/AbstractText'):
+        text = _text(section)
+        label = section.get('Label')
+        if text:
+            sections.append(f"{label}: {text}" if label else text)
+
+    doi = article.findtext("PubmedData/ArticleIdList/ArticleId[@IdType='doi']")
+    if not doi:
+        doi = info.findtext("ELocationID[@EIdType='doi']")
+
+    return {
+        'title': _text(info.find('ArticleTitle')),
+        'authors': ', '.join(authors),
+        'year': _publication_year(article),
+        'abstract': '\n'.join(sections),
+        'pdf_url': None,  # PubMed 不直接提供 PDF
+        'doi': normalize_doi(doi) if doi else None,
+        'pmid': normalize_pmid(citation.findtext('PMID') if citation is not None else None),
+        'pmcid': article.findtext("PubmedData/ArticleIdList/ArticleId[@IdType='pmc']"),
+        'journal': info.findtext('Journal/Title') or '',
+        'source': 'PubMed'
+    }
+
+
+def parse_pubmed_articles(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """流式解析 efetch 返回的 PubmedArticleSet"""
+    root = None
+    for event, elem in ET.iterparse(_ChunkReader(chunks), events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        if elem.tag == 'PubmedArticle':
+            yield article_to_record(elem)
+            root.clear()
+        elif elem.tag == 'PubmedBookArticle':
+            root.clear()
+        elif elem.tag == 'ERROR':
+            raise PubMedError(f"efetch 返回错误: {elem.text}")
+
+
+class PubMedClient:
+    """PubMed E-utilities 客户端
+
+    同一进程内的所有实例共享一个限速器（按是否使用 API key 区分配额）。
+    """
+
+    def __init__(self, api_key: Optional[str] = None, email: Optional[str] = None,
+                 tool: str = 'literature-data-extraction', batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_retries: int = 3, backoff_base: float = 1.0, timeout: float = 60.0,
+                 session: Optional[requests.Session] = None, cache: Optional[ResponseCache] = None,
+                 limiter: Optional[TokenBucket] = None, base_url: str = EUTILS_URL):
+        """
+        Args:
+            api_key: NCBI API key，默认读取环境变量 NCBI_API_KEY
+            email: 联系邮箱（NCBI 要求批量请求提供），默认读取环境变量 NCBI_EMAIL
+            tool: 工具名
+            batch_size: efetch 每批条目数
+            max_retries: 单个请求的最大重试次数
+            backoff_base: 指数退避的基础等待时间 (秒)
+            timeout: 请求超时 (秒)
+            session: 自定义会话
+            cache: 响应缓存，默认按 HTTP_CACHE_PATH 环境变量创建
+            limiter: 自定义限速器，默认使用进程内共享的限速器
+            base_url: E-utilities 地址
+        """
+        self.api_key = api_key or os.environ.get('NCBI_API_KEY')
+        self.email = email or os.environ.get('NCBI_EMAIL')
+        self.tool = tool
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.base_url = base_url.rstrip('/')
+        self.session = session or requests.Session()
+
+        if limiter is None:
+            if self.api_key:
+                limiter = get_shared_limiter('ncbi-eutils-key', RATE_WITH_KEY)
+            else:
+                limiter = get_shared_limiter('ncbi-eutils', RATE_WITHOUT_KEY)
+        self.limiter = limiter
+
+        cache = cache or get_default_cache()
+        if cache is not None and session is None:
+            install_cache(self.session, cache)
+
+    def _common_params(self) -> Dict:
+        params = {'db': 'pubmed', 'tool': self.tool}
+        if self.email:
+            params['email'] = self.email
+        if self.api_key:
+            params['api_key'] = self.api_key
+        return params
+
+    def _request(self, endpoint: str, params: Dict, data: Optional[Dict] = None,
+                 headers: Optional[Dict] = None, stream: bool = False) -> requests.Response:
+        """发送请求，限速并对 429/5xx 和网络错误退避重试；data 不为空时使用 POST"""
+        url = f"{self.base_url}/{endpoint}"
+        params = dict(self._common_params(), **params)
+        attempt = 0
+        while True:
+            self.limiter.wait()
+            try:
+                if data is not None:
+                    response = self.session.post(url, params=params, data=data, headers=headers,
+                                                 timeout=self.timeout, stream=stream)
+                else:
+                    response = self.session.get(url, params=params, headers=headers,
+                                                timeout=self.timeout, stream=stream)
+            except requests.RequestException as e:
+                if attempt >= self.max_retries:
+                    raise PubMedError(f"{endpoint} 请求失败: {e}") from e
+                delay = self.backoff_base * 2 ** attempt
+            else:
+                if response.status_code == 200:
+                    return response
+                response.close()
+                if response.status_code not in RETRY_STATUS or attempt >= self.max_retries:
+                    raise PubMedError(f"{endpoint} 返回 {response.status_code}")
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                delay = retry_after if retry_after is not None else self.backoff_base * 2 ** attempt
+                if response.status_code == 429:
+                    self.limiter.pause(delay)
+
+            attempt += 1
+            delay += random.uniform(0, self.backoff_base)
+            logger.warning(f"PubMed {endpoint} 请求失败，{delay:.1f} 秒后重试 ({attempt}/{self.max_retries})")
+            time.sleep(delay)
+
+    def esearch(self, query: str, **filters) -> Dict:
+        """在历史服务器上执行检索
+
+        Args:
+            query: PubMed 检索式
+            **filters: 其他 esearch 参数，例如 mindate/maxdate/datetype/sort
+
+        Returns:
+            {'count': 结果总数, 'webenv': WebEnv, 'query_key': query_key}
+        """
+        params = dict(filters, term=query, usehistory='y', retmax=0, retmode='json')
+        response = self._request('esearch.fcgi', params, headers=NO_STORE)
+        result = response.json().get('esearchresult', {})
+        if 'ERROR' in result or 'webenv' not in result:
+            raise PubMedError(f"esearch 失败: {result.get('ERROR') or result}")
+        return {
+            'count': int(result.get('count', 0)),
+            'webenv': result['webenv'],
+            'query_key': result['querykey']
+        }
+
+    def _fetch_batch(self, params: Dict, data: Optional[Dict] = None,
+                     headers: Optional[Dict] = None) -> Iterator[Dict]:
+        params = dict(params, retmode='xml', rettype='abstract')
+        with self._request('efetch.fcgi', params, data=data, headers=headers, stream=True) as response:
+            yield from parse_pubmed_articles(response.iter_content(chunk_size=64 * 1024))
+
+    def search(self, query: str, max_results: Optional[int] = None, **filters) -> Iterator[Dict]:
+        """检索并逐条产出完整记录（含 DOI 和完整摘要）
+
+        Args:
+            query: PubMed 检索式
+            max_results: 最多产出的条目数
+            **filters: 其他 esearch 参数
+        """
+        history = self.esearch(query, **filters)
+        total = history['count'] if max_results is None else min(history['count'], max_results)
+        logger.info(f"PubMed 检索 '{query}' 共 {history['count']} 条，取回 {total} 条")
+
+        for start in range(0, total, self.batch_size):
+            params = {
+                'WebEnv': history['webenv'],
+                'query_key': history['query_key'],
+                'retstart': start,
+                'retmax': min(self.batch_size, total - start)
+            }
+            yield from self._fetch_batch(params, headers=NO_STORE)
+
+    def fetch(self, pmids: Iterable[str]) -> Iterator[Dict]:
+        """按 PMID 列表分批取回记录（POST 提交 ID，避免 URL 过长；结果可缓存）"""
+        batch: List[str] = []
+        for pmid in pmids:
+            pmid = normalize_pmid(pmid)
+            if pmid:
+                batch.append(pmid)
+            if len(batch) >= self.batch_size:
+                yield from self._fetch_batch({}, data={'id': ','.join(batch)})
+                batch = []
+        if batch:
+            yield from self._fetch_batch({}, data={'id': ','.join(batch)})
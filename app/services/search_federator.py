@@ -0,0 +1,205 @@
+"""
+多源联合检索
+把 来源 × 检索词 的全部组合并发执行（每个来源单独限制并发数和请求速率），
+结果到达时即合并为统一格式的记录并在线去重，通过异步迭代器逐条产出
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from ..utils.identifiers import extract_identifiers, identifiers_conflict, title_fingerprint
+from ..utils.minhash import NearDuplicateIndex
+from ..utils.rate_limit import SEMANTIC_SCHOLAR_LIMITER, SEMANTIC_SCHOLAR_RATE, TokenBucket, get_shared_limiter
+
+logger = logging.getLogger(__name__)
+
+# 统一记录格式的字段及缺省值
+RECORD_FIELDS = {
+    'title': '',
+    'authors': '',
+    'year': 0,
+    'abstract': '',
+    'pdf_url': None,
+    'doi': None,
+    'arxiv_id': None,
+    'pmid': None,
+    'paper_id': None,
+    'source': '',
+}
+
+SearchFunc = Callable[[str], Union[List[Dict], Awaitable[List[Dict]]]]
+
+
+@dataclass
+class SearchSource:
+    """一个检索来源
+
+    search 接收检索词、返回记录列表；同步函数在线程池中执行，协程函数直接等待。
+    """
+    name: str
+    search: SearchFunc
+    max_concurrency: int = 2
+    limiter: Optional[TokenBucket] = None
+
+
+def default_sources(bypass) -> List[SearchSource]:
+    """AntiCrawlerBypass 提供的三个替代学术源（速率按各 API 的公开限制设置）"""
+    return [
+        # 与 SemanticScholarClient 共用同一个令牌桶，联合检索和其他检索入口合计不超过配额
+        SearchSource('Semantic Scholar', bypass._search_semantic_scholar, max_concurrency=1,
+                     limiter=get_shared_limiter(SEMANTIC_SCHOLAR_LIMITER, SEMANTIC_SCHOLAR_RATE)),
+        # arXiv API 要求相邻请求间隔 3 秒
+        SearchSource('arXiv', bypass._search_arxiv, max_concurrency=1,
+                     limiter=get_shared_limiter('arxiv', 1 / 3)),
+        # PubMedClient 自带进程内共享的限速器
+        SearchSource('PubMed', bypass._search_pubmed, max_concurrency=3),
+    ]
+
+
+class RecordMerger:
+    """在线合并去重
+
+    依次按外部标识符 (DOI / arXiv / PMID / S2)、规范化标题和标题+摘要的 MinHash 近似匹配
+    查找已有记录；命中时补全已有记录的缺失字段，否则登记为新记录。
+    """
+
+    def __init__(self, near_duplicate_threshold: Optional[float] = 0.7):
+        """
+        Args:
+            near_duplicate_threshold: 近似重复的 Jaccard 阈值，None 表示只做精确去重
+        """
+        self.records: List[Dict] = []
+        self._keys: Dict[str, Dict] = {}
+        self._near = (NearDuplicateIndex(threshold=near_duplicate_threshold)
+                      if near_duplicate_threshold is not None else None)
+
+    def _find(self, record: Dict, identifier_keys: List[str], title_key: Optional[str]) -> Optional[Dict]:
+        for key in identifier_keys:
+            if key in self._keys:
+                return self._keys[key]
+        if title_key and title_key in self._keys and not identifiers_conflict(self._keys[title_key], record):
+            return self._keys[title_key]
+        if self._near is not None:
+            match = self._near.find_duplicate(record['title'], record['abstract'])
+            if match is not None and not identifiers_conflict(self.records[int(match)], record):
+                return self.records[int(match)]
+        return None
+
+    @staticmethod
+    def _fill(target: Dict, record: Dict):
+        for field in RECORD_FIELDS:
+            if field != 'source' and not target.get(field) and record.get(field):
+                target[field] = record[field]
+        # 保留较完整的摘要
+        if len(record.get('abstract') or '') > len(target.get('abstract') or ''):
+            target['abstract'] = record['abstract']
+
+    def add(self, record: Dict, source: str, query: Optional[str] = None) -> Tuple[Dict, bool]:
+        """合并一条记录
+
+        Returns:
+            (合并后的记录, 是否为新记录)；已有记录会被原地更新
+        """
+        record = {**RECORD_FIELDS, **record}
+        record['source'] = record.get('source') or source
+        identifier_keys = [f"{scheme}:{value}" for scheme, value in extract_identifiers(record).items()]
+        fingerprint = title_fingerprint(record['title'])
+        title_key = f"title:{fingerprint}" if fingerprint else None
+
+        existing = self._find(record, identifier_keys, title_key)
+        if existing is None:
+            existing = record
+            existing['sources'] = []
+            existing['queries'] = []
+            self.records.append(existing)
+            if self._near is not None and record['title']:
+                self._near.add(str(len(self.records) - 1), record['title'], record['abstract'])
+            is_new = True
+        else:
+            self._fill(existing, record)
+            is_new = False
+
+        if source not in existing['sources']:
+            existing['sources'].append(source)
+        if query is not None and query not in existing['queries']:
+            existing['queries'].append(query)
+        # 合并后补全的标识符同样登记，后续记录可直接按其命中
+        for key in identifier_keys + [f"{scheme}:{value}" for scheme, value in extract_identifiers(existing).items()]:
+            self._keys.setdefault(key, existing)
+        if title_key:
+            self._keys.setdefault(title_key, existing)
+        return existing, is_new
+
+    def close(self):
+        if self._near is not None:
+            self._near.close()
+
+
+class SearchFederator:
+    """多源联合检索器
+
+    >>> federator = SearchFederator(default_sources(AntiCrawlerBypass()))
+    >>> async for record in federator.stream(["flux growth", "chemical vapor transport"]):
+    ...     print(record['title'], record['sources'])
+    """
+
+    def __init__(self, sources: Iterable[SearchSource], near_duplicate_threshold: Optional[float] = 0.7):
+        """
+        Args:
+            sources: 检索来源
+            near_duplicate_threshold: 近似重复的 Jaccard 阈值，None 表示只做精确去重
+        """
+        self.sources = list(sources)
+        self.near_duplicate_threshold = near_duplicate_threshold
+
+    async def _run_source(self, source: SearchSource, query: str, semaphore: asyncio.Semaphore) -> List[Dict]:
+        async with semaphore:
+            if source.limiter is not None:
+                await source.limiter.acquire()
+            try:
+                if asyncio.iscoroutinefunction(source.search):
+                    results = await source.search(query)
+                else:
+                    results = await asyncio.to_thread(source.search, query)
+            except Exception as e:
+                logger.error(f"{source.name}搜索失败 ({query}): {e}")
+                return []
+        logger.info(f"{source.name}找到 {len(results)} 篇论文 ({query})")
+        return results
+
+    async def stream(self, queries: Iterable[str]) -> AsyncIterator[Dict]:
+        """并发检索全部 来源 × 检索词 组合，按到达顺序产出去重后的新记录
+
+        同一论文后到达的其他版本只用于补全已产出记录的缺失字段（原地更新），不再重复产出；
+        每条记录的 sources/queries 字段列出命中它的来源和检索词。
+        """
+        queries = list(dict.fromkeys(queries))
+        semaphores = {source.name: asyncio.Semaphore(source.max_concurrency) for source in self.sources}
+        merger = RecordMerger(self.near_duplicate_threshold)
+
+        async def run(source: SearchSource, query: str):
+            return source, query, await self._run_source(source, query, semaphores[source.name])
+
+        tasks = [asyncio.create_task(run(source, query)) for query in queries for source in self.sources]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                source, query, results = await finished
+                for result in results:
+                    record, is_new = merger.add(result, source.name, query)
+                    if is_new:
+                        yield record
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            merger.close()
+
+    async def search(self, queries: Iterable[str]) -> List[Dict]:
+        """并发检索并返回合并后的全部记录"""
+        return [record async for record in self.stream(queries)]
+
+    def search_sync(self, queries: Iterable[str]) -> List[Dict]:
+        """同步调用入口（不能在正在运行的事件循环中调用）"""
+        return asyncio.run(self.search(queries))
@@ -14,6 +14,7 @@ from pathlib import Path
 from .google_scholar_service import GoogleScholarService, SearchResult
 from .aps_pdf_extractor import APSPDFExtractor, PDFInfo
 from .pdf_downloader import PDFDownloader, DownloadResult
+from ..utils.jsonl_journal import JSONLJournal
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -43,8 +44,8 @@ class WorkflowIntegrator:
         self.aps_extractor = APSPDFExtractor(use_selenium=use_selenium)
         self.pdf_downloader = PDFDownloader(download_dir=download_dir)
         
-        # 工作流程日志
-        self.workflow_log = []
+        # 工作流程日志（只追加的 JSONL，跨运行保留）
+        self.workflow_journal = JSONLJournal(Path(download_dir) / "workflow_log.jsonl")
         
         logger.info("工作流程集成器初始化完成")
     
@@ -235,12 +236,12 @@ class WorkflowIntegrator:
             "success_rate": (result.successful_downloads / result.total_processed * 100) if result.total_processed > 0 else 0
         }
         
-        self.workflow_log.append(log_entry)
-        
-        # 保存到文件
-        log_file = Path(self.download_dir) / "workflow_log.json"
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(self.workflow_log, f, indent=2, ensure_ascii=False)
+        self.workflow_journal.append(log_entry)
+    
+    @property
+    def workflow_log(self) -> List[Dict]:
+        """全部工作流程日志（首次访问时读入）"""
+        return self.workflow_journal.entries
     
     def get_workflow_stats(self) -> Dict:
         """获取工作流程统计信息"""
@@ -272,7 +273,9 @@ class WorkflowIntegrator:
     
     def retry_failed_downloads(self, progress_callback: Optional[Callable] = None) -> List[DownloadResult]:
         """重试失败的下载"""
-        failed_downloads = [r for r in self.pdf_downloader.download_log if not r["success"]]
+        # 最后一次结果仍为失败的下载（包括以往运行）；需要人工干预的不自动重试
+        failed_downloads = [r for r in self.pdf_downloader.get_failed_downloads()
+                            if not r.get("requires_manual_intervention", False)]
         
         if not failed_downloads:
             logger.info("没有失败的下载需要重试")
@@ -286,6 +289,7 @@ class WorkflowIntegrator:
             retry_infos.append({
                 "pdf_url": log["pdf_url"],
                 "filename": log["filename"],
+                "paper_id": log.get("paper_id"),
                 "access_type": log.get("access_type", "unknown"),
                 "requires_auth": log.get("requires_manual_intervention", False)
             })
@@ -297,6 +301,8 @@ class WorkflowIntegrator:
         """清理资源"""
         if hasattr(self, 'aps_extractor'):
             self.aps_extractor.close()
+        self.pdf_downloader.close()
+        self.workflow_journal.close()
         
         logger.info("工作流程集成器清理完成")
 
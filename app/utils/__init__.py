@@ -0,0 +1,41 @@
+"""
+工具函数模块
+
+不依赖数据库和网络的通用工具函数
+"""
+
+from .identifiers import (
+    IDENTIFIER_SCHEMES, default_work_id, extract_identifiers, identifiers_conflict, normalize_arxiv_id,
+    normalize_doi, normalize_pmid, normalize_s2_id, normalize_title, title_fingerprint
+)
+from .jsonl_journal import JSONLJournal
+from .pdf_store import PDFStore, StoredBlob
+from .minhash import MinHasher, NearDuplicateIndex, cluster_near_duplicates, merge_clusters
+from .rate_limit import TokenBucket, get_shared_limiter, parse_retry_after
+from .response_cache import CacheMissError, ResponseCache, install_cache
+
+__all__ = [
+    "IDENTIFIER_SCHEMES",
+    "default_work_id",
+    "extract_identifiers",
+    "identifiers_conflict",
+    "normalize_arxiv_id",
+    "normalize_doi",
+    "normalize_pmid",
+    "normalize_s2_id",
+    "normalize_title",
+    "title_fingerprint",
+    "JSONLJournal",
+    "PDFStore",
+    "StoredBlob",
+    "MinHasher",
+    "NearDuplicateIndex",
+    "cluster_near_duplicates",
+    "merge_clusters",
+    "TokenBucket",
+    "get_shared_limiter",
+    "parse_retry_after",
+    "CacheMissError",
+    "ResponseCache",
+    "install_cache"
+]
@@ -0,0 +1,153 @@
+"""
+文献标识符规范化
+
+不同来源返回的 DOI 大小写、URL 前缀各不相同，标题也存在大小写、标点和空白差异，
+去重和关联前统一规范化为可比较的键。
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Dict, Mapping, Optional
+from urllib.parse import unquote
+
+# DOI 常见前缀：https://doi.org/、http://dx.doi.org/、doi: 等
+_DOI_PREFIX = re.compile(r'^(?:https?://)?(?:dx\.)?(?:doi\.org/)|^doi:\s*', re.IGNORECASE)
+_DOI_PATTERN = re.compile(r'^10\.\d{4,9}/\S+$')
+_NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+
+# arXiv 新格式 2401.01234(v2) 和旧格式 cond-mat/0601001(v1)，可带 URL 或 arXiv: 前缀
+_ARXIV_PATTERN = re.compile(
+    r'^(?:(?:https?://)?(?:www\.|export\.)?arxiv\.org/(?:abs|pdf)/|arxiv:\s*)?'
+    r'(\d{4}\.\d{4,5}|[a-z][a-z\-]+(?:\.[a-z]{2})?/\d{7})(?:v\d+)?(?:\.pdf)?/?$',
+    re.IGNORECASE
+)
+_PMID_PATTERN = re.compile(r'^(?:pmid:\s*)?(\d{1,9})$', re.IGNORECASE)
+_S2_ID_PATTERN = re.compile(r'^[0-9a-f]{40}$', re.IGNORECASE)
+
+# 标识符类型，按优先级排列：新建作品时以第一个可用的标识符作为规范作品 ID
+IDENTIFIER_SCHEMES = ('doi', 'arxiv', 'pmid', 's2')
+
+# 表示"缺失"的占位值（analyze_paper 对缺失字段填充 'Unknown'）
+_MISSING_VALUES = {'', 'unknown', 'none', 'null', 'n/a'}
+
+
+def normalize_doi(doi: Optional[str]) -> Optional[str]:
+    """规范化 DOI：去掉 URL/doi: 前缀和尾部标点并转小写，无效时返回 None
+
+    >>> normalize_doi('https://doi.org/10.1103/PhysRevB.99.1')
+    '10.1103/physrevb.99.1'
+    """
+    if not doi or not isinstance(doi, str):
+        return None
+
+    value = unquote(doi.strip())
+    while True:
+        stripped = _DOI_PREFIX.sub('', value, count=1).strip()
+        if stripped == value:
+            break
+        value = stripped
+
+    value = value.rstrip('.,;').lower()
+    return value if _DOI_PATTERN.match(value) else None
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """规范化标题：Unicode 兼容分解、大小写折叠，标点和连续空白合并为单个空格"""
+    if not title or not isinstance(title, str):
+        return ''
+
+    text = unicodedata.normalize('NFKC', title).casefold()
+    text = _NON_WORD.sub(' ', text).strip()
+    return '' if text in _MISSING_VALUES else text
+
+
+def title_fingerprint(title: Optional[str]) -> Optional[str]:
+    """规范化标题的 64 位哈希（十六进制），标题为空时返回 None"""
+    normalized = normalize_title(title)
+    if not normalized:
+        return None
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def normalize_arxiv_id(arxiv_id: Optional[str]) -> Optional[str]:
+    """规范化 arXiv ID：去掉 URL/arXiv: 前缀和版本号，无效时返回 None
+
+    >>> normalize_arxiv_id('http://arxiv.org/abs/2401.01234v2')
+    '2401.01234'
+    """
+    if not arxiv_id or not isinstance(arxiv_id, str):
+        return None
+    match = _ARXIV_PATTERN.match(arxiv_id.strip())
+    return match.group(1).lower() if match else None
+
+
+def normalize_pmid(pmid) -> Optional[str]:
+    """规范化 PubMed ID（纯数字，去掉前导零），无效时返回 None"""
+    if isinstance(pmid, int):
+        pmid = str(pmid)
+    if not pmid or not isinstance(pmid, str):
+        return None
+    match = _PMID_PATTERN.match(pmid.strip())
+    return str(int(match.group(1))) if match and int(match.group(1)) else None
+
+
+def normalize_s2_id(paper_id: Optional[str]) -> Optional[str]:
+    """规范化 Semantic Scholar paperId（40 位十六进制的统一转小写），缺失时返回 None"""
+    if not paper_id or not isinstance(paper_id, str):
+        return None
+    value = paper_id.strip()
+    if value.lower() in _MISSING_VALUES:
+        return None
+    return value.lower() if _S2_ID_PATTERN.match(value) else value
+
+
+def extract_identifiers(record: Mapping) -> Dict[str, str]:
+    """从任一来源的记录中提取规范化的外部标识符
+
+    支持 Semantic Scholar 原始格式 (paperId, externalIds)、analyze_paper 之后的格式
+    (paper_id, doi) 以及各检索服务返回的 arxiv_id / pmid / pdf_url 字段。
+
+    Returns:
+        Dict: {标识符类型: 规范化值}，类型见 IDENTIFIER_SCHEMES
+    """
+    external_ids = record.get('externalIds') or {}
+    candidates = {
+        'doi': [record.get('doi'), external_ids.get('DOI')],
+        'arxiv': [record.get('arxiv_id'), external_ids.get('ArXiv'), record.get('pdf_url'), record.get('url')],
+        'pmid': [record.get('pmid'), external_ids.get('PubMed')],
+        's2': [record.get('paperId'), record.get('paper_id')],
+    }
+    normalizers = {
+        'doi': normalize_doi,
+        'arxiv': normalize_arxiv_id,
+        'pmid': normalize_pmid,
+        's2': normalize_s2_id,
+    }
+
+    identifiers = {}
+    for scheme in IDENTIFIER_SCHEMES:
+        for value in candidates[scheme]:
+            normalized = normalizers[scheme](value)
+            if normalized:
+                identifiers[scheme] = normalized
+                break
+    return identifiers
+
+
+def identifiers_conflict(first: Mapping, second: Mapping) -> bool:
+    """两条记录是否带有同类型但不同值的标识符（标题相近的不同论文，例如勘误或只差化学式的工作）"""
+    first_ids, second_ids = extract_identifiers(first), extract_identifiers(second)
+    return any(first_ids[scheme] != second_ids[scheme] for scheme in first_ids.keys() & second_ids.keys())
+
+
+def default_work_id(record: Mapping) -> Optional[str]:
+    """不经过 identifiers 表时的规范论文 ID：按 IDENTIFIER_SCHEMES 优先级取第一个标识符 (scheme:value)
+
+    与 identifiers 表为新论文分配 work_id 的规则一致，没有任何标识符时返回 None。
+    """
+    identifiers = extract_identifiers(record)
+    for scheme in IDENTIFIER_SCHEMES:
+        if scheme in identifiers:
+            return f"{scheme}:{identifiers[scheme]}"
+    return None
@@ -0,0 +1,128 @@
+"""
+只追加的 JSONL 日志
+每条记录追加一行，按批次 fsync；历史记录在首次访问时才读入，需要时再压缩
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Union
+
+
+class JSONLJournal:
+    """只追加的 JSONL 日志（多个线程可共享同一个实例）
+
+    - append() 只写一行，不重写已有内容；每 fsync_every 条或 fsync_interval 秒 fsync 一次
+    - entries 在首次访问时从文件读入，之后与追加的记录保持同步
+    - 进程崩溃时最后一行可能不完整，读入时跳过
+    """
+
+    def __init__(self, path: Union[str, Path], fsync_every: int = 64, fsync_interval: float = 1.0):
+        """
+        Args:
+            path: 日志文件
+            fsync_every: 累计多少条未同步的记录后 fsync
+            fsync_interval: 距上次 fsync 超过多少秒后 fsync
+        """
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._entries: Optional[List[Dict]] = None
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.RLock()
+
+    def _load(self) -> List[Dict]:
+        entries = []
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        return entries
+
+    @property
+    def entries(self) -> List[Dict]:
+        """全部记录（首次访问时读入文件）"""
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            return self._entries
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            # 上次崩溃留下的不完整行单独成行，不与新记录粘连
+            if self._file.tell() > 0:
+                with open(self.path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        self._file.write('\n')
+        return self._file
+
+    def append(self, entry: Dict):
+        """追加一条记录"""
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            f = self._open()
+            f.write(line + '\n')
+            f.flush()
+            if self._entries is not None:
+                self._entries.append(entry)
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self.sync()
+
+    def sync(self):
+        """把已追加的记录 fsync 到磁盘"""
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def latest(self, key: Callable[[Dict], Hashable]) -> Dict[Hashable, Dict]:
+        """每个键的最后一条记录（保持首次出现的顺序）"""
+        latest: Dict[Hashable, Dict] = {}
+        for entry in self.entries:
+            latest[key(entry)] = entry
+        return latest
+
+    def compact(self, key: Optional[Callable[[Dict], Hashable]] = None) -> int:
+        """重写日志文件：去掉不完整的行，提供 key 时每个键只保留最后一条记录
+
+        Returns:
+            int: 删除的记录数
+        """
+        with self._lock:
+            entries = self.entries
+            kept = list(self.latest(key).values()) if key is not None else list(entries)
+
+            self.close()
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in kept:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+            self._entries = kept
+            return len(entries) - len(kept)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self.sync()
+                self._file.close()
+                self._file = None
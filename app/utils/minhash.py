@@ -0,0 +1,322 @@
+"""
+近似重复检测 (MinHash + LSH)
+
+预印本和正式发表版本的标题、摘要往往只有细微差异，精确匹配无法识别。
+这里把规范化后的 标题+摘要 切分为字符 k-gram，用 MinHash 签名估计 Jaccard 相似度，
+再按 LSH 分段 (band) 建立倒排桶：查询时只比较落入同一个桶的候选，
+耗时与已存储的论文数量基本无关。
+
+签名和桶保存在 SQLite 中（默认内存数据库），可以跨运行持久化；
+相互近似重复的记录被归入同一个簇 (cluster)。
+"""
+
+import hashlib
+import sqlite3
+import threading
+from dataclasses import asdict, replace
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from .identifiers import identifiers_conflict, normalize_title
+
+T = TypeVar('T')
+
+# 2^61 - 1，通用哈希 (a * x + b) mod p 的模数
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_SHINGLE_BASE = np.uint64(257)
+
+
+def shingle_hashes(text: str, size: int = 5) -> np.ndarray:
+    """规范化文本后计算全部字符 k-gram 的 32 位哈希（去重）"""
+    data = normalize_title(text).encode('utf-8')
+    if not data:
+        return np.empty(0, dtype=np.uint64)
+    if len(data) < size:
+        data = data.ljust(size)
+
+    window = np.lib.stride_tricks.sliding_window_view(np.frombuffer(data, dtype=np.uint8), size)
+    powers = _SHINGLE_BASE ** np.arange(size - 1, -1, -1, dtype=np.uint64)
+    # 多项式滚动哈希（uint64 溢出即取模 2^64），再截断为 32 位
+    hashes = (window.astype(np.uint64) * powers).sum(axis=1, dtype=np.uint64)
+    hashes ^= hashes >> np.uint64(32)
+    return np.unique(hashes & _MAX_HASH)
+
+
+def choose_lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """选择 LSH 分段数 b 和每段行数 r (b * r <= num_perm)
+
+    两篇相似度为 s 的论文成为候选的概率为 1 - (1 - s^r)^b，其陡变点约为 (1/b)^(1/r)；
+    选择陡变点最接近阈值的组合，陡变点相同时优先使用更多的段（召回更高）。
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        knee = (1.0 / bands) ** (1.0 / rows)
+        key = (abs(knee - threshold), -bands)
+        if best is None or key < best[0]:
+            best = (key, bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    """MinHash 签名计算（固定随机种子，签名可跨进程比较）"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # a < 2^31、x < 2^32 保证 a * x + b 不会溢出 uint64
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, text: str) -> np.ndarray:
+        """计算文本的 MinHash 签名 (uint32 数组)，空文本返回全 0xFFFFFFFF"""
+        hashes = shingle_hashes(text, self.shingle_size)
+        if not len(hashes):
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        permuted = (self._a * hashes[None, :] + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """用签名估计 Jaccard 相似度"""
+        return float(np.mean(first == second))
+
+
+def paper_text(title: Optional[str], abstract: Optional[str] = None) -> str:
+    """参与近似去重的文本：标题 + 摘要"""
+    return f"{title or ''} {abstract or ''}"
+
+
+class NearDuplicateIndex:
+    """基于 MinHash + LSH 的近似重复索引
+
+    - minhash_signatures: key -> 签名、所属簇
+    - minhash_buckets: (band, bucket) -> key 的倒排桶，查询时按主键范围查找
+    """
+
+    def __init__(self, db_path: str = ':memory:', threshold: float = 0.7,
+                 num_perm: int = 128, shingle_size: int = 5):
+        """
+        Args:
+            db_path: 签名存储的 SQLite 文件，默认内存数据库（不持久化）
+            threshold: 判定为近似重复的 Jaccard 相似度阈值
+            num_perm: 签名长度（越长估计越准，存储和计算开销越大）
+            shingle_size: 字符 k-gram 长度
+        """
+        self.db_path = db_path
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.bands, self.rows = choose_lsh_params(threshold, num_perm)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        if db_path != ':memory:':
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._create_schema()
+
+    def _create_schema(self):
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS minhash_signatures (
+                key TEXT PRIMARY KEY,
+                cluster TEXT NOT NULL,
+                signature BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_minhash_cluster ON minhash_signatures (cluster);
+            CREATE TABLE IF NOT EXISTS minhash_buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (band, bucket, key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS minhash_meta (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            );
+        ''')
+
+        # 签名参数改变后旧签名不可比较
+        params = f"{self.hasher.num_perm}:{self.hasher.shingle_size}:{self.bands}x{self.rows}"
+        stored = self.get_meta('params')
+        if stored != params:
+            if stored is not None:
+                self.conn.executescript('DELETE FROM minhash_signatures; DELETE FROM minhash_buckets;'
+                                        'DELETE FROM minhash_meta;')
+            self.set_meta('params', params)
+
+    def get_meta(self, name: str) -> Optional[str]:
+        row = self.conn.execute('SELECT value FROM minhash_meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: str):
+        self.conn.execute(
+            'INSERT INTO minhash_meta (name, value) VALUES (?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET value = excluded.value', (name, value)
+        )
+
+    def _band_buckets(self, signature: np.ndarray) -> List[Tuple[int, int]]:
+        """签名各段的桶号（64 位有符号整数，可直接存入 SQLite）"""
+        buckets = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(chunk, digest_size=8).digest()
+            buckets.append((band, int.from_bytes(digest, 'little', signed=True)))
+        return buckets
+
+    def _candidates(self, buckets: List[Tuple[int, int]]) -> List[Tuple[str, str, bytes]]:
+        placeholders = ','.join('(?, ?)' for _ in buckets)
+        params = [value for pair in buckets for value in pair]
+        return self.conn.execute(f'''
+            SELECT key, cluster, signature FROM minhash_signatures
+            WHERE key IN (
+                SELECT key FROM minhash_buckets WHERE (band, bucket) IN (VALUES {placeholders})
+            )
+        ''', params).fetchall()
+
+    def _matches(self, signature: np.ndarray, exclude: Optional[str] = None) -> List[Tuple[str, str, float]]:
+        matches = []
+        for key, cluster, blob in self._candidates(self._band_buckets(signature)):
+            if key == exclude:
+                continue
+            similarity = MinHasher.similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if similarity >= self.threshold:
+                matches.append((key, cluster, similarity))
+        matches.sort(key=lambda m: -m[2])
+        return matches
+
+    def query(self, title: Optional[str], abstract: Optional[str] = None) -> List[Tuple[str, float]]:
+        """查找近似重复，返回 [(key, 估计相似度)]，按相似度降序"""
+        signature = self.hasher.signature(paper_text(title, abstract))
+        with self._lock:
+            return [(key, similarity) for key, _, similarity in self._matches(signature)]
+
+    def find_duplicate(self, title: Optional[str], abstract: Optional[str] = None) -> Optional[str]:
+        """返回最相似的已存储记录的 key，没有近似重复时返回 None"""
+        matches = self.query(title, abstract)
+        return matches[0][0] if matches else None
+
+    def add(self, key: str, title: Optional[str], abstract: Optional[str] = None) -> str:
+        """存储一条记录并返回其所属簇
+
+        与已有记录近似重复时并入其所在的簇；同时命中多个簇时把这些簇合并为一个。
+        """
+        text = paper_text(title, abstract)
+        if not normalize_title(text):
+            # 空文本不参与聚类
+            return key
+
+        signature = self.hasher.signature(text)
+        buckets = self._band_buckets(signature)
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                matches = self._matches(signature, exclude=key)
+                clusters = sorted({cluster for _, cluster, _ in matches})
+                cluster = clusters[0] if clusters else key
+
+                if len(clusters) > 1:
+                    placeholders = ','.join('?' * (len(clusters) - 1))
+                    self.conn.execute(
+                        f'UPDATE minhash_signatures SET cluster = ? WHERE cluster IN ({placeholders})',
+                        [cluster] + clusters[1:]
+                    )
+
+                self.conn.execute('DELETE FROM minhash_buckets WHERE key = ?', (key,))
+                self.conn.execute('''
+                    INSERT INTO minhash_signatures (key, cluster, signature) VALUES (?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET cluster = excluded.cluster, signature = excluded.signature
+                ''', (key, cluster, signature.tobytes()))
+                self.conn.executemany(
+                    'INSERT OR IGNORE INTO minhash_buckets (band, bucket, key) VALUES (?, ?, ?)',
+                    [(band, bucket, key) for band, bucket in buckets]
+                )
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            else:
+                self.conn.execute('COMMIT')
+        return cluster
+
+    def cluster_of(self, key: str) -> Optional[str]:
+        row = self.conn.execute('SELECT cluster FROM minhash_signatures WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def cluster_members(self, key: str) -> List[str]:
+        """与 key 同簇的全部记录（包括自身）"""
+        cluster = self.cluster_of(key)
+        if cluster is None:
+            return []
+        return [row[0] for row in self.conn.execute(
+            'SELECT key FROM minhash_signatures WHERE cluster = ? ORDER BY key', (cluster,)
+        )]
+
+    def __contains__(self, key: str) -> bool:
+        return self.cluster_of(key) is not None
+
+    def __len__(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM minhash_signatures').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def cluster_near_duplicates(items: Sequence[T], text_of: Callable[[T], Tuple[Optional[str], Optional[str]]],
+                            threshold: float = 0.7) -> List[List[T]]:
+    """对一批结果做近似去重聚类（内存索引）
+
+    Args:
+        items: 待去重的结果
+        text_of: 返回 (标题, 摘要)
+        threshold: Jaccard 相似度阈值
+
+    Returns:
+        List[List]: 按首次出现顺序排列的簇，每个簇内保持原有顺序
+    """
+    index = NearDuplicateIndex(threshold=threshold)
+    try:
+        for i, item in enumerate(items):
+            index.add(str(i), *text_of(item))
+
+        # 簇的合并在 add 中完成，最后统一按簇分组即可
+        clusters: Dict[str, List[T]] = {}
+        for i, item in enumerate(items):
+            clusters.setdefault(index.cluster_of(str(i)) or str(i), []).append(item)
+    finally:
+        index.close()
+    return list(clusters.values())
+
+
+def merge_clusters(items: Sequence[T], key: Callable[[T], Tuple[Optional[str], Optional[str]]],
+                   fields: Sequence[str], threshold: float = 0.7) -> List[T]:
+    """近似去重并合并每个簇（items 为 dataclass 实例）
+
+    每簇保留第一条，fields 中为空的字段依次从簇内其他版本补全
+    （例如 arXiv 预印本缺少 DOI 时取正式发表版本的 DOI）。
+    与已合并结果的 DOI / arXiv 等标识符冲突的成员视为不同论文（如只差化学式的标题），
+    不参与合并，单独保留。
+
+    Args:
+        items: 待去重的结果
+        key: 返回 (标题, 摘要)
+        fields: 需要补全的字段
+        threshold: Jaccard 相似度阈值
+
+    Returns:
+        List: 按簇的首次出现顺序排列的合并结果
+    """
+    merged_items = []
+    for cluster in cluster_near_duplicates(items, key, threshold):
+        groups = []
+        for item in cluster:
+            for i, merged in enumerate(groups):
+                if not identifiers_conflict(asdict(merged), asdict(item)):
+                    groups[i] = replace(merged, **{field: getattr(merged, field) or getattr(item, field)
+                                                   for field in fields})
+                    break
+            else:
+                groups.append(item)
+        merged_items.extend(groups)
+    return merged_items
@@ -0,0 +1,169 @@
+"""
+内容寻址的 PDF 存储
+文件按 SHA-256 摘要存放在 ab/cd/<摘要> 分片目录下，相同内容只存一份；
+SQLite 索引记录 规范论文 ID -> 摘要，以及每个摘要的大小和 MIME 类型
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+# 计算文件摘要时的读块大小
+READ_CHUNK = 1024 * 1024
+
+
+@dataclass
+class StoredBlob:
+    """存储中的一个文件"""
+    digest: str
+    size: int
+    mime: str
+    path: str
+
+
+def file_digest(path: Union[str, Path], hasher=None) -> 'hashlib._Hash':
+    """把文件内容追加到 hasher（默认新建 SHA-256）并返回 hasher"""
+    hasher = hasher or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), b''):
+            hasher.update(chunk)
+    return hasher
+
+
+class PDFStore:
+    """内容寻址的 PDF 存储（多个线程可共享同一个实例）
+
+    - blobs: 摘要 -> 大小、MIME 类型
+    - papers: 规范论文 ID（例如 identifiers 表的 work_id）-> 摘要
+    """
+
+    def __init__(self, root: Union[str, Path], index_path: Optional[str] = None):
+        """
+        Args:
+            root: 存储根目录
+            index_path: 索引数据库文件，默认 <root>/index.db
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir = self.root / 'tmp'
+        self.tmp_dir.mkdir(exist_ok=True)
+        self.index_path = index_path or str(self.root / 'index.db')
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.index_path, isolation_level=None, check_same_thread=False)
+        if self.index_path != ':memory:':
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mime TEXT NOT NULL,
+                created_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS papers (
+                paper_id TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                source_url TEXT,
+                updated_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_papers_digest ON papers (digest);
+        ''')
+
+    def path_for(self, digest: str) -> Path:
+        """摘要对应的存储路径：<root>/ab/cd/<摘要>"""
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def __contains__(self, digest: str) -> bool:
+        return self.conn.execute('SELECT 1 FROM blobs WHERE digest = ?', (digest,)).fetchone() is not None
+
+    def get_blob(self, digest: str) -> Optional[StoredBlob]:
+        row = self.conn.execute('SELECT size, mime FROM blobs WHERE digest = ?', (digest,)).fetchone()
+        return StoredBlob(digest, row[0], row[1], str(self.path_for(digest))) if row else None
+
+    def get(self, paper_id: str) -> Optional[StoredBlob]:
+        """按规范论文 ID 查找已存储的文件"""
+        row = self.conn.execute(
+            'SELECT b.digest, b.size, b.mime FROM papers p JOIN blobs b ON b.digest = p.digest '
+            'WHERE p.paper_id = ?', (paper_id,)
+        ).fetchone()
+        return StoredBlob(row[0], row[1], row[2], str(self.path_for(row[0]))) if row else None
+
+    def link(self, paper_id: str, digest: str, source_url: Optional[str] = None):
+        """把论文 ID 指向已存储的摘要"""
+        self.conn.execute(
+            'INSERT INTO papers (paper_id, digest, source_url, updated_at) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(paper_id) DO UPDATE SET digest = excluded.digest, '
+            'source_url = COALESCE(excluded.source_url, papers.source_url), updated_at = excluded.updated_at',
+            (paper_id, digest, source_url, time.time())
+        )
+
+    def ingest(self, path: Union[str, Path], digest: Optional[str] = None, mime: str = 'application/pdf',
+               paper_id: Optional[str] = None, source_url: Optional[str] = None,
+               move: bool = True) -> StoredBlob:
+        """把文件放入存储
+
+        Args:
+            path: 源文件
+            digest: 已在下载时边写边算出的 SHA-256，未提供时读取文件计算
+            mime: MIME 类型
+            paper_id: 规范论文 ID，提供时建立 ID -> 摘要的映射
+            source_url: 来源 URL（仅记录）
+            move: 移动源文件（同一文件系统上为改名）；False 时复制
+
+        Returns:
+            StoredBlob: 存储中的文件；内容已存在时直接复用，不再写第二份
+        """
+        path = Path(path)
+        digest = digest or file_digest(path).hexdigest()
+        target = self.path_for(digest)
+        size = path.stat().st_size
+
+        with self._lock:
+            if digest in self and target.exists():
+                if move:
+                    path.unlink()
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                if move:
+                    shutil.move(str(path), str(target))
+                else:
+                    tmp_path = self.tmp_dir / f"{digest}.{threading.get_ident()}"
+                    shutil.copyfile(path, tmp_path)
+                    os.replace(tmp_path, target)
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO blobs (digest, size, mime, created_at) VALUES (?, ?, ?, ?)',
+                    (digest, size, mime, time.time())
+                )
+            if paper_id:
+                self.link(paper_id, digest, source_url)
+        return StoredBlob(digest, size, mime, str(target))
+
+    def unlink_paper(self, paper_id: str):
+        """删除论文 ID 的映射（文件仍保留，由 collect_garbage 清理无引用的文件）"""
+        self.conn.execute('DELETE FROM papers WHERE paper_id = ?', (paper_id,))
+
+    def collect_garbage(self) -> int:
+        """删除没有任何论文引用的文件，返回删除的文件数"""
+        with self._lock:
+            orphans = [row[0] for row in self.conn.execute(
+                'SELECT digest FROM blobs WHERE digest NOT IN (SELECT digest FROM papers)'
+            )]
+            for digest in orphans:
+                self.path_for(digest).unlink(missing_ok=True)
+                self.conn.execute('DELETE FROM blobs WHERE digest = ?', (digest,))
+        return len(orphans)
+
+    def stats(self) -> Dict[str, int]:
+        blobs, total_bytes = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs').fetchone()
+        papers = self.conn.execute('SELECT COUNT(*) FROM papers').fetchone()[0]
+        return {'blobs': blobs, 'papers': papers, 'total_bytes': total_bytes}
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,107 @@
+"""
+限速工具
+令牌桶限速器和 Retry-After 解析，供各元数据 API 客户端共享
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """令牌桶限速器
+
+    以预约方式发放令牌：每次 acquire 立即扣减一个令牌（允许为负），
+    按欠额计算需要等待的时间。预约只在锁内做算术，不持有事件循环相关的对象，
+    因此可以在多个线程、多个事件循环之间共享同一个配额。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: 每秒补充的令牌数（即稳态请求速率）
+            capacity: 桶容量（允许的突发请求数）
+        """
+        if rate <= 0:
+            raise ValueError("rate 必须为正数")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def reserve(self) -> float:
+        """预约一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            # _updated 可能因 pause() 位于未来
+            return max(0.0, self._updated - now) + max(0.0, -self._tokens) / self.rate
+
+    def wait(self):
+        """同步等待直到获得一个令牌（供基于 requests 的客户端使用）"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire(self):
+        """等待直到获得一个令牌"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """暂停发放令牌（收到 429 时让所有并发请求一起等待 Retry-After）"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now + seconds > self._updated:
+                self._updated = now + seconds
+                self._tokens = min(self._tokens, 1.0)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头（秒数或 HTTP 日期），无法解析时返回 None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+# Semantic Scholar 的共享配额名称和速率（SemanticScholarClient 与联合检索的 S2 来源共用一个令牌桶）
+SEMANTIC_SCHOLAR_LIMITER = 'semantic-scholar'
+SEMANTIC_SCHOLAR_RATE = 1.0
+
+_shared_limiters: Dict[str, TokenBucket] = {}
+_shared_limiters_lock = threading.Lock()
+
+
+def get_shared_limiter(name: str, rate: float, capacity: float = 1.0) -> TokenBucket:
+    """按名称获取进程内共享的限速器（同一 API 配额的所有客户端实例共用一个令牌桶）
+
+    首次调用时按 rate/capacity 创建，之后的调用返回同一个实例。
+    """
+    with _shared_limiters_lock:
+        limiter = _shared_limiters.get(name)
+        if limiter is None:
+            limiter = _shared_limiters[name] = TokenBucket(rate, capacity)
+        return limiter
@@ -0,0 +1,402 @@
+"""
+元数据 API 响应缓存
+按规范化的 URL、参数和请求体缓存 Semantic Scholar / arXiv / PubMed 的响应，
+重复运行相同的检索时不再消耗 API 配额和限速等待时间
+
+- 每个来源 (主机名) 单独设置有效期；过期后带 ETag / Last-Modified 条件请求重新验证
+- 缓存总大小超过上限时按最近访问时间 (LRU) 淘汰
+- offline 模式只读缓存，未命中时抛出 CacheMissError，用于可复现的重跑和测试
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import formatdate
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+DAY = 24 * 3600
+
+# 各来源的默认有效期 (秒)
+DEFAULT_TTLS = {
+    'api.semanticscholar.org': 7 * DAY,
+    'export.arxiv.org': DAY,
+    'eutils.ncbi.nlm.nih.gov': 7 * DAY,
+}
+
+# 缓存模式
+MODE_DEFAULT = 'default'  # 命中且未过期直接返回，过期后重新验证
+MODE_OFFLINE = 'offline'  # 只读缓存（忽略有效期），未命中时报错
+MODE_REFRESH = 'refresh'  # 总是请求网络并更新缓存
+CACHE_MODES = (MODE_DEFAULT, MODE_OFFLINE, MODE_REFRESH)
+
+# 随缓存保存的响应头（正文保存的是解码后的内容，不保存 Content-Encoding 等）
+STORED_HEADERS = ('content-type', 'etag', 'last-modified')
+
+# 不参与缓存键的查询参数
+IGNORED_PARAMS = {'api_key', 'apikey', 'email', 'tool'}
+
+
+class CacheMissError(Exception):
+    """offline 模式下请求的响应不在缓存中"""
+
+
+@dataclass
+class CachedResponse:
+    """缓存的响应"""
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    stored_at: float
+    expires_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """条件请求头 (If-None-Match / If-Modified-Since)"""
+        headers = {}
+        if self.headers.get('etag'):
+            headers['If-None-Match'] = self.headers['etag']
+        if self.headers.get('last-modified'):
+            headers['If-Modified-Since'] = self.headers['last-modified']
+        elif not headers:
+            headers['If-Modified-Since'] = formatdate(self.stored_at, usegmt=True)
+        return headers
+
+
+def cache_key(method: str, url: str, body: Optional[bytes] = None) -> Tuple[str, str]:
+    """计算缓存键，返回 (键, 主机名)
+
+    主机名转小写、查询参数排序并去掉密钥类参数，JSON 请求体按键排序后参与哈希。
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    params = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                    if k.lower() not in IGNORED_PARAMS)
+    normalized = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/',
+                             urlencode(params), ''))
+
+    digest = hashlib.sha256(f"{method.upper()} {normalized}".encode('utf-8'))
+    if body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, separators=(',', ':')).encode('utf-8')
+        except (ValueError, UnicodeDecodeError):
+            pass
+        digest.update(b'\n')
+        digest.update(body)
+    return digest.hexdigest(), host
+
+
+class ResponseCache:
+    """SQLite 响应缓存（多个客户端、多个线程可共享同一个实例）"""
+
+    def __init__(self, path: str = 'http_cache.db',
+                 max_bytes: int = 512 * 1024 * 1024,
+                 ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = DAY,
+                 mode: str = MODE_DEFAULT):
+        """
+        Args:
+            path: 缓存数据库文件，':memory:' 表示不持久化
+            max_bytes: 缓存正文的总大小上限，超出后按 LRU 淘汰
+            ttls: {主机名: 有效期秒数}，与 DEFAULT_TTLS 合并
+            default_ttl: 未配置的主机的有效期
+            mode: 'default' / 'offline' / 'refresh'
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"不支持的缓存模式: {mode}")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.mode = mode
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0, 'evicted': 0}
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        if path != ':memory:':
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                host TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                content BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at);
+        ''')
+        self._total_bytes = self._sum_sizes()
+
+    def _sum_sizes(self) -> int:
+        return self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def ttl_for(self, host: str) -> float:
+        return self.ttls.get(host, self.default_ttl)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """读取缓存（同时更新访问时间），不存在时返回 None"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT status, headers, content, stored_at, expires_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        status, headers, content, stored_at, expires_at = row
+        return CachedResponse(status, json.loads(headers), content, stored_at, expires_at)
+
+    def put(self, key: str, host: str, status_code: int, headers, content: bytes):
+        """写入缓存，并在超过大小上限时淘汰最久未访问的条目"""
+        now = time.time()
+        stored_headers = {name: headers[name] for name in STORED_HEADERS if headers.get(name)}
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                old = self.conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+                self.conn.execute('''
+                    INSERT INTO responses (key, host, status, headers, content, size,
+                                           stored_at, expires_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        host = excluded.host, status = excluded.status, headers = excluded.headers,
+                        content = excluded.content, size = excluded.size, stored_at = excluded.stored_at,
+                        expires_at = excluded.expires_at, accessed_at = excluded.accessed_at
+                ''', (key, host, status_code, json.dumps(stored_headers), content, len(content),
+                      now, now + self.ttl_for(host), now))
+                self._total_bytes += len(content) - (old[0] if old else 0)
+                self._evict()
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                self._total_bytes = self._sum_sizes()
+                raise
+            else:
+                self.conn.execute('COMMIT')
+        self.stats['stored'] += 1
+
+    def _evict(self):
+        """按 accessed_at 从旧到新删除，直到总大小不超过上限（需持有锁并在事务内调用）"""
+        while self._total_bytes > self.max_bytes:
+            oldest = self.conn.execute(
+                'SELECT key, size FROM responses ORDER BY accessed_at LIMIT 100'
+            ).fetchall()
+            if not oldest:
+                break
+            for key, size in oldest:
+                self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._total_bytes -= size
+                self.stats['evicted'] += 1
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def refresh(self, key: str, host: str):
+        """304 Not Modified 后延长有效期"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                'UPDATE responses SET expires_at = ?, accessed_at = ? WHERE key = ?',
+                (now + self.ttl_for(host), now, key)
+            )
+        self.stats['revalidated'] += 1
+
+    def clear(self, host: Optional[str] = None):
+        """清空缓存（可只清空一个来源）"""
+        with self._lock:
+            if host is None:
+                self.conn.execute('DELETE FROM responses')
+            else:
+                self.conn.execute('DELETE FROM responses WHERE host = ?', (host,))
+            self._total_bytes = self._sum_sizes()
+
+    def __len__(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def close(self):
+        self.conn.close()
+
+    def peek(self, method: str, url: str, body: Optional[bytes] = None) -> bool:
+        """请求能否直接由缓存返回（不更新访问时间和统计）"""
+        if self.mode == MODE_REFRESH:
+            return False
+        key, _ = cache_key(method, url, body)
+        row = self.conn.execute('SELECT expires_at FROM responses WHERE key = ?', (key,)).fetchone()
+        return row is not None and (self.mode == MODE_OFFLINE or time.time() < row[0])
+
+    def lookup(self, method: str, url: str, body: Optional[bytes]) -> Tuple[str, str, Optional[CachedResponse]]:
+        """按模式查找缓存
+
+        Returns:
+            (键, 主机名, 缓存条目)：条目可直接返回时 is_fresh 为真或处于 offline 模式
+
+        Raises:
+            CacheMissError: offline 模式下未命中
+        """
+        key, host = cache_key(method, url, body)
+        entry = None if self.mode == MODE_REFRESH else self.get(key)
+        if entry is not None and (entry.is_fresh or self.mode == MODE_OFFLINE):
+            self.stats['hits'] += 1
+        elif self.mode == MODE_OFFLINE:
+            self.stats['misses'] += 1
+            raise CacheMissError(f"缓存未命中 (offline 模式): {method} {url}")
+        else:
+            self.stats['misses'] += 1
+        return key, host, entry
+
+    @staticmethod
+    def bypasses(headers) -> bool:
+        """请求头带 Cache-Control: no-store 的请求不经过缓存（例如依赖服务端会话状态的请求）"""
+        return 'no-store' in (headers.get('cache-control') or '').lower()
+
+    @staticmethod
+    def is_cacheable(status_code: int, headers) -> bool:
+        """只缓存成功的响应，并遵守 Cache-Control: no-store"""
+        return status_code == 200 and 'no-store' not in (headers.get('cache-control') or '').lower()
+
+
+class AsyncCachingTransport(httpx.AsyncBaseTransport):
+    """为 httpx.AsyncClient 提供缓存的传输层"""
+
+    def __init__(self, cache: ResponseCache, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 methods: Tuple[str, ...] = ('GET', 'POST')):
+        """
+        Args:
+            cache: 响应缓存
+            transport: 实际发送请求的传输层，默认 httpx.AsyncHTTPTransport
+            methods: 参与缓存的请求方法（元数据 API 的 POST 查询同样是幂等的）
+        """
+        self.cache = cache
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        self.methods = methods
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method not in self.methods or self.cache.bypasses(request.headers):
+            return await self.transport.handle_async_request(request)
+
+        body = await request.aread()
+        key, host, entry = self.cache.lookup(request.method, str(request.url), body)
+        if entry is not None and (entry.is_fresh or self.cache.mode == MODE_OFFLINE):
+            return self._from_cache(entry, request, 'HIT')
+
+        if entry is not None:
+            request.headers.update(entry.validators())
+
+        response = await self.transport.handle_async_request(request)
+        if response.status_code == 304 and entry is not None:
+            await response.aclose()
+            self.cache.refresh(key, host)
+            return self._from_cache(entry, request, 'REVALIDATED')
+
+        if self.cache.is_cacheable(response.status_code, response.headers):
+            content = await response.aread()
+            self.cache.put(key, host, response.status_code, response.headers, content)
+            return httpx.Response(response.status_code, headers=self._plain_headers(response.headers),
+                                  content=content, request=request)
+        return response
+
+    @staticmethod
+    def _plain_headers(headers: httpx.Headers) -> Dict[str, str]:
+        # 正文已解码，去掉编码和长度相关的头
+        return {name: value for name, value in headers.items()
+                if name.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')}
+
+    @staticmethod
+    def _from_cache(entry: CachedResponse, request: httpx.Request, status: str) -> httpx.Response:
+        return httpx.Response(entry.status_code, headers=dict(entry.headers, **{'x-cache': status}),
+                              content=entry.content, request=request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class CachingAdapter(HTTPAdapter):
+    """为 requests.Session 提供缓存的适配器（按 API 主机挂载，见 install_cache）"""
+
+    def __init__(self, cache: ResponseCache, methods: Tuple[str, ...] = ('GET', 'POST'), **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.methods = methods
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if request.method not in self.methods or self.cache.bypasses(request.headers):
+            return super().send(request, **kwargs)
+
+        body = request.body.encode('utf-8') if isinstance(request.body, str) else request.body
+        key, host, entry = self.cache.lookup(request.method, request.url, body)
+        if entry is not None and (entry.is_fresh or self.cache.mode == MODE_OFFLINE):
+            return self._from_cache(entry, request, 'HIT')
+
+        if entry is not None:
+            request.headers.update(entry.validators())
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self.cache.refresh(key, host)
+            return self._from_cache(entry, request, 'REVALIDATED')
+
+        if self.cache.is_cacheable(response.status_code, response.headers):
+            self.cache.put(key, host, response.status_code,
+                           {k.lower(): v for k, v in response.headers.items()}, response.content)
+        return response
+
+    def _from_cache(self, entry: CachedResponse, request: requests.PreparedRequest,
+                    status: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry.status_code
+        response.headers = requests.structures.CaseInsensitiveDict(dict(entry.headers, **{'x-cache': status}))
+        response._content = entry.content
+        # 正文已在内存中，iter_content() 直接按块切分而不读取 raw
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.connection = self
+        return response
+
+
+def install_cache(session: requests.Session, cache: ResponseCache, hosts=tuple(DEFAULT_TTLS)):
+    """在 requests.Session 上为元数据 API 主机挂载缓存适配器（其他主机不受影响）"""
+    adapter = CachingAdapter(cache)
+    for host in hosts:
+        for scheme in ('https://', 'http://'):
+            session.mount(f"{scheme}{host}/", adapter)
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """按环境变量创建进程内共享的缓存，未设置 HTTP_CACHE_PATH 时返回 None（不缓存）
+
+    - HTTP_CACHE_PATH: 缓存数据库文件
+    - HTTP_CACHE_MODE: default / offline / refresh
+    - HTTP_CACHE_MAX_MB: 缓存大小上限 (MB)
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None and os.environ.get('HTTP_CACHE_PATH'):
+            _default_cache = ResponseCache(
+                os.environ['HTTP_CACHE_PATH'],
+                max_bytes=int(float(os.environ.get('HTTP_CACHE_MAX_MB', 512)) * 1024 * 1024),
+                mode=os.environ.get('HTTP_CACHE_MODE', MODE_DEFAULT)
+            )
+        return _default_cache
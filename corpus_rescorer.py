@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+语料库重新评分
+调整 scoring_keywords 的权重后，无需重新检索/分析即可批量更新库中全部论文的评分
+
+关键词是否出现只取决于标题和摘要，与权重无关：
+首次运行时分块扫描 papers 表，构建 论文 × 关键词 的出现矩阵并缓存到磁盘；
+之后每次调整权重只需一次矩阵-向量乘法，再把发生变化的行批量写回。
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from keyword_matcher import KeywordMatcher
+from literature_database import LiteratureDatabase
+from paper_scoring_system import PaperScoringSystem
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CorpusRescorer:
+    """基于关键词出现矩阵的批量重新评分
+
+    出现矩阵以布尔型稠密数组保存：关键词只有几十个，每篇论文一行只占几十字节，
+    100 万篇论文约几十 MB，比稀疏格式更简单且乘法更快。
+    缓存中记录扫描时的变更序号 (papers.change_seq) 水位，后续只重新扫描水位之后新增或更新过的论文。
+    """
+
+    SCAN_COLUMNS = ('id', 'title', 'abstract')
+    CHECK_COLUMNS = ('id', 'score', 'matched_keywords', 'recommendation')
+
+    def __init__(self, database: LiteratureDatabase,
+                 scorer: Optional[PaperScoringSystem] = None,
+                 cache_path: Optional[str] = None,
+                 chunk_size: int = 10000):
+        """
+        Args:
+            database: 文献数据库
+            scorer: 提供 scoring_keywords 的评分系统，默认新建
+            cache_path: 出现矩阵缓存文件，默认为数据库文件旁的 .keywords.npz
+            chunk_size: 分块读取/写回的行数
+        """
+        self.database = database
+        self.scorer = scorer or PaperScoringSystem()
+        if cache_path is None and database.db_path != ':memory:':
+            cache_path = f"{database.db_path}.keywords.npz"
+        self.cache_path = cache_path
+        self.chunk_size = chunk_size
+
+        # 按 id 升序排列的论文 id 与对应的出现矩阵
+        self.ids = np.empty(0, dtype=np.int64)
+        self.presence = np.zeros((0, 0), dtype=bool)
+        self.patterns: List[str] = []
+        self.watermark: Optional[int] = None
+
+    def _load_cache(self) -> bool:
+        """加载磁盘缓存，关键词表中出现了缓存未覆盖的新关键词时视为失效"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as cache:
+                patterns = [str(p) for p in cache['patterns']]
+                if not set(self.scorer.matcher.patterns) <= set(patterns):
+                    logger.info("关键词表包含新关键词，重新构建出现矩阵")
+                    return False
+                if cache['watermark'].dtype.kind != 'i':
+                    logger.info("缓存使用旧版 updated_at 水位，重新构建出现矩阵")
+                    return False
+                self.ids = cache['ids']
+                self.presence = cache['presence']
+                self.patterns = patterns
+                self.watermark = int(cache['watermark'])
+            return True
+        except Exception as e:
+            logger.error(f"加载出现矩阵缓存失败: {e}")
+            return False
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        try:
+            # np.savez 会自动补 .npz 后缀，先写临时文件对象再替换
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, ids=self.ids, presence=self.presence,
+                         patterns=np.array(self.patterns, dtype=str),
+                         watermark=np.array(self.watermark, dtype=np.int64))
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.error(f"保存出现矩阵缓存失败: {e}")
+
+    def _scan(self, filters: Optional[Dict] = None):
+        """扫描论文标题+摘要，返回 (ids, 出现矩阵)"""
+        # 按矩阵的列（可能包含已从关键词表删除的关键词）扫描，保证各列含义一致
+        matcher = KeywordMatcher({'': dict.fromkeys(self.patterns, 0)})
+        column = {pattern: j for j, pattern in enumerate(self.patterns)}
+
+        ids: List[int] = []
+        hit_rows: List[int] = []
+        hit_cols: List[int] = []
+
+        records = self.database.iter_papers(
+            filters, order='id', page_size=self.chunk_size, columns=self.SCAN_COLUMNS
+        )
+        for i, record in enumerate(records):
+            ids.append(record['id'])
+            for pattern in matcher.match_patterns(f"{record['title'] or ''} {record['abstract'] or ''}"):
+                hit_rows.append(i)
+                hit_cols.append(column[pattern])
+
+        presence = np.zeros((len(ids), len(self.patterns)), dtype=bool)
+        presence[hit_rows, hit_cols] = True
+        return np.array(ids, dtype=np.int64), presence
+
+    def refresh_presence(self) -> int:
+        """构建或增量更新出现矩阵
+
+        Returns:
+            int: 本次重新扫描的论文数
+        """
+        # 扫描前读取水位：扫描期间写入的论文变更序号更大，下次仍会被重新扫描
+        watermark = self.database.get_change_seq()
+        if not self._load_cache():
+            self.patterns = list(self.scorer.matcher.patterns)
+            self.ids, self.presence = self._scan()
+            self.watermark = watermark
+            self._save_cache()
+            logger.info(f"出现矩阵已构建: {len(self.ids)} 篇论文 × {len(self.patterns)} 个关键词")
+            return len(self.ids)
+
+        ids, presence = self._scan({'changed_since': self.watermark})
+        if len(ids):
+            # 已有的行原地替换，新论文追加后按 id 重新排序
+            positions = np.searchsorted(self.ids, ids)
+            exists = positions < len(self.ids)
+            exists[exists] = self.ids[positions[exists]] == ids[exists]
+            self.presence[positions[exists]] = presence[exists]
+
+            if not exists.all():
+                merged_ids = np.concatenate([self.ids, ids[~exists]])
+                order = np.argsort(merged_ids, kind='stable')
+                self.ids = merged_ids[order]
+                self.presence = np.concatenate([self.presence, presence[~exists]])[order]
+
+            self.watermark = watermark
+            self._save_cache()
+        return len(ids)
+
+    def _pattern_weights(self) -> np.ndarray:
+        """当前关键词表的权重向量（同一关键词出现在多个类别时分数累加）"""
+        points_by_pattern: Dict[str, int] = {}
+        for keyword, points in self.scorer.matcher.entries:
+            if keyword:
+                pattern = keyword.lower()
+                points_by_pattern[pattern] = points_by_pattern.get(pattern, 0) + points
+        return np.array([points_by_pattern.get(p, 0) for p in self.patterns], dtype=np.int64)
+
+    def rescore(self, dry_run: bool = False) -> Dict:
+        """按当前 scoring_keywords 重新计算全部论文的评分，并写回发生变化的行
+
+        Args:
+            dry_run: 只统计变化，不写回数据库
+
+        Returns:
+            Dict: {'total', 'scanned', 'changed'}
+        """
+        scanned = self.refresh_presence()
+        scores = self.presence @ self._pattern_weights()
+
+        # 出现模式相同的论文评分结果相同，只需对去重后的模式计算关键词明细和下载建议。
+        # 每行先按位打包成定长字节串再去重，比 np.unique(axis=0) 快一个数量级
+        width = len(self.patterns)
+        packed = np.ascontiguousarray(np.packbits(self.presence, axis=1))
+        keys = packed.view(np.dtype((np.void, max(packed.shape[1], 1)))).reshape(-1)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        unique_rows = np.unpackbits(
+            unique_keys.view(np.uint8).reshape(len(unique_keys), -1), axis=1, count=width
+        ).astype(bool)
+
+        outcomes = []
+        for row in unique_rows:
+            found = [self.patterns[j] for j in np.flatnonzero(row)]
+            score, matched_keywords = self.scorer.matcher.score_patterns(found)
+            recommendation, description = self.scorer.get_download_recommendation(score)
+            outcomes.append((json.dumps(matched_keywords), recommendation, description))
+
+        context = (scores, inverse.reshape(-1), outcomes, datetime.now(), dry_run)
+        watermark = self.watermark
+        changed = 0
+        chunk: List = []
+
+        records = self.database.iter_papers(
+            order='id', page_size=self.chunk_size, columns=self.CHECK_COLUMNS
+        )
+        for record in records:
+            chunk.append(record.row)
+            if len(chunk) >= self.chunk_size:
+                changed += self._apply_chunk(chunk, *context)
+                chunk = []
+        if chunk:
+            changed += self._apply_chunk(chunk, *context)
+
+        if self.watermark != watermark:
+            self._save_cache()
+
+        logger.info(f"重新评分完成: {len(self.ids)} 篇论文，{changed} 篇评分变化")
+        return {'total': len(self.ids), 'scanned': scanned, 'changed': changed}
+
+    def _apply_chunk(self, rows: List, scores: np.ndarray, inverse: np.ndarray,
+                     outcomes: List, now: datetime, dry_run: bool) -> int:
+        """比较一个分块的新旧评分，写回发生变化的行，返回变化行数"""
+        if not len(self.ids):
+            return 0
+
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        positions = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        # 刷新之后新写入的论文不在矩阵中，留待下次处理
+        known = self.ids[positions] == ids
+        new_scores = scores[positions].tolist()
+        new_outcomes = inverse[positions].tolist()
+
+        updates = []
+        for i in np.flatnonzero(known).tolist():
+            paper_id, old_score, old_keywords, old_recommendation = rows[i]
+            score = new_scores[i]
+            keywords_json, recommendation, description = outcomes[new_outcomes[i]]
+            if (old_score, old_keywords, old_recommendation) != (score, keywords_json, recommendation):
+                updates.append((score, keywords_json, recommendation, description, now, paper_id))
+
+        if updates and not dry_run:
+            self._write_back(updates)
+        return len(updates)
+
+    def _write_back(self, rows: List):
+        """写回评分；写回只改变评分、不影响关键词出现情况，若水位之后没有其他写入，
+        把水位推进到写回之后，避免下次把刚写回的行当作已更新重新扫描"""
+        with self.database.transaction() as conn:
+            # 在写事务内比较，期间不会有其他写入
+            max_seq = 'SELECT COALESCE(MAX(change_seq), 0) FROM papers'
+            in_sync = conn.execute(max_seq).fetchone()[0] == self.watermark
+            conn.executemany('''
+                UPDATE papers
+                SET score = ?, matched_keywords = ?, recommendation = ?, description = ?, updated_at = ?
+                WHERE id = ?
+            ''', rows)
+            if in_sync:
+                self.watermark = conn.execute(max_seq).fetchone()[0]
+
+
+def rescore_corpus(database: LiteratureDatabase,
+                   scorer: Optional[PaperScoringSystem] = None,
+                   dry_run: bool = False, **options) -> Dict:
+    """按当前关键词表重新评分整个语料库，options 透传给 CorpusRescorer"""
+    return CorpusRescorer(database, scorer, **options).rescore(dry_run=dry_run)
+
+
+def main():
+    """命令行重新评分"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='按关键词表重新评分数据库中的全部论文')
+    parser.add_argument('--db', default='literature_database.db', help='数据库文件路径')
+    parser.add_argument('--keywords', help='关键词表 JSON 文件 ({类别: {关键词: 分数}})，默认使用内置关键词表')
+    parser.add_argument('--dry-run', action='store_true', help='只统计变化，不写回数据库')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='分块大小')
+    args = parser.parse_args()
+
+    scorer = PaperScoringSystem()
+    if args.keywords:
+        with open(args.keywords, 'r', encoding='utf-8') as f:
+            scorer.scoring_keywords = json.load(f)
+        scorer.compile_keywords()
+
+    with LiteratureDatabase(args.db) as db:
+        result = rescore_corpus(db, scorer, dry_run=args.dry_run, chunk_size=args.chunk_size)
+
+    action = '将变化' if args.dry_run else '已更新'
+    print(f"共 {result['total']} 篇论文，重新扫描 {result['scanned']} 篇，{action} {result['changed']} 篇")
+
+if __name__ == "__main__":
+    main()
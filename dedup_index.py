@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+论文去重索引
+一次性加载数据库中全部论文的去重键，之后每次查重都是 O(1) 的内存查找；
+可选的 MinHash/LSH 近似重复索引用于识别标题、摘要略有差异的预印本和正式发表版本
+"""
+
+import logging
+from typing import Dict, Optional, Set, Tuple
+
+from app.utils.identifiers import normalize_doi, title_fingerprint
+from app.utils.minhash import NearDuplicateIndex
+from literature_database import LiteratureDatabase
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class DedupIndex:
+    """基于 paper_id、规范化 DOI 和规范化标题哈希的去重索引
+
+    键值来自 papers 表的 doi_norm / title_hash 索引列。首次使用时整表加载一次，
+    之后 refresh() 只按主键读取新增的论文，写入新论文时调用 add() 同步更新。
+
+    传入 near_duplicates 时，精确键都未命中的论文再按 标题+摘要 做近似查重。
+    近似索引的签名持久化在自己的 SQLite 文件中，并记录已同步到的 papers.id 水位。
+    """
+
+    def __init__(self, database: LiteratureDatabase,
+                 near_duplicates: Optional[NearDuplicateIndex] = None):
+        self.database = database
+        self.near_duplicates = near_duplicates
+        self.paper_ids: Set[str] = set()
+        self.dois: Dict[str, str] = {}
+        self.title_hashes: Dict[str, str] = {}
+        self._last_id = 0
+        self._loaded = False
+
+    @staticmethod
+    def keys(paper: Dict) -> Tuple[str, Optional[str], Optional[str]]:
+        """提取论文的去重键 (paper_id, doi_norm, title_hash)
+
+        同时支持 Semantic Scholar 原始格式 (paperId, externalIds.DOI)
+        和 analyze_paper 之后的格式 (paper_id, doi)。
+        """
+        paper_id = paper.get('paper_id') or paper.get('paperId') or ''
+        doi = paper.get('doi') or (paper.get('externalIds') or {}).get('DOI')
+        return paper_id, normalize_doi(doi), title_fingerprint(paper.get('title'))
+
+    def refresh(self) -> int:
+        """加载上次加载之后新增的论文，返回新加载的数量"""
+        count = 0
+        for row_id, paper_id, doi_norm, title_hash in self.database.iter_dedup_keys(self._last_id):
+            self._add_keys(paper_id or '', doi_norm, title_hash)
+            self._last_id = row_id
+            count += 1
+
+        if self.near_duplicates is not None:
+            self._sync_near_duplicates()
+
+        if not self._loaded:
+            self._loaded = True
+            logger.info(f"去重索引已加载 {count} 篇论文")
+        return count
+
+    def _sync_near_duplicates(self):
+        """把近似索引水位之后的论文签名写入近似索引"""
+        last_id = int(self.near_duplicates.get_meta('last_id') or 0)
+        columns = ('id', 'paper_id', 'title', 'abstract')
+        for record in self.database.iter_papers({'after_id': last_id}, order='id', columns=columns):
+            self.near_duplicates.add(record.paper_id or str(record.id), record.title, record.abstract)
+            last_id = record.id
+        self.near_duplicates.set_meta('last_id', str(last_id))
+
+    def ensure_loaded(self):
+        if not self._loaded:
+            self.refresh()
+
+    def find(self, paper: Dict) -> Optional[str]:
+        """查找重复
+
+        Returns:
+            Optional[str]: 命中的键类型 'paper_id' / 'doi' / 'title' / 'near'，不重复时为 None
+        """
+        self.ensure_loaded()
+        paper_id, doi_norm, title_hash = self.keys(paper)
+
+        if paper_id and paper_id in self.paper_ids:
+            return 'paper_id'
+        if doi_norm and doi_norm in self.dois:
+            return 'doi'
+        if title_hash and title_hash in self.title_hashes:
+            return 'title'
+        if self.near_duplicates is not None and \
+                self.near_duplicates.find_duplicate(paper.get('title'), paper.get('abstract')):
+            return 'near'
+        return None
+
+    def __contains__(self, paper: Dict) -> bool:
+        return self.find(paper) is not None
+
+    def add(self, paper: Dict):
+        """记录一篇已写入数据库的论文"""
+        paper_id, doi_norm, title_hash = self.keys(paper)
+        self._add_keys(paper_id, doi_norm, title_hash)
+        if self.near_duplicates is not None and paper_id:
+            self.near_duplicates.add(paper_id, paper.get('title'), paper.get('abstract'))
+
+    def _add_keys(self, paper_id: str, doi_norm: Optional[str], title_hash: Optional[str]):
+        if paper_id:
+            self.paper_ids.add(paper_id)
+        if doi_norm:
+            self.dois.setdefault(doi_norm, paper_id)
+        if title_hash:
+            self.title_hashes.setdefault(title_hash, paper_id)
+
+    def __len__(self) -> int:
+        return len(self.paper_ids)
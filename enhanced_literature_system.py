@@ -4,13 +4,16 @@
 确保每条数据都经过去重处理后写入数据库
 """
 
-import requests
-import time
 import logging
 import json
-from typing import Dict, List, Tuple, Set
+from typing import Dict, List, Optional, Tuple, Set
+from app.utils.minhash import NearDuplicateIndex
 from literature_database import LiteratureDatabase
+from corpus_rescorer import rescore_corpus
+from dedup_index import DedupIndex
+from literature_exporter import LiteratureExporter
 from paper_scoring_system import PaperScoringSystem
+from semantic_scholar_client import batch_paper_id
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -19,49 +22,61 @@ logger = logging.getLogger(__name__)
 class EnhancedLiteratureSystem:
     """增强版文献检索和数据库系统"""
     
-    def __init__(self, db_path: str = "literature_database.db"):
+    def __init__(self, db_path: str = "literature_database.db",
+                 near_duplicate_threshold: Optional[float] = None):
+        """
+        Args:
+            db_path: 数据库文件路径
+            near_duplicate_threshold: 近似重复的 Jaccard 相似度阈值（例如 0.7），默认 None 只做精确去重；
+                启用时在数据库文件旁创建 .minhash 签名文件
+        """
         self.database = LiteratureDatabase(db_path)
         self.scorer = PaperScoringSystem()
-        self.processed_papers: Set[str] = set()  # 用于去重的已处理论文集合
+        
+        near_duplicates = None
+        if near_duplicate_threshold is not None:
+            # 签名存储在数据库文件旁的 .minhash 文件中
+            minhash_path = f"{db_path}.minhash" if db_path != ':memory:' else ':memory:'
+            near_duplicates = NearDuplicateIndex(minhash_path, threshold=near_duplicate_threshold)
+        self.dedup_index = DedupIndex(self.database, near_duplicates)  # 用于去重的已处理论文索引
+        
+    @property
+    def processed_papers(self) -> Set[str]:
+        """已处理的论文ID集合"""
+        return self.dedup_index.paper_ids
         
     def load_processed_papers(self):
-        """加载已处理的论文ID集合"""
+        """加载已处理的论文（首次整表加载，之后只读取新增的论文）"""
         try:
-            # 从数据库获取所有已处理的论文ID
-            all_papers = self.database.get_all_papers()
-            self.processed_papers = {paper['paper_id'] for paper in all_papers if paper['paper_id']}
-            logger.info(f"已加载 {len(self.processed_papers)} 篇已处理论文")
+            loaded = self.dedup_index.refresh()
+            logger.info(f"已加载 {loaded} 篇新论文，去重索引共 {len(self.dedup_index)} 篇")
         except Exception as e:
             logger.error(f"加载已处理论文失败: {e}")
-            self.processed_papers = set()
     
     def is_duplicate(self, paper: Dict) -> bool:
-        """检查论文是否重复"""
-        paper_id = paper.get('paper_id', '')
-        title = paper.get('title', '')
-        
-        # 检查paper_id是否已存在
-        if paper_id and paper_id in self.processed_papers:
-            return True
-        
-        # 检查标题是否重复（备用检查）
-        if title:
-            # 使用更精确的标题匹配
-            existing_papers = self.database.search_papers(title[:30], min_score=0)
-            for existing in existing_papers:
-                if existing['title'].lower().strip() == title.lower().strip():
-                    logger.info(f"发现重复论文（标题匹配）: {title[:50]}...")
-                    return True
-        
-        return False
+        """检查论文是否重复（paper_id / DOI / 规范化标题 / 标题+摘要近似匹配）"""
+        matched_by = self.dedup_index.find(paper)
+        
+        if matched_by in ('doi', 'title', 'near'):
+            logger.info(f"发现重复论文（{matched_by}匹配）: {paper.get('title', '')[:50]}...")
+        
+        return matched_by is not None
     
     def process_and_store_paper(self, paper: Dict, search_query: str) -> bool:
         """处理并存储单篇论文"""
+        return self._process_paper(paper, search_query) == 'stored'
+    
+    def _process_paper(self, paper: Dict, search_query: str) -> str:
+        """处理并存储单篇论文
+        
+        Returns:
+            str: 'stored' / 'duplicate' / 'error'
+        """
         try:
             # 检查是否重复
             if self.is_duplicate(paper):
                 logger.info(f"跳过重复论文: {paper.get('title', 'Unknown')[:50]}...")
-                return False
+                return 'duplicate'
             
             # 分析论文
             analysis = self.scorer.analyze_paper(paper)
@@ -73,32 +88,34 @@ class EnhancedLiteratureSystem:
             success = self.database.save_paper(analysis)
             
             if success:
-                # 添加到已处理集合
-                paper_id = analysis.get('paper_id', '')
-                if paper_id:
-                    self.processed_papers.add(paper_id)
+                # 添加到去重索引
+                self.dedup_index.add(analysis)
                 
                 logger.info(f"✅ 成功存储: {analysis['title'][:50]}... (评分: {analysis['score']}分)")
-                return True
+                return 'stored'
             else:
                 logger.error(f"❌ 存储失败: {analysis['title'][:50]}...")
-                return False
+                return 'error'
                 
         except Exception as e:
             logger.error(f"处理论文失败: {e}")
-            return False
+            return 'error'
     
     def search_and_store_papers(self, query: str, limit: int = 20) -> Dict:
         """搜索论文并存储到数据库（带去重）"""
         print(f"搜索查询: {query}")
         print("=" * 60)
         
-        # 加载已处理论文
-        self.load_processed_papers()
-        
         # 搜索论文
         papers = self.scorer.search_papers(query, limit)
         
+        return self.store_search_results(query, papers)
+    
+    def store_search_results(self, query: str, papers: List[Dict]) -> Dict:
+        """去重并存储一个查询的检索结果"""
+        # 加载已处理论文
+        self.load_processed_papers()
+        
         if not papers:
             print("未找到相关论文")
             return {'success': False, 'message': '未找到相关论文'}
@@ -113,15 +130,13 @@ class EnhancedLiteratureSystem:
         for i, paper in enumerate(papers, 1):
             print(f"处理 {i}/{len(papers)}: {paper.get('title', 'Unknown')[:50]}...")
             
-            if self.process_and_store_paper(paper, query):
+            status = self._process_paper(paper, query)
+            if status == 'stored':
                 processed_count += 1
-            elif self.is_duplicate(paper):
+            elif status == 'duplicate':
                 duplicate_count += 1
             else:
                 error_count += 1
-            
-            # 避免API速率限制（30%速率）
-            time.sleep(2.0)
         
         print(f"\n处理完成:")
         print(f"  新存储: {processed_count} 篇")
@@ -137,30 +152,31 @@ class EnhancedLiteratureSystem:
         }
     
     def batch_search_and_store(self, queries: List[str], limit_per_query: int = 20) -> Dict:
-        """批量搜索并存储论文（带去重）"""
+        """批量搜索并存储论文（带去重）
+        
+        全部查询通过共享客户端并发检索，速率只受 API 配额限制；
+        结果按查询顺序依次去重入库。
+        """
         print("批量搜索和存储论文（带去重）")
         print("=" * 60)
         
+        papers_by_query = self.scorer.search_papers_many(queries, limit_per_query)
+        
         total_found = 0
         total_processed = 0
         total_duplicates = 0
         total_errors = 0
         
-        for i, query in enumerate(queries, 1):
-            print(f"\n搜索 {i}/{len(queries)}: {query}")
+        for i, (query, papers) in enumerate(papers_by_query.items(), 1):
+            print(f"\n搜索 {i}/{len(papers_by_query)}: {query}")
             
-            result = self.search_and_store_papers(query, limit_per_query)
+            result = self.store_search_results(query, papers)
             
             if result['success']:
                 total_found += result['total_found']
                 total_processed += result['processed']
                 total_duplicates += result['duplicates']
                 total_errors += result['errors']
-            
-            # 避免API速率限制（30%速率）
-            if i < len(queries):
-                print("等待5秒避免速率限制...")
-                time.sleep(5)
         
         print(f"\n批量搜索完成:")
         print(f"  总找到: {total_found} 篇")
@@ -176,6 +192,67 @@ class EnhancedLiteratureSystem:
             'total_errors': total_errors
         }
     
+    def harvest_and_store(self, query: str, max_papers: Optional[int] = None,
+                          year: str = '2020-2024') -> Dict:
+        """通过 /paper/search/bulk 收割一个查询的全部结果并逐页去重入库
+        
+        每页最多 1000 篇，按 continuation token 续取，适合大规模收割。
+        
+        Args:
+            query: 检索词
+            max_papers: 最多收割的论文数，None 表示取完全部结果
+            year: 年份范围
+        """
+        totals = {'total_found': 0, 'processed': 0, 'duplicates': 0, 'errors': 0}
+        
+        async def harvest(client):
+            async for page in client.search_bulk(query, max_results=max_papers, year=year):
+                result = self.store_search_results(query, page)
+                for key in totals:
+                    totals[key] += result.get(key, 0)
+        
+        client = self.scorer.client
+        client.run(harvest)
+        
+        print(f"收割完成: 找到 {totals['total_found']} 篇，新存储 {totals['processed']} 篇")
+        return dict(totals, success=True)
+    
+    def refresh_citation_counts(self, chunk_size: int = 5000) -> Dict:
+        """通过 /paper/batch 刷新库中全部论文的引用数（每个 POST 500 个 ID）
+        
+        按 paper_id（S2 paperId）或 DOI 查询，每个分块内的请求并发发送。
+        
+        Args:
+            chunk_size: 每次从数据库读取并提交查询的论文数
+        """
+        client = self.scorer.client
+        requested = 0
+        updated = 0
+        chunk = []
+        
+        def flush():
+            nonlocal requested, updated
+            papers = client.run(client.get_papers_batch, [batch_id for _, batch_id in chunk],
+                                fields='citationCount')
+            counts = [(paper_id, paper['citationCount'])
+                      for (paper_id, _), paper in zip(chunk, papers)
+                      if paper and paper.get('citationCount') is not None]
+            requested += len(chunk)
+            updated += self.database.update_citation_counts(counts)
+            chunk.clear()
+        
+        for record in self.database.iter_papers(order='id', columns=('paper_id', 'doi')):
+            batch_id = batch_paper_id(record)
+            if record['paper_id'] and batch_id:
+                chunk.append((record['paper_id'], batch_id))
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+        
+        logger.info(f"引用数刷新完成: 查询 {requested} 篇，更新 {updated} 篇")
+        return {'requested': requested, 'updated': updated}
+    
     def get_database_summary(self) -> Dict:
         """获取数据库摘要"""
         stats = self.database.get_database_stats()
@@ -191,8 +268,8 @@ class EnhancedLiteratureSystem:
         return stats
     
     def get_download_candidates(self, min_score: int = 70, limit: int = 100) -> List[Dict]:
-        """获取下载候选论文"""
-        papers = self.database.get_papers_by_score(min_score, limit)
+        """获取下载候选论文（尚未成功下载 PDF 的高分论文）"""
+        papers = self.database.pending_downloads(min_score, limit)
         
         print(f"下载候选论文 (评分≥{min_score}分):")
         print("=" * 60)
@@ -232,9 +309,14 @@ class EnhancedLiteratureSystem:
         
         return papers
     
-    def export_database(self, filename: str = "literature_export.csv"):
-        """导出数据库"""
-        success = self.database.export_to_csv(filename)
+    def export_database(self, filename: str = "literature_export.csv", **options):
+        """导出数据库
+        
+        格式和压缩方式按扩展名推断 (.csv / .jsonl / .parquet，可加 .gz / .zst)，
+        options 透传给 LiteratureExporter.export (columns, filters, incremental 等)。
+        """
+        result = LiteratureExporter(self.database).export(filename, **options)
+        success = result['success']
         
         if success:
             print(f"✅ 数据库已导出到: {filename}")
@@ -243,6 +325,17 @@ class EnhancedLiteratureSystem:
         
         return success
 
+    def rescore_corpus(self, dry_run: bool = False, **options) -> Dict:
+        """修改 self.scorer.scoring_keywords 后，按新权重重新评分库中全部论文
+        
+        无需重新检索，options 透传给 CorpusRescorer (cache_path, chunk_size)。
+        """
+        self.scorer.compile_keywords()
+        result = rescore_corpus(self.database, self.scorer, dry_run=dry_run, **options)
+        
+        print(f"重新评分完成: 共 {result['total']} 篇论文，{result['changed']} 篇评分变化")
+        return result
+
 def main():
     """主函数 - 演示增强版系统"""
     print("增强版文献检索和数据库系统")
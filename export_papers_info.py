@@ -4,7 +4,6 @@
 """
 
 import requests
-import time
 import logging
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
@@ -12,6 +11,8 @@ import re
 import os
 import json
 
+from semantic_scholar_client import get_default_client
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,7 +21,6 @@ class PaperInfoExporter:
     """论文信息导出器"""
     
     def __init__(self):
-        self.base_url = "https://api.semanticscholar.org/graph/v1/paper/search"
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -28,28 +28,12 @@ class PaperInfoExporter:
         })
     
     def search_papers(self, query, limit=20, year_start=2020, year_end=2024):
-        """搜索论文"""
+        """搜索论文（限速与 429 重试由共享客户端处理）"""
         try:
-            params = {
-                'query': query,
-                'limit': limit,
-                'year': f"{year_start}-{year_end}",
-                'fields': 'title,authors,year,abstract,openAccessPdf,externalIds,venue'
-            }
-            
-            response = self.session.get(self.base_url, params=params, timeout=30)
-            
-            if response.status_code == 429:
-                logger.warning("API速率限制，等待60秒...")
-                time.sleep(60)
-                response = self.session.get(self.base_url, params=params, timeout=30)
-            
-            if response.status_code != 200:
-                logger.error(f"API请求失败，状态码: {response.status_code}")
-                return []
-            
-            data = response.json()
-            papers = data.get('data', [])
+            client = get_default_client()
+            papers = client.run(client.search, query, limit,
+                                fields='title,authors,year,abstract,openAccessPdf,externalIds,venue',
+                                year=f"{year_start}-{year_end}")
             
             return papers
             
@@ -76,10 +60,6 @@ class PaperInfoExporter:
             print(f"搜索查询 {i+1}/{len(search_queries)}: {query}")
             papers = self.search_papers(query, limit=5, year_start=2020, year_end=2024)
             all_papers.extend(papers)
-            
-            if i < len(search_queries) - 1:
-                print("等待30秒避免速率限制...")
-                time.sleep(30)
         
         # 去重
         unique_papers = []
@@ -106,8 +106,8 @@ class IntegratedLiteratureSystem:
         }
     
     def get_download_candidates(self, min_score: int = 70, limit: int = 100) -> List[Dict]:
-        """获取下载候选论文"""
-        papers = self.database.get_papers_by_score(min_score, limit)
+        """获取下载候选论文（尚未成功下载 PDF 的高分论文）"""
+        papers = self.database.pending_downloads(min_score, limit)
         
         print(f"下载候选论文 (评分≥{min_score}分):")
         print("=" * 60)
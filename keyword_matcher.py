@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+多关键词匹配器
+将评分关键词表编译为一个正则自动机，单次扫描文本即可找出全部（可重叠的）关键词
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """将一组字面量编译为字典树形式的正则（贪婪匹配时优先最长的关键词）"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # 当前节点本身是一个完整关键词时，后续部分可选
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordMatch(NamedTuple):
+    """一次关键词命中（偏移量基于小写化后的文本）"""
+    start: int
+    end: int
+    keyword: str
+
+
+class KeywordMatcher:
+    """关键词匹配器
+
+    匹配语义与逐个关键词做 `keyword.lower() in text.lower()` 完全一致（子串匹配，
+    不要求单词边界），但整张关键词表只扫描文本一次。
+
+    实现：把所有关键词组织成字典树并编译为前瞻分组正则 `(?=(...))`，
+    每个位置只需沿树的一条路径比较，开销不随关键词数量线性增长。
+    每个位置报告最长的命中；在同一位置能命中的其他关键词必然是它的前缀，
+    因此预先计算每个关键词的"前缀关键词"集合即可补全重叠命中。
+    """
+
+    def __init__(self, keyword_table: Dict[str, Dict[str, int]]):
+        """
+        Args:
+            keyword_table: {类别: {关键词: 分数}}，即 PaperScoringSystem.scoring_keywords
+        """
+        # 按表中顺序展开的 (关键词, 分数) 条目，同一关键词可出现在多个类别中
+        self.entries: List[Tuple[str, int]] = [
+            (keyword, points)
+            for keywords in keyword_table.values()
+            for keyword, points in keywords.items()
+        ]
+
+        # 小写关键词 -> 条目下标
+        self._entries_by_pattern: Dict[str, List[int]] = {}
+        for i, (keyword, _) in enumerate(self.entries):
+            if keyword:
+                self._entries_by_pattern.setdefault(keyword.lower(), []).append(i)
+
+        # 去重后的小写关键词，按首次出现的顺序
+        self.patterns: List[str] = list(self._entries_by_pattern)
+
+        patterns = sorted(self._entries_by_pattern, key=len, reverse=True)
+        self._prefixes: Dict[str, List[str]] = {
+            pattern: [other for other in patterns if other != pattern and pattern.startswith(other)]
+            for pattern in patterns
+        }
+
+        self._regex = re.compile('(?=(' + _trie_pattern(patterns) + '))') if patterns else None
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """找出小写化文本中的全部关键词命中（包括重叠命中）"""
+        if self._regex is None:
+            return []
+
+        text = text.lower()
+        matches = []
+        for m in self._regex.finditer(text):
+            start = m.start()
+            longest = m.group(1)
+            for pattern in (longest, *self._prefixes[longest]):
+                matches.append(KeywordMatch(start, start + len(pattern), pattern))
+        return matches
+
+    def count(self, text: str) -> Counter:
+        """统计每个关键词（小写）的出现次数"""
+        return Counter(match.keyword for match in self.find_all(text))
+
+    def match_patterns(self, text: str) -> Set[str]:
+        """返回文本中出现过的关键词（小写，取自 patterns）"""
+        found: Set[str] = set()
+        if self._regex is None:
+            return found
+
+        for m in self._regex.finditer(text.lower()):
+            longest = m.group(1)
+            if longest not in found:
+                found.add(longest)
+                found.update(self._prefixes[longest])
+        return found
+
+    def score(self, text: str) -> Tuple[int, Dict[str, int]]:
+        """计算评分
+
+        Returns:
+            Tuple: (总分, {关键词: 分数})，与原逐词扫描的结果和顺序一致
+        """
+        return self.score_patterns(self.match_patterns(text))
+
+    def score_patterns(self, found: Iterable[str]) -> Tuple[int, Dict[str, int]]:
+        """根据已命中的关键词集合（小写）计算评分，未知关键词被忽略"""
+        matched_indices = sorted(
+            i for pattern in found for i in self._entries_by_pattern.get(pattern, ())
+        )
+
+        total = 0
+        matched_keywords = {}
+        for i in matched_indices:
+            keyword, points = self.entries[i]
+            total += points
+            matched_keywords[keyword] = points
+        return total, matched_keywords
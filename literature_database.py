@@ -7,25 +7,311 @@
 import sqlite3
 import json
 import logging
+import re
+import threading
+import weakref
+from collections.abc import Mapping
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 import os
 
+from app.utils.identifiers import IDENTIFIER_SCHEMES, extract_identifiers, normalize_doi, title_fingerprint
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SQLite 单条语句默认最多 999 个绑定参数
+SQLITE_MAX_PARAMS = 900
+
+# iter_papers 支持的排序方式 -> 排序列（None 表示按主键升序）
+PAPER_ORDERS = {
+    'score': 'score',
+    'created_at': 'created_at',
+    'id': None,
+}
+
+# iter_papers 支持的过滤条件
+PAPER_FILTERS = {
+    'min_score': 'score >= ?',
+    'max_score': 'score <= ?',
+    'year': 'year = ?',
+    'year_from': 'year >= ?',
+    'year_to': 'year <= ?',
+    'search_query': 'search_query = ?',
+    'updated_since': 'updated_at > ?',
+    'changed_since': 'change_seq > ?',
+    'changed_until': 'change_seq <= ?',
+    'after_id': 'id > ?',
+}
+
+# 按 paper_id 插入或更新；与 INSERT OR REPLACE 不同，冲突时保留原有 id 和 created_at
+PAPER_UPSERT_SQL = '''
+    INSERT INTO papers (
+        paper_id, title, authors, year, venue, abstract, doi,
+        citation_count, is_open_access, score, matched_keywords,
+        recommendation, description, search_query, updated_at,
+        doi_norm, title_hash
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(paper_id) DO UPDATE SET
+        title = excluded.title,
+        authors = excluded.authors,
+        year = excluded.year,
+        venue = excluded.venue,
+        abstract = excluded.abstract,
+        doi = excluded.doi,
+        citation_count = excluded.citation_count,
+        is_open_access = excluded.is_open_access,
+        score = excluded.score,
+        matched_keywords = excluded.matched_keywords,
+        recommendation = excluded.recommendation,
+        description = excluded.description,
+        search_query = excluded.search_query,
+        updated_at = excluded.updated_at,
+        doi_norm = excluded.doi_norm,
+        title_hash = excluded.title_hash
+'''
+
+# papers 表的列（与建表语句顺序一致）
+PAPER_COLUMNS = (
+    'id', 'paper_id', 'title', 'authors', 'year', 'venue', 'abstract', 'doi',
+    'citation_count', 'is_open_access', 'score', 'matched_keywords',
+    'recommendation', 'description', 'search_query', 'created_at', 'updated_at'
+)
+
+# 去重键列：由 _paper_to_row 在写入时根据 doi/title 计算，不属于论文记录字段
+DEDUP_KEY_COLUMNS = {
+    'doi_norm': 'TEXT',
+    'title_hash': 'TEXT',
+}
+
+# 下载记录表后来增加的列（旧数据库启动时补齐）
+DOWNLOAD_RECORD_COLUMNS = {
+    'file_size': 'INTEGER',
+    'sha256': 'TEXT',
+    'access_type': 'TEXT',
+    'elapsed': 'REAL',
+}
+
+# 下载状态：成功、失败（可重试）、需要人工干预
+DOWNLOAD_SUCCESS = 'success'
+DOWNLOAD_FAILED = 'failed'
+DOWNLOAD_MANUAL = 'manual'
+DOWNLOAD_STATUSES = (DOWNLOAD_SUCCESS, DOWNLOAD_FAILED, DOWNLOAD_MANUAL)
+
+# 以 JSON 文本存储的列及其空值默认值
+JSON_COLUMNS = {
+    'authors': list,
+    'matched_keywords': dict,
+}
+
+class PaperRecord(Mapping):
+    """论文记录
+    
+    按列名访问查询结果的只读映射，可直接替代原先的论文字典
+    (record['title'] / record.title / record.get('doi'))。
+    同一次查询的所有记录共享一个列名索引；JSON 列在首次访问时才解码。
+    """
+    
+    __slots__ = ('_index', '_values', '_decoded')
+    
+    def __init__(self, index: Dict[str, int], values: Tuple):
+        self._index = index
+        self._values = values
+        self._decoded = None
+    
+    @staticmethod
+    def build_index(columns: Sequence[str]) -> Dict[str, int]:
+        """为一组列名构建共享索引"""
+        return {name: i for i, name in enumerate(columns)}
+    
+    def __getitem__(self, key: str):
+        try:
+            value = self._values[self._index[key]]
+        except KeyError:
+            raise KeyError(key) from None
+        
+        if key in JSON_COLUMNS:
+            if self._decoded is None:
+                self._decoded = {}
+            elif key in self._decoded:
+                return self._decoded[key]
+            decoded = json.loads(value) if value else JSON_COLUMNS[key]()
+            self._decoded[key] = decoded
+            return decoded
+        
+        if key == 'is_open_access':
+            return bool(value)
+        
+        return value
+    
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    @property
+    def row(self) -> Tuple:
+        """未解码的原始值元组（顺序与查询列一致）"""
+        return self._values
+    
+    def to_dict(self) -> Dict:
+        """转换为普通字典（解码全部 JSON 列）"""
+        return {key: self[key] for key in self._index}
+    
+    def __repr__(self) -> str:
+        return f"PaperRecord(paper_id={self._values[self._index['paper_id']]!r})" \
+            if 'paper_id' in self._index else f"PaperRecord({self._values!r})"
+
+class _ThreadConnection:
+    """线程局部存储中的连接持有者：线程结束时被回收，触发关闭连接"""
+    
+    __slots__ = ('conn', '__weakref__')
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+def _close_connection(conn: sqlite3.Connection, connections: set, lock: threading.Lock):
+    """关闭连接并从打开的连接集合中移除（可在任意线程调用，可重复调用）"""
+    with lock:
+        connections.discard(conn)
+    try:
+        conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"关闭数据库连接失败: {e}")
+
+
 class LiteratureDatabase:
-    """文献检索数据库"""
+    """文献检索数据库
+    
+    每个线程持有一个长连接（WAL模式），所有方法通过 transaction() 共享事务，
+    避免频繁建立连接以及回滚日志的 fsync 开销。线程结束时其连接随之关闭，
+    因此临时线程池（例如并发下载）不会累积打开的连接。
+    """
     
-    def __init__(self, db_path: str = "literature_database.db"):
+    def __init__(self, db_path: str = "literature_database.db",
+                 cache_size_kb: int = 64 * 1024,
+                 mmap_size: int = 256 * 1024 * 1024,
+                 busy_timeout: float = 30.0,
+                 materialized_stats: bool = False):
+        """
+        Args:
+            db_path: 数据库文件路径
+            cache_size_kb: 每个连接的页缓存大小 (KB)
+            mmap_size: 内存映射I/O大小 (字节)，0 表示禁用
+            busy_timeout: 等待写锁的超时时间 (秒)
+            materialized_stats: 是否维护 paper_stats 汇总表，
+                启用后 get_database_stats 的开销与论文总数无关
+        """
         self.db_path = db_path
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.busy_timeout = busy_timeout
+        self.materialized_stats = materialized_stats
+        
+        self._local = threading.local()
+        self._connections: set = set()
+        self._connections_lock = threading.Lock()
+        self.fts_enabled = False
+        
         self.init_database()
     
+    def _create_connection(self) -> sqlite3.Connection:
+        """创建并配置一个新连接"""
+        # isolation_level=None: 由 transaction() 显式控制 BEGIN/COMMIT
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        return conn
+    
+    def get_connection(self) -> sqlite3.Connection:
+        """获取当前线程的长连接（按需创建）"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            conn = self._create_connection()
+            holder = _ThreadConnection(conn)
+            # 线程结束时线程局部存储被清除，持有者被回收后关闭连接；
+            # 回调不引用 self，不会延长数据库对象的生命周期
+            weakref.finalize(holder, _close_connection, conn, self._connections, self._connections_lock)
+            self._local.holder = holder
+            with self._connections_lock:
+                self._connections.add(conn)
+        return holder.conn
+    
+    @property
+    def open_connections(self) -> int:
+        """当前打开的连接数"""
+        with self._connections_lock:
+            return len(self._connections)
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """事务上下文管理器
+        
+        正常退出时提交，异常时回滚。嵌套调用会并入最外层事务，
+        因此 save_search_session 等组合操作只产生一次提交。
+        """
+        conn = self.get_connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        
+        # IMMEDIATE: 在事务开始时获取写锁，避免读升级为写时出现 "database is locked"
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+    
+    def close(self):
+        """关闭所有线程持有的连接"""
+        with self._connections_lock:
+            connections = list(self._connections)
+        for conn in connections:
+            _close_connection(conn, self._connections, self._connections_lock)
+        self._local = threading.local()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
     def init_database(self):
         """初始化数据库"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.transaction() as conn:
+            self._create_schema(conn.cursor())
+            self.fts_enabled = self._create_fulltext_index(conn.cursor())
+            if self.materialized_stats:
+                self._create_stats_table(conn.cursor())
+        
+        logger.info("数据库初始化完成")
+    
+    def _create_schema(self, cursor: sqlite3.Cursor):
+        """创建表和索引"""
         
         # 创建文献表
         cursor.execute('''
@@ -46,9 +332,15 @@ class LiteratureDatabase:
                 description TEXT,
                 search_query TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                doi_norm TEXT,
+                title_hash TEXT,
+                change_seq INTEGER
             )
         ''')
+        self._migrate_dedup_keys(cursor)
+        self._create_change_tracking(cursor)
+        self._create_identifiers_table(cursor)
         
         # 创建搜索记录表
         cursor.execute('''
@@ -63,7 +355,7 @@ class LiteratureDatabase:
             )
         ''')
         
-        # 创建下载记录表
+        # 创建下载记录表（每次下载尝试一行）
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS download_records (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -73,93 +365,499 @@ class LiteratureDatabase:
                 file_path TEXT,
                 download_time TIMESTAMP,
                 error_message TEXT,
+                file_size INTEGER,
+                sha256 TEXT,
+                access_type TEXT,
+                elapsed REAL,
                 FOREIGN KEY (paper_id) REFERENCES papers (paper_id)
             )
         ''')
+        self._migrate_download_records(cursor)
         
         # 创建索引
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_papers_score ON papers (score)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_papers_query ON papers (search_query)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_papers_created ON papers (created_at)')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_papers_doi_norm ON papers (doi_norm)
+            WHERE doi_norm IS NOT NULL
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_papers_title_hash ON papers (title_hash)
+            WHERE title_hash IS NOT NULL
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_download_records_paper ON download_records (paper_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_download_records_status ON download_records (download_status)')
+    
+    def _migrate_download_records(self, cursor: sqlite3.Cursor):
+        """为旧数据库的下载记录表补齐新增列"""
+        existing = {row[1] for row in cursor.execute('PRAGMA table_info(download_records)')}
+        for column, column_type in DOWNLOAD_RECORD_COLUMNS.items():
+            if column not in existing:
+                cursor.execute(f'ALTER TABLE download_records ADD COLUMN {column} {column_type}')
+    
+    def _migrate_dedup_keys(self, cursor: sqlite3.Cursor):
+        """为旧数据库添加去重键列，并从已有的 doi/title 回填"""
+        existing = {row[1] for row in cursor.execute('PRAGMA table_info(papers)')}
+        missing = [c for c in DEDUP_KEY_COLUMNS if c not in existing]
+        if not missing:
+            return
         
-        conn.commit()
-        conn.close()
+        for column in missing:
+            cursor.execute(f'ALTER TABLE papers ADD COLUMN {column} {DEDUP_KEY_COLUMNS[column]}')
         
-        logger.info("数据库初始化完成")
+        rows = cursor.execute('SELECT id, doi, title FROM papers').fetchall()
+        cursor.executemany(
+            'UPDATE papers SET doi_norm = ?, title_hash = ? WHERE id = ?',
+            ((normalize_doi(doi), title_fingerprint(title), paper_id) for paper_id, doi, title in rows)
+        )
+        logger.info(f"去重键已回填: {len(rows)} 篇论文")
+    
+    def _create_change_tracking(self, cursor: sqlite3.Cursor):
+        """维护 papers.change_seq：每次插入或更新论文时赋予递增的变更序号
+        
+        序号在写事务内分配，写事务由 BEGIN IMMEDIATE 串行化，因此序号顺序与提交顺序一致：
+        读到序号 N 时，所有序号不超过 N 的变更都已提交。增量导出以此作为水位，
+        不依赖 updated_at（同一批写入的时间戳相同，且时间戳在事务开始前取得）。
+        旧数据库首次升级时按 id 回填。
+        """
+        existing = {row[1] for row in cursor.execute('PRAGMA table_info(papers)')}
+        if 'change_seq' not in existing:
+            cursor.execute('ALTER TABLE papers ADD COLUMN change_seq INTEGER')
+            cursor.execute('UPDATE papers SET change_seq = id')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_papers_change_seq ON papers (change_seq)')
+        
+        next_seq = '(SELECT COALESCE(MAX(change_seq), 0) + 1 FROM papers)'
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS papers_change_seq_insert AFTER INSERT ON papers BEGIN
+                UPDATE papers SET change_seq = {next_seq} WHERE id = new.id;
+            END
+        ''')
+        # WHEN 条件：触发器自身的 UPDATE 改变了 change_seq，不会再次触发
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS papers_change_seq_update AFTER UPDATE ON papers
+            WHEN new.change_seq IS old.change_seq BEGIN
+                UPDATE papers SET change_seq = {next_seq} WHERE id = new.id;
+            END
+        ''')
+    
+    def get_change_seq(self) -> int:
+        """当前最大的变更序号（没有论文时为 0）"""
+        return self.get_connection().execute(
+            'SELECT COALESCE(MAX(change_seq), 0) FROM papers'
+        ).fetchone()[0]
+    
+    def _create_identifiers_table(self, cursor: sqlite3.Cursor):
+        """创建外部标识符 -> 规范作品 ID 的映射表
+        
+        已有数据库首次升级时从 papers 表的 paper_id/doi 回填。
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'identifiers'")
+        needs_backfill = cursor.fetchone() is None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS identifiers (
+                scheme TEXT NOT NULL,
+                value TEXT NOT NULL,
+                work_id TEXT NOT NULL,
+                PRIMARY KEY (scheme, value)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_identifiers_work ON identifiers (work_id)')
+        
+        if needs_backfill:
+            rows = cursor.execute('SELECT paper_id, doi FROM papers ORDER BY id').fetchall()
+            self._register_identifier_sets(
+                cursor.connection,
+                [extract_identifiers({'paper_id': paper_id, 'doi': doi}) for paper_id, doi in rows]
+            )
+            if rows:
+                logger.info(f"标识符映射已回填: {len(rows)} 篇论文")
+    
+    def _create_fulltext_index(self, cursor: sqlite3.Cursor) -> bool:
+        """创建 FTS5 全文索引及同步触发器
+        
+        已有数据库首次升级时会从 papers 表回填索引。
+        
+        Returns:
+            bool: FTS5 是否可用（不可用时 search_papers 回退到 LIKE 扫描）
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'papers_fts'")
+        needs_backfill = cursor.fetchone() is None
+        
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                    title, abstract, venue,
+                    content='papers', content_rowid='id',
+                    tokenize='porter unicode61'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5不可用，全文搜索将使用LIKE扫描: {e}")
+            return False
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN
+                INSERT INTO papers_fts (rowid, title, abstract, venue)
+                VALUES (new.id, new.title, new.abstract, new.venue);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS papers_fts_delete AFTER DELETE ON papers BEGIN
+                INSERT INTO papers_fts (papers_fts, rowid, title, abstract, venue)
+                VALUES ('delete', old.id, old.title, old.abstract, old.venue);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS papers_fts_update
+            AFTER UPDATE OF title, abstract, venue ON papers BEGIN
+                INSERT INTO papers_fts (papers_fts, rowid, title, abstract, venue)
+                VALUES ('delete', old.id, old.title, old.abstract, old.venue);
+                INSERT INTO papers_fts (rowid, title, abstract, venue)
+                VALUES (new.id, new.title, new.abstract, new.venue);
+            END
+        ''')
+        
+        if needs_backfill:
+            cursor.execute("INSERT INTO papers_fts (papers_fts) VALUES ('rebuild')")
+            logger.info("全文索引已从现有论文回填")
+        
+        return True
+    
+    def _create_stats_table(self, cursor: sqlite3.Cursor):
+        """创建 paper_stats 汇总表及增量维护触发器
+        
+        每行为一个 (dimension, bucket) 计数：total、score_band (high/medium/low)、
+        year 和 venue。首次创建时从 papers 表回填。
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'paper_stats'")
+        needs_backfill = cursor.fetchone() is None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS paper_stats (
+                dimension TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, bucket)
+            ) WITHOUT ROWID
+        ''')
+        
+        def buckets(row: str) -> str:
+            band = (f"CASE WHEN {row}.score >= 70 THEN 'high' "
+                    f"WHEN {row}.score >= 50 THEN 'medium' "
+                    f"WHEN {row}.score < 50 THEN 'low' END")
+            return f'''
+                SELECT 'score_band', {band} WHERE {row}.score IS NOT NULL
+                UNION ALL SELECT 'year', IFNULL({row}.year, '')
+                UNION ALL SELECT 'venue', IFNULL({row}.venue, '')
+            '''
+        
+        def increment(row: str) -> str:
+            return f'''
+                INSERT INTO paper_stats (dimension, bucket, count)
+                SELECT *, 1 FROM ({buckets(row)}) WHERE 1
+                ON CONFLICT (dimension, bucket) DO UPDATE SET count = count + 1;
+            '''
+        
+        def decrement(row: str) -> str:
+            return f'''
+                UPDATE paper_stats SET count = count - 1
+                WHERE (dimension, bucket) IN ({buckets(row)});
+                DELETE FROM paper_stats WHERE count <= 0 AND dimension != 'total';
+            '''
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS paper_stats_insert AFTER INSERT ON papers BEGIN
+                INSERT INTO paper_stats (dimension, bucket, count) VALUES ('total', '', 1)
+                ON CONFLICT (dimension, bucket) DO UPDATE SET count = count + 1;
+                {increment('new')}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS paper_stats_delete AFTER DELETE ON papers BEGIN
+                UPDATE paper_stats SET count = count - 1 WHERE dimension = 'total';
+                {decrement('old')}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS paper_stats_update
+            AFTER UPDATE OF score, year, venue ON papers BEGIN
+                {decrement('old')}
+                {increment('new')}
+            END
+        ''')
+        
+        if needs_backfill:
+            cursor.executemany(
+                'INSERT INTO paper_stats (dimension, bucket, count) VALUES (?, ?, ?)',
+                self._scan_stats_groups(cursor)
+            )
+            cursor.execute(
+                "INSERT OR IGNORE INTO paper_stats (dimension, bucket, count) VALUES ('total', '', 0)"
+            )
+            logger.info("统计汇总表已从现有论文回填")
+    
+    def rebuild_fulltext_index(self) -> bool:
+        """从 papers 表重建全文索引（用于修复或手动迁移）"""
+        if not self.fts_enabled:
+            return False
+        
+        with self.transaction() as conn:
+            conn.execute("INSERT INTO papers_fts (papers_fts) VALUES ('rebuild')")
+            conn.execute("INSERT INTO papers_fts (papers_fts) VALUES ('optimize')")
+        
+        logger.info("全文索引重建完成")
+        return True
+    
+    @staticmethod
+    def _paper_to_row(paper_data: Dict, updated_at: datetime) -> Tuple:
+        """将论文字典序列化为 PAPER_UPSERT_SQL 的参数元组"""
+        return (
+            paper_data.get('paper_id', ''),
+            paper_data.get('title', ''),
+            json.dumps(paper_data.get('authors', [])),
+            paper_data.get('year'),
+            paper_data.get('venue', ''),
+            paper_data.get('abstract', ''),
+            paper_data.get('doi', ''),
+            paper_data.get('citation_count', 0),
+            paper_data.get('is_open_access', False),
+            paper_data.get('score', 0),
+            json.dumps(paper_data.get('matched_keywords', {})),
+            paper_data.get('recommendation', ''),
+            paper_data.get('description', ''),
+            paper_data.get('search_query', ''),
+            updated_at,
+            normalize_doi(paper_data.get('doi')),
+            title_fingerprint(paper_data.get('title'))
+        )
+    
+    @staticmethod
+    def _resolve_columns(columns: Optional[Sequence[str]]) -> Tuple[str, ...]:
+        """校验列投影，None 表示全部列"""
+        if columns is None:
+            return PAPER_COLUMNS
+        unknown = [c for c in columns if c not in PAPER_COLUMNS]
+        if unknown:
+            raise ValueError(f"未知的列: {unknown}")
+        return tuple(columns)
+    
+    @staticmethod
+    def _records(cursor: sqlite3.Cursor) -> List[PaperRecord]:
+        """将游标结果映射为 PaperRecord（列名取自 cursor.description）"""
+        index = PaperRecord.build_index([d[0] for d in cursor.description])
+        return [PaperRecord(index, row) for row in cursor]
     
     def save_paper(self, paper_data: Dict) -> bool:
         """保存论文信息"""
         try:
-            conn = sqlite3.connect(self.db_path, timeout=30)
-            cursor = conn.cursor()
-            
-            # 准备数据
-            paper_id = paper_data.get('paper_id', '')
-            title = paper_data.get('title', '')
-            authors = json.dumps(paper_data.get('authors', []))
-            year = paper_data.get('year')
-            venue = paper_data.get('venue', '')
-            abstract = paper_data.get('abstract', '')
-            doi = paper_data.get('doi', '')
-            citation_count = paper_data.get('citation_count', 0)
-            is_open_access = paper_data.get('is_open_access', False)
-            score = paper_data.get('score', 0)
-            matched_keywords = json.dumps(paper_data.get('matched_keywords', {}))
-            recommendation = paper_data.get('recommendation', '')
-            description = paper_data.get('description', '')
-            search_query = paper_data.get('search_query', '')
-            
-            # 插入或更新数据
-            cursor.execute('''
-                INSERT OR REPLACE INTO papers (
-                    paper_id, title, authors, year, venue, abstract, doi,
-                    citation_count, is_open_access, score, matched_keywords,
-                    recommendation, description, search_query, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                paper_id, title, authors, year, venue, abstract, doi,
-                citation_count, is_open_access, score, matched_keywords,
-                recommendation, description, search_query, datetime.now()
-            ))
-            
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"论文已保存: {title[:50]}...")
+            row = self._paper_to_row(paper_data, datetime.now())
+            
+            # 插入或更新数据（保留原有 id 和 created_at），同时登记外部标识符
+            with self.transaction() as conn:
+                conn.execute(PAPER_UPSERT_SQL, row)
+                self._register_identifier_sets(conn, [extract_identifiers(paper_data)])
+            
+            logger.info(f"论文已保存: {row[1][:50]}...")
             return True
             
         except Exception as e:
             logger.error(f"保存论文失败: {e}")
             return False
     
+    def save_papers_bulk(self, papers: Iterable[Dict], batch_size: int = 1000) -> Dict[str, int]:
+        """批量保存论文
+        
+        每批数据在一个事务内通过 executemany 写入，冲突时按 paper_id 更新，
+        并在同一事务中登记外部标识符。
+        
+        Args:
+            papers: 论文字典的可迭代对象（可以是生成器）
+            batch_size: 每个事务写入的行数
+            
+        Returns:
+            Dict: {'inserted': 新插入数, 'updated': 更新数}
+        """
+        counts = {'inserted': 0, 'updated': 0}
+        batch: List[Tuple] = []
+        identifier_sets: List[Dict[str, str]] = []
+        now = datetime.now()
+        
+        for paper in papers:
+            batch.append(self._paper_to_row(paper, now))
+            identifier_sets.append(extract_identifiers(paper))
+            if len(batch) >= batch_size:
+                self._write_batch(batch, counts, identifier_sets)
+                batch = []
+                identifier_sets = []
+        
+        if batch:
+            self._write_batch(batch, counts, identifier_sets)
+        
+        logger.info(f"批量保存完成: 新增 {counts['inserted']} 篇, 更新 {counts['updated']} 篇")
+        return counts
+    
+    def _write_batch(self, rows: List[Tuple], counts: Dict[str, int],
+                     identifier_sets: Sequence[Dict[str, str]] = ()):
+        """在单个事务中写入一批论文（及其标识符）并统计新增/更新数"""
+        paper_ids = list({row[0] for row in rows})
+        
+        with self.transaction() as conn:
+            existing = set()
+            # 分块查询已存在的 paper_id，避免超过 SQLite 参数上限
+            for i in range(0, len(paper_ids), SQLITE_MAX_PARAMS):
+                chunk = paper_ids[i:i + SQLITE_MAX_PARAMS]
+                placeholders = ','.join('?' * len(chunk))
+                existing.update(
+                    r[0] for r in conn.execute(
+                        f'SELECT paper_id FROM papers WHERE paper_id IN ({placeholders})', chunk
+                    )
+                )
+            conn.executemany(PAPER_UPSERT_SQL, rows)
+            self._register_identifier_sets(conn, identifier_sets)
+        
+        inserted = len(paper_ids) - len(existing)
+        counts['inserted'] += inserted
+        counts['updated'] += len(rows) - inserted
+    
+    @staticmethod
+    def _lookup_identifiers(conn: sqlite3.Connection,
+                            pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """批量查询 (scheme, value) -> work_id，按主键分块查找"""
+        pairs = list(pairs)
+        found = {}
+        step = SQLITE_MAX_PARAMS // 2
+        for i in range(0, len(pairs), step):
+            chunk = pairs[i:i + step]
+            placeholders = ','.join('(?, ?)' for _ in chunk)
+            params = [value for pair in chunk for value in pair]
+            for scheme, value, work_id in conn.execute(
+                f'SELECT scheme, value, work_id FROM identifiers '
+                f'WHERE (scheme, value) IN (VALUES {placeholders})', params
+            ):
+                found[(scheme, value)] = work_id
+        return found
+    
+    def _register_identifier_sets(self, conn: sqlite3.Connection,
+                                  identifier_sets: Sequence[Dict[str, str]]) -> List[Optional[str]]:
+        """登记一批标识符集合，返回各自的规范作品 ID（必须在事务内调用）
+        
+        - 任一标识符已登记时沿用其作品 ID，并补登记其余标识符
+        - 标识符分属多个作品时（例如 arXiv 预印本后来带上了 DOI），合并到优先级最高的作品
+        - 全部未登记时新建作品，ID 为优先级最高的标识符 "scheme:value"
+        """
+        known = self._lookup_identifiers(
+            conn, {(scheme, value) for ids in identifier_sets for scheme, value in ids.items()}
+        )
+        merged: Dict[str, str] = {}
+        
+        def canonical(work_id: str) -> str:
+            while work_id in merged:
+                work_id = merged[work_id]
+            return work_id
+        
+        new_pairs: Dict[Tuple[str, str], str] = {}
+        work_ids: List[Optional[str]] = []
+        for ids in identifier_sets:
+            pairs = [(scheme, ids[scheme]) for scheme in IDENTIFIER_SCHEMES if scheme in ids]
+            if not pairs:
+                work_ids.append(None)
+                continue
+            
+            found = []
+            for pair in pairs:
+                work_id = canonical(known[pair]) if pair in known else None
+                if work_id and work_id not in found:
+                    found.append(work_id)
+            work_id = found[0] if found else f"{pairs[0][0]}:{pairs[0][1]}"
+            for other in found[1:]:
+                merged[other] = work_id
+            
+            for pair in pairs:
+                if pair not in known:
+                    known[pair] = new_pairs[pair] = work_id
+            work_ids.append(work_id)
+        
+        if merged:
+            conn.executemany(
+                'UPDATE identifiers SET work_id = ? WHERE work_id = ?',
+                [(canonical(old), old) for old in merged]
+            )
+        if new_pairs:
+            conn.executemany(
+                'INSERT INTO identifiers (scheme, value, work_id) VALUES (?, ?, ?)',
+                [(scheme, value, canonical(work_id)) for (scheme, value), work_id in new_pairs.items()]
+            )
+        return [canonical(work_id) if work_id else None for work_id in work_ids]
+    
+    def register_identifiers(self, records: Iterable[Dict]) -> List[Optional[str]]:
+        """在一个事务中批量登记记录的外部标识符 (DOI / arXiv ID / S2 paperId / PMID)
+        
+        Args:
+            records: 任一来源的论文记录，标识符由 extract_identifiers 提取
+            
+        Returns:
+            List: 与输入顺序对应的规范作品 ID，记录不含任何标识符时为 None
+        """
+        identifier_sets = [extract_identifiers(record) for record in records]
+        with self.transaction() as conn:
+            return self._register_identifier_sets(conn, identifier_sets)
+    
+    def resolve_work_ids(self, records: Iterable[Dict]) -> List[Optional[str]]:
+        """批量解析记录的规范作品 ID（只读，不登记新标识符）
+        
+        Returns:
+            List: 与输入顺序对应的作品 ID，未登记时为 None
+        """
+        identifier_sets = [extract_identifiers(record) for record in records]
+        known = self._lookup_identifiers(
+            self.get_connection(),
+            {(scheme, value) for ids in identifier_sets for scheme, value in ids.items()}
+        )
+        
+        work_ids = []
+        for ids in identifier_sets:
+            matches = (known.get((scheme, ids[scheme])) for scheme in IDENTIFIER_SCHEMES if scheme in ids)
+            work_ids.append(next((work_id for work_id in matches if work_id), None))
+        return work_ids
+    
+    def resolve_work_id(self, record: Dict) -> Optional[str]:
+        """解析单条记录的规范作品 ID，未登记时返回 None"""
+        return self.resolve_work_ids([record])[0]
+    
+    def get_work_identifiers(self, work_id: str) -> Dict[str, List[str]]:
+        """获取一个作品登记过的全部标识符 {scheme: [value, ...]}"""
+        identifiers: Dict[str, List[str]] = {}
+        for scheme, value in self.get_connection().execute(
+            'SELECT scheme, value FROM identifiers WHERE work_id = ? ORDER BY scheme, value', (work_id,)
+        ):
+            identifiers.setdefault(scheme, []).append(value)
+        return identifiers
+    
     def save_search_session(self, query: str, results: List[Dict]) -> int:
         """保存搜索会话"""
         try:
-            conn = sqlite3.connect(self.db_path, timeout=30)
-            cursor = conn.cursor()
-            
             # 统计结果
             total_found = len(results)
             high_score_count = sum(1 for r in results if r.get('score', 0) >= 70)
             medium_score_count = sum(1 for r in results if 50 <= r.get('score', 0) < 70)
             low_score_count = sum(1 for r in results if r.get('score', 0) < 50)
             
-            # 插入搜索会话
-            cursor.execute('''
-                INSERT INTO search_sessions (
-                    query, total_found, high_score_count, medium_score_count, low_score_count
-                ) VALUES (?, ?, ?, ?, ?)
-            ''', (query, total_found, high_score_count, medium_score_count, low_score_count))
-            
-            session_id = cursor.lastrowid
-            
-            # 保存论文数据
-            for paper in results:
-                paper['search_query'] = query
-                self.save_paper(paper)
-            
-            conn.commit()
-            conn.close()
+            # 会话记录和论文数据在同一事务中写入（批量写入并入外层事务）
+            with self.transaction() as conn:
+                cursor = conn.execute('''
+                    INSERT INTO search_sessions (
+                        query, total_found, high_score_count, medium_score_count, low_score_count
+                    ) VALUES (?, ?, ?, ?, ?)
+                ''', (query, total_found, high_score_count, medium_score_count, low_score_count))
+                
+                session_id = cursor.lastrowid
+                
+                # 保存论文数据
+                for paper in results:
+                    paper['search_query'] = query
+                self.save_papers_bulk(results)
             
             logger.info(f"搜索会话已保存: {query} (找到{total_found}篇论文)")
             return session_id
@@ -168,263 +866,453 @@ class LiteratureDatabase:
             logger.error(f"保存搜索会话失败: {e}")
             return -1
     
-    def get_papers_by_score(self, min_score: int = 70, limit: int = 100) -> List[Dict]:
-        """根据评分获取论文"""
+    def get_papers_by_score(self, min_score: int = 70, limit: int = 100,
+                            columns: Optional[Sequence[str]] = None) -> List[PaperRecord]:
+        """根据评分获取论文
+        
+        Args:
+            columns: 只读取指定列，None 表示全部列
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self.get_connection().cursor()
             
-            cursor.execute('''
-                SELECT * FROM papers 
+            cursor.execute(f'''
+                SELECT {', '.join(self._resolve_columns(columns))} FROM papers 
                 WHERE score >= ? 
                 ORDER BY score DESC 
                 LIMIT ?
             ''', (min_score, limit))
             
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # 转换为字典格式
-            papers = []
-            for row in rows:
-                paper = {
-                    'id': row[0],
-                    'paper_id': row[1],
-                    'title': row[2],
-                    'authors': json.loads(row[3]) if row[3] else [],
-                    'year': row[4],
-                    'venue': row[5],
-                    'abstract': row[6],
-                    'doi': row[7],
-                    'citation_count': row[8],
-                    'is_open_access': bool(row[9]),
-                    'score': row[10],
-                    'matched_keywords': json.loads(row[11]) if row[11] else {},
-                    'recommendation': row[12],
-                    'description': row[13],
-                    'search_query': row[14],
-                    'created_at': row[15],
-                    'updated_at': row[16]
-                }
-                papers.append(paper)
-            
-            return papers
+            return self._records(cursor)
             
         except Exception as e:
             logger.error(f"获取论文失败: {e}")
             return []
     
-    def get_all_papers(self) -> List[Dict]:
-        """获取所有论文"""
+    def get_all_papers(self, columns: Optional[Sequence[str]] = None) -> List[PaperRecord]:
+        """获取所有论文（大表请使用 iter_papers 流式读取）"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM papers 
-                ORDER BY created_at DESC
-            ''')
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # 转换为字典格式
-            papers = []
-            for row in rows:
-                paper = {
-                    'id': row[0],
-                    'paper_id': row[1],
-                    'title': row[2],
-                    'authors': json.loads(row[3]) if row[3] else [],
-                    'year': row[4],
-                    'venue': row[5],
-                    'abstract': row[6],
-                    'doi': row[7],
-                    'citation_count': row[8],
-                    'is_open_access': bool(row[9]),
-                    'score': row[10],
-                    'matched_keywords': json.loads(row[11]) if row[11] else {},
-                    'recommendation': row[12],
-                    'description': row[13],
-                    'search_query': row[14],
-                    'created_at': row[15],
-                    'updated_at': row[16]
-                }
-                papers.append(paper)
-            
-            return papers
+            return list(self.iter_papers(order='created_at', columns=columns))
             
         except Exception as e:
             logger.error(f"获取所有论文失败: {e}")
             return []
     
-    def get_papers_by_query(self, query: str) -> List[Dict]:
+    def get_papers_by_query(self, query: str,
+                            columns: Optional[Sequence[str]] = None) -> List[PaperRecord]:
         """根据搜索查询获取论文"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM papers 
-                WHERE search_query = ? 
-                ORDER BY score DESC
-            ''', (query,))
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # 转换为字典格式
-            papers = []
-            for row in rows:
-                paper = {
-                    'id': row[0],
-                    'paper_id': row[1],
-                    'title': row[2],
-                    'authors': json.loads(row[3]) if row[3] else [],
-                    'year': row[4],
-                    'venue': row[5],
-                    'abstract': row[6],
-                    'doi': row[7],
-                    'citation_count': row[8],
-                    'is_open_access': bool(row[9]),
-                    'score': row[10],
-                    'matched_keywords': json.loads(row[11]) if row[11] else {},
-                    'recommendation': row[12],
-                    'description': row[13],
-                    'search_query': row[14],
-                    'created_at': row[15],
-                    'updated_at': row[16]
-                }
-                papers.append(paper)
-            
-            return papers
+            return list(self.iter_papers({'search_query': query}, order='score', columns=columns))
             
         except Exception as e:
             logger.error(f"获取论文失败: {e}")
             return []
     
-    def get_database_stats(self) -> Dict:
-        """获取数据库统计信息"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # 总论文数
-            cursor.execute('SELECT COUNT(*) FROM papers')
-            total_papers = cursor.fetchone()[0]
+    @staticmethod
+    def _build_filter_clause(filters: Optional[Dict]) -> Tuple[List[str], List]:
+        """将过滤条件转换为 WHERE 子句列表和参数
+        
+        支持的键: min_score, max_score, year, year_from, year_to,
+        search_query, updated_since, changed_since, changed_until, after_id
+        """
+        clauses = []
+        params = []
+        
+        for key, value in (filters or {}).items():
+            if value is None:
+                continue
+            if key not in PAPER_FILTERS:
+                raise ValueError(f"不支持的过滤条件: {key}")
+            clauses.append(PAPER_FILTERS[key])
+            params.append(value)
+        
+        return clauses, params
+    
+    def _iter_rows(self, filters: Optional[Dict] = None, order: str = 'score',
+                   page_size: int = 500,
+                   columns: Sequence[str] = PAPER_COLUMNS) -> Iterator[Tuple]:
+        """按键集分页逐页读取原始行
+        
+        每页使用 (排序列, id) 作为游标续读，不使用 OFFSET，也不在页之间持有读事务。
+        排序列为 NULL 的行排在最后，按 id 单独分页。
+        """
+        if order not in PAPER_ORDERS:
+            raise ValueError(f"不支持的排序方式: {order}")
+        
+        order_column = PAPER_ORDERS[order]
+        base_clauses, base_params = self._build_filter_clause(filters)
+        conn = self.get_connection()
+        
+        # 在投影末尾附加游标列，yield 时去掉
+        select = f'SELECT {", ".join(columns)}, {order_column or "NULL"}, id FROM papers'
+        
+        if order_column is None:
+            phases = [('id > ?', 'id ASC')]
+        else:
+            phases = [
+                # 行值比较：索引 ({order_column}, rowid) 可直接定位到游标位置，每页只读取本页的行
+                (f'{order_column} IS NOT NULL AND ({order_column}, id) < (?, ?)',
+                 f'{order_column} DESC, id DESC'),
+                (f'{order_column} IS NULL AND id < ?', 'id DESC'),
+            ]
+        
+        for phase, (cursor_clause, order_by) in enumerate(phases):
+            last_key = None
+            last_id = None
             
-            # 按评分统计
-            cursor.execute('SELECT COUNT(*) FROM papers WHERE score >= 70')
-            high_score_papers = cursor.fetchone()[0]
+            while True:
+                clauses = list(base_clauses)
+                params = list(base_params)
+                
+                if last_id is not None:
+                    clauses.append(cursor_clause)
+                    if order_column is None or phase == 1:
+                        params.append(last_id)
+                    else:
+                        params.extend([last_key, last_id])
+                elif order_column is not None:
+                    clauses.append(f'{order_column} IS NOT NULL' if phase == 0 else f'{order_column} IS NULL')
+                
+                where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+                rows = conn.execute(
+                    f'{select} {where} ORDER BY {order_by} LIMIT ?',
+                    params + [page_size]
+                ).fetchall()
+                
+                for row in rows:
+                    yield row[:-2]
+                
+                if len(rows) < page_size:
+                    break
+                last_key, last_id = rows[-1][-2], rows[-1][-1]
+    
+    def iter_papers(self, filters: Optional[Dict] = None, order: str = 'score',
+                    page_size: int = 500,
+                    columns: Optional[Sequence[str]] = None) -> Iterator[PaperRecord]:
+        """流式读取论文，内存占用与表大小无关
+        
+        Args:
+            filters: 过滤条件，例如 {'min_score': 70, 'year_from': 2020}
+            order: 'score' (评分降序)、'created_at' (创建时间降序) 或 'id' (主键升序)
+            page_size: 每页读取的行数
+            columns: 只读取指定列，None 表示全部列
+        """
+        columns = self._resolve_columns(columns)
+        index = PaperRecord.build_index(columns)
+        for row in self._iter_rows(filters, order, page_size, columns):
+            yield PaperRecord(index, row)
+    
+    def iter_paper_ids(self, page_size: int = 5000) -> Iterator[str]:
+        """流式读取所有非空 paper_id（只读取主键和 paper_id 两列）"""
+        for (paper_id,) in self._iter_rows(order='id', page_size=page_size, columns=('paper_id',)):
+            if paper_id:
+                yield paper_id
+    
+    def iter_dedup_keys(self, after_id: int = 0,
+                        page_size: int = 5000) -> Iterator[Tuple[int, str, Optional[str], Optional[str]]]:
+        """流式读取去重键 (id, paper_id, doi_norm, title_hash)
+        
+        Args:
+            after_id: 只读取主键大于该值的论文（用于增量加载）
+            page_size: 每页读取的行数
+        """
+        columns = ('id', 'paper_id') + tuple(DEDUP_KEY_COLUMNS)
+        yield from self._iter_rows({'after_id': after_id}, order='id',
+                                   page_size=page_size, columns=columns)
+    
+    def update_citation_counts(self, counts: Iterable[Tuple[str, int]]) -> int:
+        """按 paper_id 批量更新引用数，只改写数值发生变化的行
+        
+        Args:
+            counts: (paper_id, citation_count) 的可迭代对象
             
-            cursor.execute('SELECT COUNT(*) FROM papers WHERE score >= 50 AND score < 70')
-            medium_score_papers = cursor.fetchone()[0]
+        Returns:
+            int: 实际更新的论文数
+        """
+        rows = [(count, datetime.now(), paper_id, count) for paper_id, count in counts]
+        with self.transaction() as conn:
+            # rowcount 只统计语句本身改写的行，不含 change_seq 触发器的改写
+            cursor = conn.executemany(
+                'UPDATE papers SET citation_count = ?, updated_at = ? '
+                'WHERE paper_id = ? AND citation_count IS NOT ?',
+                rows
+            )
+            return cursor.rowcount
+    
+    @staticmethod
+    def _resolve_download_paper_id(conn: sqlite3.Connection, paper_id: str) -> str:
+        """把规范作品 ID (scheme:value) 换算为 papers 表的 paper_id，已是 paper_id 或无法换算时原样返回"""
+        if conn.execute('SELECT 1 FROM papers WHERE paper_id = ?', (paper_id,)).fetchone():
+            return paper_id
+        row = conn.execute(
+            "SELECT p.paper_id FROM identifiers i JOIN papers p ON p.paper_id = i.value "
+            "WHERE i.work_id = ? AND i.scheme = 's2' LIMIT 1", (paper_id,)
+        ).fetchone()
+        return row[0] if row else paper_id
+    
+    def record_download(self, paper_id: str, download_status: str, download_url: Optional[str] = None,
+                        file_path: Optional[str] = None, error_message: Optional[str] = None,
+                        file_size: Optional[int] = None, sha256: Optional[str] = None,
+                        access_type: Optional[str] = None, elapsed: Optional[float] = None) -> int:
+        """记录一次下载尝试及其结果
+        
+        Args:
+            paper_id: papers 表的 paper_id，或规范作品 ID（经 identifiers 表换算）
+            download_status: DOWNLOAD_SUCCESS / DOWNLOAD_FAILED / DOWNLOAD_MANUAL
+            elapsed: 下载耗时 (秒)
             
-            cursor.execute('SELECT COUNT(*) FROM papers WHERE score < 50')
-            low_score_papers = cursor.fetchone()[0]
+        Returns:
+            int: 记录 ID
+        """
+        if download_status not in DOWNLOAD_STATUSES:
+            raise ValueError(f"未知的下载状态: {download_status}")
+        with self.transaction() as conn:
+            cursor = conn.execute('''
+                INSERT INTO download_records (
+                    paper_id, download_status, download_url, file_path, download_time,
+                    error_message, file_size, sha256, access_type, elapsed
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (self._resolve_download_paper_id(conn, paper_id), download_status, download_url, file_path,
+                  datetime.now(), error_message, file_size, sha256, access_type, elapsed))
+            return cursor.lastrowid
+    
+    def get_download_records(self, paper_id: str) -> List[Dict]:
+        """获取一篇论文的全部下载尝试（按时间先后）"""
+        conn = self.get_connection()
+        cursor = conn.execute(
+            'SELECT * FROM download_records WHERE paper_id = ? ORDER BY id',
+            (self._resolve_download_paper_id(conn, paper_id),)
+        )
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+    
+    def get_download_status_counts(self) -> Dict[str, int]:
+        """各下载状态出现过的论文数"""
+        cursor = self.get_connection().execute(
+            'SELECT download_status, COUNT(DISTINCT paper_id) FROM download_records GROUP BY download_status'
+        )
+        return {status: count for status, count in cursor}
+    
+    def pending_downloads(self, min_score: int = 70, limit: Optional[int] = None,
+                          include_manual: bool = False, max_attempts: Optional[int] = None,
+                          columns: Optional[Sequence[str]] = None) -> List[PaperRecord]:
+        """评分不低于 min_score、尚未成功下载 PDF 的论文（按评分从高到低）
+        
+        按 score 索引取论文，按 download_records 的 paper_id 索引逐篇排除，一次查询完成。
+        
+        Args:
+            include_manual: 是否包含已标记为需要人工干预的论文
+            max_attempts: 排除下载尝试次数已达到该值的论文，None 表示不限
+            columns: 只读取指定列，None 表示全部列
+        """
+        excluded = [DOWNLOAD_SUCCESS] if include_manual else [DOWNLOAD_SUCCESS, DOWNLOAD_MANUAL]
+        conditions = [
+            'score >= ?',
+            f'''NOT EXISTS (
+                SELECT 1 FROM download_records d
+                WHERE d.paper_id = papers.paper_id AND d.download_status IN ({','.join('?' * len(excluded))})
+            )'''
+        ]
+        params: List = [min_score, *excluded]
+        if max_attempts is not None:
+            conditions.append(
+                '(SELECT COUNT(*) FROM download_records d WHERE d.paper_id = papers.paper_id) < ?'
+            )
+            params.append(max_attempts)
+        params.append(-1 if limit is None else limit)
+        
+        cursor = self.get_connection().execute(f'''
+            SELECT {', '.join(self._resolve_columns(columns))} FROM papers
+            WHERE {' AND '.join(conditions)}
+            ORDER BY score DESC
+            LIMIT ?
+        ''', params)
+        return self._records(cursor)
+    
+    def get_database_stats(self, venue_limit: int = 10) -> Dict:
+        """获取数据库统计信息
+        
+        启用 materialized_stats 时直接读取 paper_stats 汇总表，
+        否则对 papers 做一次分组扫描得到全部直方图。
+        
+        Args:
+            venue_limit: 返回的期刊排行数量
+        """
+        try:
+            cursor = self.get_connection().cursor()
             
-            # 按年份统计
-            cursor.execute('SELECT year, COUNT(*) FROM papers GROUP BY year ORDER BY year DESC')
-            year_stats = cursor.fetchall()
+            if self.materialized_stats:
+                cursor.execute('SELECT dimension, bucket, count FROM paper_stats')
+                groups = cursor.fetchall()
+            else:
+                groups = self._scan_stats_groups(cursor)
             
-            # 按期刊统计
-            cursor.execute('SELECT venue, COUNT(*) FROM papers GROUP BY venue ORDER BY COUNT(*) DESC LIMIT 10')
-            venue_stats = cursor.fetchall()
+            stats = self._reduce_stats_groups(groups, venue_limit)
             
             # 搜索会话统计
             cursor.execute('SELECT COUNT(*) FROM search_sessions')
-            total_searches = cursor.fetchone()[0]
+            stats['total_searches'] = cursor.fetchone()[0]
             
-            conn.close()
-            
-            return {
-                'total_papers': total_papers,
-                'high_score_papers': high_score_papers,
-                'medium_score_papers': medium_score_papers,
-                'low_score_papers': low_score_papers,
-                'year_stats': year_stats,
-                'venue_stats': venue_stats,
-                'total_searches': total_searches
-            }
+            return stats
             
         except Exception as e:
             logger.error(f"获取统计信息失败: {e}")
             return {}
     
-    def search_papers(self, keyword: str, min_score: int = 0) -> List[Dict]:
-        """搜索论文"""
+    @staticmethod
+    def _scan_stats_groups(cursor: sqlite3.Cursor) -> List[Tuple]:
+        """单次扫描 papers，返回与 paper_stats 相同格式的 (dimension, bucket, count) 行"""
+        cursor.execute('''
+            SELECT year, venue, COUNT(*),
+                   SUM(CASE WHEN score >= 70 THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN score >= 50 AND score < 70 THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN score < 50 THEN 1 ELSE 0 END)
+            FROM papers
+            GROUP BY year, venue
+        ''')
+        
+        totals: Dict[Tuple[str, str], int] = {}
+        for year, venue, count, high, medium, low in cursor.fetchall():
+            for key, value in (
+                (('total', ''), count),
+                (('year', '' if year is None else str(year)), count),
+                (('venue', venue or ''), count),
+                (('score_band', 'high'), high),
+                (('score_band', 'medium'), medium),
+                (('score_band', 'low'), low),
+            ):
+                totals[key] = totals.get(key, 0) + value
+        
+        return [
+            (dimension, bucket, count) for (dimension, bucket), count in totals.items()
+            if count or dimension == 'total'
+        ]
+    
+    @staticmethod
+    def _reduce_stats_groups(groups: List[Tuple], venue_limit: int) -> Dict:
+        """将 (dimension, bucket, count) 行整理为 get_database_stats 的返回格式"""
+        bands = {'high': 0, 'medium': 0, 'low': 0}
+        total_papers = 0
+        year_stats = []
+        venue_stats = []
+        
+        for dimension, bucket, count in groups:
+            if dimension == 'total':
+                total_papers = count
+            elif dimension == 'score_band':
+                bands[bucket] = count
+            elif dimension == 'year':
+                year = int(bucket) if bucket.lstrip('-').isdigit() else (bucket or None)
+                year_stats.append((year, count))
+            elif dimension == 'venue':
+                venue_stats.append((bucket, count))
+        
+        # 与 SQLite 排序一致：文本 > 整数 > NULL
+        year_stats.sort(
+            key=lambda item: (isinstance(item[0], str), item[0] is not None, item[0] or 0),
+            reverse=True
+        )
+        venue_stats.sort(key=lambda item: item[1], reverse=True)
+        
+        return {
+            'total_papers': total_papers,
+            'high_score_papers': bands['high'],
+            'medium_score_papers': bands['medium'],
+            'low_score_papers': bands['low'],
+            'year_stats': year_stats,
+            'venue_stats': venue_stats[:venue_limit]
+        }
+    
+    @staticmethod
+    def build_fts_query(keyword: str) -> str:
+        """将普通关键词转换为安全的 FTS5 查询
+        
+        每个词作为带引号的短语（避免冒号、括号等被解析为查询语法），
+        最后一个词追加前缀匹配，以兼容被截断的标题。
+        """
+        tokens = [t for t in re.split(r'\W+', keyword) if t]
+        if not tokens:
+            return ''
+        terms = ['"' + t.replace('"', '""') + '"' for t in tokens]
+        terms[-1] += '*'
+        return ' '.join(terms)
+    
+    def search_papers(self, keyword: str, min_score: int = 0,
+                      limit: Optional[int] = None,
+                      raw_query: bool = False,
+                      highlight: bool = False,
+                      columns: Optional[Sequence[str]] = None) -> List[PaperRecord]:
+        """搜索论文（按 BM25 相关度排序）
+        
+        Args:
+            keyword: 搜索关键词
+            min_score: 最低评分
+            limit: 最大返回数量，None 表示不限制
+            raw_query: 为 True 时 keyword 按 FTS5 语法解析，
+                支持短语 ("flux method")、前缀 (cryst*) 和布尔运算 (AND/OR/NOT)
+            highlight: 为 True 时附加 'title_highlight' 和 'snippet' 字段，匹配词以 [] 标记
+            columns: 只读取指定列，None 表示全部列
+        """
+        if not self.fts_enabled:
+            return self._search_papers_like(keyword, min_score, limit, columns)
+        
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            match = keyword if raw_query else self.build_fts_query(keyword)
+            if not match:
+                return []
             
-            cursor.execute('''
-                SELECT * FROM papers 
+            select = ', '.join(f'p.{c}' for c in self._resolve_columns(columns))
+            if highlight:
+                select += ''',
+                    highlight(papers_fts, 0, '[', ']') AS title_highlight,
+                    snippet(papers_fts, 1, '[', ']', '...', 24) AS snippet'''
+            
+            cursor = self.get_connection().cursor()
+            cursor.execute(f'''
+                SELECT {select}
+                FROM papers_fts
+                JOIN papers p ON p.id = papers_fts.rowid
+                WHERE papers_fts MATCH ?
+                AND p.score >= ?
+                ORDER BY bm25(papers_fts, 5.0, 1.0, 1.0)
+                LIMIT ?
+            ''', (match, min_score, -1 if limit is None else limit))
+            
+            return self._records(cursor)
+            
+        except Exception as e:
+            logger.error(f"搜索论文失败: {e}")
+            return []
+    
+    def _search_papers_like(self, keyword: str, min_score: int = 0,
+                            limit: Optional[int] = None,
+                            columns: Optional[Sequence[str]] = None) -> List[PaperRecord]:
+        """LIKE 全表扫描搜索（FTS5 不可用时的回退）"""
+        try:
+            cursor = self.get_connection().cursor()
+            
+            cursor.execute(f'''
+                SELECT {', '.join(self._resolve_columns(columns))} FROM papers 
                 WHERE (title LIKE ? OR abstract LIKE ? OR venue LIKE ?) 
                 AND score >= ?
                 ORDER BY score DESC
-            ''', (f'%{keyword}%', f'%{keyword}%', f'%{keyword}%', min_score))
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # 转换为字典格式
-            papers = []
-            for row in rows:
-                paper = {
-                    'id': row[0],
-                    'paper_id': row[1],
-                    'title': row[2],
-                    'authors': json.loads(row[3]) if row[3] else [],
-                    'year': row[4],
-                    'venue': row[5],
-                    'abstract': row[6],
-                    'doi': row[7],
-                    'citation_count': row[8],
-                    'is_open_access': bool(row[9]),
-                    'score': row[10],
-                    'matched_keywords': json.loads(row[11]) if row[11] else {},
-                    'recommendation': row[12],
-                    'description': row[13],
-                    'search_query': row[14],
-                    'created_at': row[15],
-                    'updated_at': row[16]
-                }
-                papers.append(paper)
-            
-            return papers
+                LIMIT ?
+            ''', (f'%{keyword}%', f'%{keyword}%', f'%{keyword}%', min_score,
+                  -1 if limit is None else limit))
+            
+            return self._records(cursor)
             
         except Exception as e:
             logger.error(f"搜索论文失败: {e}")
             return []
     
     def export_to_csv(self, filename: str = "literature_database.csv"):
-        """导出到CSV文件"""
+        """导出到CSV文件（流式分块写出，更多格式见 literature_exporter）"""
         try:
-            import csv
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            from literature_exporter import LiteratureExporter
             
-            cursor.execute('SELECT * FROM papers ORDER BY score DESC')
-            rows = cursor.fetchall()
-            
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # 写入标题行
-                writer.writerow([
-                    'ID', 'Paper ID', 'Title', 'Authors', 'Year', 'Venue', 'Abstract',
-                    'DOI', 'Citation Count', 'Is Open Access', 'Score', 'Matched Keywords',
-                    'Recommendation', 'Description', 'Search Query', 'Created At', 'Updated At'
-                ])
-                
-                # 写入数据行
-                for row in rows:
-                    writer.writerow(row)
-            
-            conn.close()
-            logger.info(f"数据已导出到: {filename}")
-            return True
+            result = LiteratureExporter(self).export(filename, export_format='csv')
+            return result['success']
             
         except Exception as e:
             logger.error(f"导出CSV失败: {e}")
@@ -458,6 +1346,8 @@ def main():
             print(f"{i}. {paper['title'][:60]}... (评分: {paper['score']}分)")
     else:
         print("\n暂无高分论文")
+    
+    db.close()
 
 if __name__ == "__main__":
     main()
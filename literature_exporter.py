@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+文献数据库流式导出
+按固定大小的分块写出 CSV / JSON Lines / Parquet，内存占用与论文总数无关
+"""
+
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, IO, List, Optional, Sequence
+
+from literature_database import LiteratureDatabase, PAPER_COLUMNS
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# CSV 标题行（与历史导出文件保持一致）
+CSV_HEADERS = {
+    'id': 'ID',
+    'paper_id': 'Paper ID',
+    'title': 'Title',
+    'authors': 'Authors',
+    'year': 'Year',
+    'venue': 'Venue',
+    'abstract': 'Abstract',
+    'doi': 'DOI',
+    'citation_count': 'Citation Count',
+    'is_open_access': 'Is Open Access',
+    'score': 'Score',
+    'matched_keywords': 'Matched Keywords',
+    'recommendation': 'Recommendation',
+    'description': 'Description',
+    'search_query': 'Search Query',
+    'created_at': 'Created At',
+    'updated_at': 'Updated At',
+}
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+COMPRESSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+
+
+def infer_format(filename: str) -> Dict[str, Optional[str]]:
+    """根据文件扩展名推断导出格式和压缩方式，例如 papers.jsonl.zst"""
+    root, ext = os.path.splitext(filename.lower())
+    compression = COMPRESSIONS.get(ext)
+    if compression:
+        root, ext = os.path.splitext(root)
+
+    export_format = ext.lstrip('.')
+    if export_format == 'json':
+        export_format = 'jsonl'
+
+    return {
+        'format': export_format if export_format in EXPORT_FORMATS else 'csv',
+        'compression': compression
+    }
+
+
+class LiteratureExporter:
+    """流式导出器"""
+
+    def __init__(self, database: LiteratureDatabase, chunk_size: int = 1000):
+        self.database = database
+        self.chunk_size = chunk_size
+        self._ensure_watermark_table()
+
+    def _ensure_watermark_table(self):
+        """创建增量导出水位表（watermark 为旧版的 updated_at 水位，change_seq 为变更序号水位）"""
+        with self.database.transaction() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS export_watermarks (
+                    export_name TEXT PRIMARY KEY,
+                    watermark TEXT,
+                    row_count INTEGER,
+                    exported_at TIMESTAMP,
+                    change_seq INTEGER
+                )
+            ''')
+            existing = {row[1] for row in conn.execute('PRAGMA table_info(export_watermarks)')}
+            if 'change_seq' not in existing:
+                conn.execute('ALTER TABLE export_watermarks ADD COLUMN change_seq INTEGER')
+
+    def get_watermark(self, export_name: str) -> Optional[int]:
+        """获取上一次增量导出的水位 (papers.change_seq)"""
+        row = self.database.get_connection().execute(
+            'SELECT change_seq FROM export_watermarks WHERE export_name = ?', (export_name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _get_legacy_watermark(self, export_name: str) -> Optional[str]:
+        """旧版按 updated_at 记录的水位（升级后第一次增量导出使用）"""
+        row = self.database.get_connection().execute(
+            'SELECT watermark FROM export_watermarks WHERE export_name = ? AND change_seq IS NULL',
+            (export_name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _save_watermark(self, export_name: str, change_seq: int, row_count: int):
+        with self.database.transaction() as conn:
+            conn.execute('''
+                INSERT INTO export_watermarks (export_name, change_seq, row_count, exported_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(export_name) DO UPDATE SET
+                    change_seq = excluded.change_seq,
+                    row_count = excluded.row_count,
+                    exported_at = excluded.exported_at
+            ''', (export_name, change_seq, row_count, datetime.now()))
+
+    @staticmethod
+    def delta_filename(filename: str, change_seq: int) -> str:
+        """增量导出的文件名：在扩展名前加上本次的水位，例如 nightly.jsonl.gz -> nightly.1234.jsonl.gz"""
+        root, ext = os.path.splitext(filename)
+        if ext.lower() in COMPRESSIONS:
+            root, format_ext = os.path.splitext(root)
+            ext = format_ext + ext
+        return f"{root}.{change_seq}{ext}"
+
+    def export(self, filename: str,
+               export_format: Optional[str] = None,
+               columns: Optional[Sequence[str]] = None,
+               filters: Optional[Dict] = None,
+               compression: Optional[str] = None,
+               incremental: bool = False,
+               export_name: Optional[str] = None) -> Dict:
+        """
+        流式导出论文
+
+        Args:
+            filename: 输出文件路径；增量导出时每次写入 delta_filename(filename, 水位) 的新文件，
+                不覆盖以前的增量文件
+            export_format: 'csv' / 'jsonl' / 'parquet'，None 时按扩展名推断
+            columns: 导出的列，None 表示全部列
+            filters: 过滤条件，同 LiteratureDatabase.iter_papers
+                （例如 {'min_score': 70, 'year_from': 2022, 'search_query': 'flux method'}）
+            compression: 'gzip' / 'zstd' / None，None 时按扩展名推断
+            incremental: 只导出上次水位之后插入或更新过的论文，并在完成后推进水位
+            export_name: 增量导出的水位名称，默认使用文件名
+
+        Returns:
+            Dict: {'success', 'rows', 'filename', 'watermark'}；增量导出没有新的变更时不写文件，filename 为 None
+        """
+        inferred = infer_format(filename)
+        export_format = export_format or inferred['format']
+        compression = compression or inferred['compression']
+        columns = tuple(columns or PAPER_COLUMNS)
+
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {export_format}")
+        if compression not in (None, 'gzip', 'zstd'):
+            raise ValueError(f"不支持的压缩方式: {compression}")
+
+        filters = dict(filters or {})
+        export_name = export_name or os.path.basename(filename)
+        order = 'score'
+        watermark = None
+        if incremental:
+            # 本次导出的范围 (上次水位, 当前最大变更序号]：范围内的变更在此刻都已提交；
+            # 导出过程中再次更新的论文序号超出范围，由下一次导出写出
+            previous = self.get_watermark(export_name)
+            watermark = self.database.get_change_seq()
+            if previous is not None and watermark <= previous:
+                logger.info(f"增量导出 {export_name}: 没有新的变更")
+                return {'success': True, 'rows': 0, 'filename': None, 'watermark': previous}
+            if previous is None:
+                filters['updated_since'] = self._get_legacy_watermark(export_name)
+            filters['changed_since'] = previous
+            filters['changed_until'] = watermark
+            filename = self.delta_filename(filename, watermark)
+            order = 'id'
+
+        records = self.database.iter_papers(
+            filters, order=order, page_size=self.chunk_size, columns=columns
+        )
+
+        # 先写临时文件，完成后再替换，避免中断时留下不完整的导出
+        tmp_path = f"{filename}.tmp"
+        row_count = 0
+
+        try:
+            writer = self._open_writer(tmp_path, export_format, columns, compression)
+            try:
+                chunk: List = []
+                for record in records:
+                    chunk.append(record)
+                    if len(chunk) >= self.chunk_size:
+                        writer.write_chunk(chunk)
+                        row_count += len(chunk)
+                        chunk = []
+                if chunk:
+                    writer.write_chunk(chunk)
+                    row_count += len(chunk)
+            finally:
+                writer.close()
+
+            os.replace(tmp_path, filename)
+
+        except Exception as e:
+            logger.error(f"导出失败: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return {'success': False, 'rows': row_count, 'filename': filename, 'watermark': None}
+
+        if incremental:
+            self._save_watermark(export_name, watermark, row_count)
+
+        logger.info(f"已导出 {row_count} 篇论文到: {filename}")
+        return {'success': True, 'rows': row_count, 'filename': filename, 'watermark': watermark}
+
+    def _open_writer(self, path: str, export_format: str, columns: Sequence[str],
+                     compression: Optional[str]):
+        if export_format == 'parquet':
+            return _ParquetChunkWriter(path, columns, compression)
+
+        stream = _open_text_stream(path, compression)
+        if export_format == 'jsonl':
+            return _JsonLinesChunkWriter(stream, columns)
+        return _CsvChunkWriter(stream, columns)
+
+
+def _open_text_stream(path: str, compression: Optional[str]) -> IO[str]:
+    """打开（可选压缩的）文本输出流"""
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd 压缩需要安装 zstandard: pip install zstandard")
+        raw = open(path, 'wb')
+        compressed = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(compressed, encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+class _CsvChunkWriter:
+    """CSV 分块写出（JSON 列保持原始 JSON 文本）"""
+
+    def __init__(self, stream: IO[str], columns: Sequence[str]):
+        self.stream = stream
+        self.width = len(columns)
+        self.writer = csv.writer(stream)
+        self.writer.writerow([CSV_HEADERS[c] for c in columns])
+
+    def write_chunk(self, records: List):
+        self.writer.writerows(record.row[:self.width] for record in records)
+
+    def close(self):
+        self.stream.close()
+
+
+class _JsonLinesChunkWriter:
+    """JSON Lines 分块写出（JSON 列解码为对象）"""
+
+    def __init__(self, stream: IO[str], columns: Sequence[str]):
+        self.stream = stream
+        self.columns = columns
+
+    def write_chunk(self, records: List):
+        self.stream.write(''.join(
+            json.dumps({c: record[c] for c in self.columns}, ensure_ascii=False, default=str) + '\n'
+            for record in records
+        ))
+
+    def close(self):
+        self.stream.close()
+
+
+class _ParquetChunkWriter:
+    """Parquet 分块写出，每个分块写为一个 row group"""
+
+    # 与 papers 表列类型对应的 Arrow 类型名
+    ARROW_TYPES = {
+        'id': 'int64',
+        'year': 'int64',
+        'citation_count': 'int64',
+        'score': 'int64',
+        'is_open_access': 'bool_',
+    }
+
+    def __init__(self, path: str, columns: Sequence[str], compression: Optional[str]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet 导出需要安装 pyarrow: pip install pyarrow")
+
+        self.pa = pa
+        self.columns = columns
+        self.schema = pa.schema([
+            (c, getattr(pa, self.ARROW_TYPES.get(c, 'string'))()) for c in columns
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema, compression=compression or 'snappy')
+
+    def write_chunk(self, records: List):
+        arrays = []
+        for i, column in enumerate(self.columns):
+            values = [record.row[i] for record in records]
+            arrow_type = self.ARROW_TYPES.get(column, 'string')
+            if arrow_type == 'string':
+                values = [None if v is None else str(v) for v in values]
+            elif arrow_type == 'bool_':
+                values = [None if v is None else bool(v) for v in values]
+            else:
+                # 历史数据中可能存在 'Unknown' 等非数值
+                values = [v if isinstance(v, int) else None for v in values]
+            arrays.append(self.pa.array(values, type=self.schema.field(column).type))
+
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def main():
+    """命令行导出"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='文献数据库流式导出')
+    parser.add_argument('output', help='输出文件 (.csv / .jsonl / .parquet，可加 .gz / .zst)')
+    parser.add_argument('--db', default='literature_database.db', help='数据库文件路径')
+    parser.add_argument('--columns', help='导出的列，逗号分隔')
+    parser.add_argument('--min-score', type=int, help='最低评分')
+    parser.add_argument('--year-from', type=int, help='起始年份')
+    parser.add_argument('--year-to', type=int, help='结束年份')
+    parser.add_argument('--query', help='只导出指定搜索查询的论文')
+    parser.add_argument('--incremental', action='store_true',
+                        help='只导出上次导出之后更新的论文（写入文件名带水位的新文件）')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='分块大小')
+    args = parser.parse_args()
+
+    filters = {
+        'min_score': args.min_score,
+        'year_from': args.year_from,
+        'year_to': args.year_to,
+        'search_query': args.query,
+    }
+
+    with LiteratureDatabase(args.db) as db:
+        exporter = LiteratureExporter(db, chunk_size=args.chunk_size)
+        result = exporter.export(
+            args.output,
+            columns=args.columns.split(',') if args.columns else None,
+            filters=filters,
+            incremental=args.incremental
+        )
+
+    if result['filename'] is None:
+        print("没有新的变更，未写出文件")
+    else:
+        print(f"导出{'成功' if result['success'] else '失败'}: {result['rows']} 篇论文 -> {result['filename']}")
+
+if __name__ == "__main__":
+    main()
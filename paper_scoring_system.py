@@ -4,11 +4,13 @@
 基于摘要内容判断是否为实验论文，并给出下载评分
 """
 
-import requests
-import time
 import logging
 import re
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from keyword_matcher import KeywordMatcher, KeywordMatch
+from semantic_scholar_client import SemanticScholarClient, get_default_client
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -17,13 +19,12 @@ logger = logging.getLogger(__name__)
 class PaperScoringSystem:
     """论文评分系统"""
     
-    def __init__(self):
-        self.base_url = "https://api.semanticscholar.org/graph/v1/paper/search"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/json',
-        })
+    def __init__(self, client: Optional[SemanticScholarClient] = None):
+        """
+        Args:
+            client: Semantic Scholar 客户端，默认使用进程内共享的客户端（共享限速配额）
+        """
+        self.client = client or get_default_client()
         
         # 定义评分关键词和分数
         self.scoring_keywords = {
@@ -73,31 +74,26 @@ class PaperScoringSystem:
                 'crystal shape': 2,
             }
         }
+        
+        self.compile_keywords()
+    
+    @classmethod
+    def for_scoring(cls, scoring_keywords: Dict) -> 'PaperScoringSystem':
+        """只用于本地评分的实例：按给定关键词表编译匹配器，不创建 API 客户端和响应缓存"""
+        scorer = cls.__new__(cls)
+        scorer.client = None
+        scorer.scoring_keywords = scoring_keywords
+        scorer.compile_keywords()
+        return scorer
+    
+    def compile_keywords(self):
+        """将 scoring_keywords 编译为匹配器（修改关键词表后需重新调用）"""
+        self.matcher = KeywordMatcher(self.scoring_keywords)
     
     def search_papers(self, query: str, limit: int = 20) -> List[Dict]:
-        """搜索论文"""
+        """搜索论文（限速与 429 重试由客户端处理）"""
         try:
-            params = {
-                'query': query,
-                'limit': limit,
-                'year': '2020-2024',
-                'fields': 'title,authors,year,abstract,openAccessPdf,externalIds,venue,citationCount,isOpenAccess'
-            }
-            
-            response = self.session.get(self.base_url, params=params, timeout=30)
-            
-            if response.status_code == 429:
-                logger.warning("API速率限制，等待20秒...")
-                time.sleep(20)
-                response = self.session.get(self.base_url, params=params, timeout=30)
-            
-            if response.status_code != 200:
-                logger.error(f"API请求失败，状态码: {response.status_code}")
-                return []
-            
-            data = response.json()
-            papers = data.get('data', [])
-            
+            papers = self.client.run(self.client.search, query, limit, year='2020-2024')
             logger.info(f"找到 {len(papers)} 篇论文")
             return papers
             
@@ -105,30 +101,29 @@ class PaperScoringSystem:
             logger.error(f"搜索失败: {e}")
             return []
     
+    def search_papers_many(self, queries: List[str], limit: int = 20) -> Dict[str, List[Dict]]:
+        """并发搜索多个查询，返回 {查询: 论文列表}（失败的查询为空列表）"""
+        return self.client.run(self.client.search_many, queries, limit, year='2020-2024')
+    
     def calculate_score(self, paper: Dict) -> Tuple[int, Dict]:
         """计算论文评分"""
         title = paper.get('title', '') or ''
         abstract = paper.get('abstract', '') or ''
         
-        title = title.lower()
-        abstract = abstract.lower()
-        
         # 合并标题和摘要进行搜索
         text = f"{title} {abstract}"
         
-        score = 0
-        matched_keywords = {}
-        
-        # 遍历所有关键词类别
-        for category, keywords in self.scoring_keywords.items():
-            for keyword, points in keywords.items():
-                if keyword.lower() in text:
-                    score += points
-                    matched_keywords[keyword] = points
-                    logger.debug(f"匹配关键词: {keyword} (+{points}分)")
+        # 单次扫描匹配全部关键词类别（匹配器内部转小写）
+        score, matched_keywords = self.matcher.score(text)
         
         return score, matched_keywords
     
+    def find_keyword_matches(self, paper: Dict) -> List[KeywordMatch]:
+        """返回论文标题+摘要中全部关键词命中及其偏移量"""
+        title = paper.get('title', '') or ''
+        abstract = paper.get('abstract', '') or ''
+        return self.matcher.find_all(f"{title} {abstract}")
+    
     def get_download_recommendation(self, score: int) -> Tuple[str, str]:
         """获取下载建议"""
         if score >= 70:
@@ -175,18 +170,38 @@ class PaperScoringSystem:
             'description': description
         }
     
-    def batch_analyze_papers(self, papers: List[Dict]) -> List[Dict]:
-        """批量分析论文"""
-        results = []
+    def batch_analyze_papers(self, papers: List[Dict], workers: int = 1,
+                             chunk_size: int = 500) -> List[Dict]:
+        """批量分析论文
         
-        for i, paper in enumerate(papers, 1):
-            logger.info(f"分析论文 {i}/{len(papers)}: {paper.get('title', 'Unknown')[:50]}...")
-            
-            analysis = self.analyze_paper(paper)
-            results.append(analysis)
+        分析是纯本地计算，不需要任何延迟。
+        
+        Args:
+            papers: 论文列表
+            workers: 进程数，1 表示在当前进程中串行分析
+            chunk_size: 多进程模式下每个任务包含的论文数
             
-            # 避免请求过快
-            time.sleep(0.7)
+        Returns:
+            List[Dict]: 与输入顺序一致的分析结果，与串行结果完全相同
+        """
+        if workers <= 1 or len(papers) <= chunk_size:
+            results = []
+            for i, paper in enumerate(papers, 1):
+                logger.debug(f"分析论文 {i}/{len(papers)}: {paper.get('title', 'Unknown')[:50]}...")
+                results.append(self.analyze_paper(paper))
+            return results
+        
+        chunks = [papers[i:i + chunk_size] for i in range(0, len(papers), chunk_size)]
+        logger.info(f"使用 {workers} 个进程分析 {len(papers)} 篇论文 ({len(chunks)} 个分块)")
+        
+        results = []
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_scoring_worker,
+            initargs=(self.scoring_keywords,)
+        ) as executor:
+            for chunk_results in executor.map(_analyze_chunk, chunks):
+                results.extend(chunk_results)
         
         return results
     
@@ -243,6 +258,18 @@ class PaperScoringSystem:
                 
                 print("-" * 60)
 
+# 多进程批量分析时每个工作进程持有的评分器
+_worker_scorer: Optional[PaperScoringSystem] = None
+
+def _init_scoring_worker(scoring_keywords: Dict):
+    """工作进程初始化：按父进程的关键词表编译匹配器（工作进程不检索，不创建客户端）"""
+    global _worker_scorer
+    _worker_scorer = PaperScoringSystem.for_scoring(scoring_keywords)
+
+def _analyze_chunk(papers: List[Dict]) -> List[Dict]:
+    """在工作进程中分析一个分块"""
+    return [_worker_scorer.analyze_paper(paper) for paper in papers]
+
 def main():
     """主函数"""
     print("论文PDF下载必要性评分系统")
@@ -267,8 +294,6 @@ def main():
         
         # 显示结果
         scorer.display_results(results, show_details=True)
-        
-        time.sleep(2)  # 避免API速率限制
     
     # 显示总体统计
     print(f"\n总体统计")
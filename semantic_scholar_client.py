@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Semantic Scholar 异步客户端
+所有检索入口共享一个客户端：令牌桶限速、按 Retry-After 的指数退避重试、
+多个查询并发检索并复用同一个连接池，吞吐量只受 API 配额限制
+"""
+
+import asyncio
+import copy
+import functools
+import logging
+import os
+import random
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, TypeVar
+
+import httpx
+
+from app.utils.identifiers import extract_identifiers
+from app.utils.rate_limit import (
+    SEMANTIC_SCHOLAR_LIMITER, SEMANTIC_SCHOLAR_RATE, TokenBucket, get_shared_limiter, parse_retry_after
+)
+from app.utils.response_cache import AsyncCachingTransport, ResponseCache, get_default_cache
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+S2_API_URL = "https://api.semanticscholar.org/graph/v1"
+
+# 检索时默认请求的字段
+DEFAULT_FIELDS = 'title,authors,year,abstract,openAccessPdf,externalIds,venue,citationCount,isOpenAccess'
+
+# /paper/batch 单次请求最多的 ID 数
+BATCH_MAX_IDS = 500
+
+# 可重试的状态码：限速和服务端临时错误
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class SemanticScholarError(Exception):
+    """Semantic Scholar 请求失败（重试耗尽或不可重试的错误）"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def batch_paper_id(record: Mapping) -> Optional[str]:
+    """记录在 /paper/batch 中使用的 ID：优先 S2 paperId，其次 DOI:、ARXIV:、PMID: 前缀形式
+
+    非 40 位十六进制的 paper_id（例如其他来源的内部 ID）不能直接用于批量接口，会被跳过。
+    """
+    identifiers = extract_identifiers(record)
+    s2_id = identifiers.get('s2')
+    if s2_id and len(s2_id) == 40:
+        return s2_id
+    for scheme, prefix in (('doi', 'DOI'), ('arxiv', 'ARXIV'), ('pmid', 'PMID')):
+        if scheme in identifiers:
+            return f"{prefix}:{identifiers[scheme]}"
+    return None
+
+
+class SemanticScholarClient:
+    """Semantic Scholar Graph API 异步客户端
+
+    在异步代码中作为异步上下文管理器使用；同步代码通过 run() 调用，
+    每次调用使用独立的连接池，但与其他调用共享同一个限速器。
+    """
+
+    def __init__(self, api_key: Optional[str] = None,
+                 rate: Optional[float] = None,
+                 burst: Optional[float] = None,
+                 max_concurrency: int = 8,
+                 max_retries: int = 5,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 60.0,
+                 timeout: float = 30.0,
+                 base_url: str = S2_API_URL,
+                 limiter: Optional[TokenBucket] = None,
+                 cache: Optional[ResponseCache] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args:
+            api_key: API 密钥，默认读取环境变量 SEMANTIC_SCHOLAR_API_KEY
+            rate: 每秒请求数配额；与 burst 都未指定时使用进程内共享的限速器
+                (SEMANTIC_SCHOLAR_LIMITER，速率 SEMANTIC_SCHOLAR_RATE)，指定时使用独立的限速器
+            burst: 允许的突发请求数，默认 1
+            max_concurrency: 同时在途的请求数（也是连接池大小）
+            max_retries: 429/5xx/网络错误的最大重试次数
+            backoff_base: 指数退避的初始等待时间 (秒)
+            backoff_max: 单次退避的最长等待时间 (秒)
+            timeout: 单个请求的超时时间 (秒)
+            base_url: API 根地址
+            limiter: 自定义限速器，优先于 rate/burst
+            cache: 响应缓存，命中时不发送请求也不消耗限速配额
+            transport: 自定义 httpx 传输层（测试时注入 MockTransport）
+        """
+        self.api_key = api_key or os.environ.get('SEMANTIC_SCHOLAR_API_KEY')
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.base_url = base_url
+        if limiter is None:
+            if rate is None and burst is None:
+                limiter = get_shared_limiter(SEMANTIC_SCHOLAR_LIMITER, SEMANTIC_SCHOLAR_RATE)
+            else:
+                limiter = TokenBucket(rate or SEMANTIC_SCHOLAR_RATE, burst or 1.0)
+        self.limiter = limiter
+        self.cache = cache
+        self.transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def open(self):
+        """打开连接池（首次请求时自动调用）"""
+        if self._client is not None:
+            return
+        headers = {'Accept': 'application/json'}
+        if self.api_key:
+            headers['x-api-key'] = self.api_key
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        transport = self.transport
+        if self.cache is not None:
+            # 自定义传输层时 AsyncClient 的 limits 不生效，需设置在内层传输层上
+            transport = AsyncCachingTransport(self.cache, transport or httpx.AsyncHTTPTransport(limits=limits))
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=self.timeout,
+            transport=transport,
+            limits=limits
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def aclose(self):
+        """关闭连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    def run(self, func: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """在新的事件循环中执行协程（供同步代码调用）
+
+        func 为本客户端的协程方法时直接调用；否则作为 func(client, *args, **kwargs) 调用，
+        便于在一次调用中组合多个请求（例如逐页消费 search_bulk）。
+
+        >>> client.run(client.search, 'flux growth', limit=20)
+        """
+        session = copy.copy(self)
+        session._client = None
+        session._semaphore = None
+        if getattr(func, '__self__', None) is self:
+            bound = getattr(session, func.__name__)
+        else:
+            bound = functools.partial(func, session)
+
+        async def runner():
+            async with session:
+                return await bound(*args, **kwargs)
+
+        return asyncio.run(runner())
+
+    def _backoff(self, attempt: int) -> float:
+        """第 attempt 次重试的等待时间：指数增长，带 ±50% 抖动"""
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(cap / 2, cap)
+
+    def _is_cached(self, method: str, path: str, params: Optional[Dict], json: Any) -> bool:
+        """请求能否直接由缓存返回（命中时跳过限速等待）"""
+        if self.cache is None:
+            return False
+        request = self._client.build_request(method, path, params=params, json=json)
+        return self.cache.peek(request.method, str(request.url), request.content)
+
+    async def request(self, method: str, path: str, *,
+                      params: Optional[Dict] = None, json: Any = None) -> Any:
+        """发送请求并返回解析后的 JSON
+
+        429 时按 Retry-After 暂停共享限速器，使并发请求一起退避；
+        5xx 和网络错误按指数退避重试。
+
+        Raises:
+            SemanticScholarError: 不可重试的错误或重试次数耗尽
+        """
+        await self.open()
+
+        for attempt in range(self.max_retries + 1):
+            if not self._is_cached(method, path, params, json):
+                await self.limiter.acquire()
+            async with self._semaphore:
+                try:
+                    response = await self._client.request(method, path, params=params, json=json)
+                except httpx.TransportError as e:
+                    error = SemanticScholarError(f"请求失败: {e}")
+                    delay = self._backoff(attempt)
+                else:
+                    if response.status_code < 400:
+                        return response.json()
+                    if response.status_code not in RETRY_STATUS:
+                        raise SemanticScholarError(
+                            f"API请求失败，状态码: {response.status_code}", response.status_code
+                        )
+                    error = SemanticScholarError(
+                        f"API请求失败，状态码: {response.status_code}", response.status_code
+                    )
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    delay = retry_after if retry_after is not None else self._backoff(attempt)
+
+            if attempt == self.max_retries:
+                raise error
+
+            logger.warning(f"{error}，{delay:.1f} 秒后重试 ({attempt + 1}/{self.max_retries})")
+            if error.status_code == 429:
+                # 由限速器统一等待，下一次 acquire 会阻塞到暂停结束
+                self.limiter.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+
+    async def search(self, query: str, limit: int = 20, fields: str = DEFAULT_FIELDS,
+                     **filters) -> List[Dict]:
+        """关键词检索（/paper/search 单页）
+
+        Args:
+            query: 检索词
+            limit: 返回数量
+            fields: 返回字段
+            **filters: 其他查询参数，例如 year='2020-2024'
+        """
+        params = {'query': query, 'limit': limit, 'fields': fields, **filters}
+        data = await self.request('GET', '/paper/search', params=params)
+        return data.get('data') or []
+
+    async def search_many(self, queries: Iterable[str], limit: int = 20,
+                          **kwargs) -> Dict[str, List[Dict]]:
+        """并发检索多个查询，失败的查询返回空列表
+
+        Returns:
+            Dict: {查询: 论文列表}，按输入顺序排列
+        """
+        queries = list(dict.fromkeys(queries))
+        results = await asyncio.gather(
+            *(self.search(query, limit, **kwargs) for query in queries),
+            return_exceptions=True
+        )
+
+        papers_by_query = {}
+        for query, result in zip(queries, results):
+            if isinstance(result, Exception):
+                logger.error(f"检索失败 ({query}): {result}")
+                result = []
+            elif isinstance(result, BaseException):
+                raise result
+            papers_by_query[query] = result
+        return papers_by_query
+
+    async def search_bulk(self, query: str, fields: str = DEFAULT_FIELDS,
+                          max_results: Optional[int] = None,
+                          **filters) -> AsyncIterator[List[Dict]]:
+        """批量检索（/paper/search/bulk），按 continuation token 逐页产出结果
+
+        每页最多 1000 篇，结果总数不受 /paper/search 的分页上限限制。
+
+        Args:
+            query: 检索词（支持 bulk 接口的布尔语法）
+            fields: 返回字段
+            max_results: 最多返回的论文数，None 表示取完全部结果
+            **filters: 其他查询参数，例如 year='2020-2024'、sort='citationCount:desc'
+        """
+        params = {'query': query, 'fields': fields, **filters}
+        returned = 0
+
+        while True:
+            data = await self.request('GET', '/paper/search/bulk', params=params)
+            page = data.get('data') or []
+            if max_results is not None:
+                page = page[:max_results - returned]
+            if page:
+                returned += len(page)
+                yield page
+
+            token = data.get('token')
+            if not token or (max_results is not None and returned >= max_results):
+                return
+            params = dict(params, token=token)
+
+    async def get_papers_batch(self, ids: Iterable[str], fields: str = DEFAULT_FIELDS) -> List[Optional[Dict]]:
+        """按 ID 批量获取论文详情（/paper/batch，每个 POST 最多 500 个 ID，分块并发请求）
+
+        Args:
+            ids: S2 paperId 或带前缀的外部 ID（DOI:…、ARXIV:…、PMID:…），见 batch_paper_id
+
+        Returns:
+            List: 与输入顺序对应的论文，未找到的 ID 为 None
+        """
+        ids = list(ids)
+        chunks = [ids[i:i + BATCH_MAX_IDS] for i in range(0, len(ids), BATCH_MAX_IDS)]
+        pages = await asyncio.gather(*(
+            self.request('POST', '/paper/batch', params={'fields': fields}, json={'ids': chunk})
+            for chunk in chunks
+        ))
+        return [paper for page in pages for paper in page]
+
+
+_default_client: Optional[SemanticScholarClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> SemanticScholarClient:
+    """进程内共享的客户端（所有检索入口共用一个限速配额）"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = SemanticScholarClient(cache=get_default_cache())
+        return _default_client
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+测试 arXiv 流式收割器（离线，使用本地 HTTP 服务模拟 arXiv API）
+"""
+
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from app.services.arxiv_harvester import ArxivFeedParser, ArxivHarvester, parse_arxiv_feed
+
+ENTRY = '''
+  <entry>
+    <id>http://arxiv.org/abs/2401.0000{i}v2</id>
+    <updated>2024-01-0{i}T12:00:00Z</updated>
+    <published>2024-01-0{i}T10:00:00Z</published>
+    <title>Flux growth of
+      compound {i}</title>
+    <summary>Single crystals {i} were grown.</summary>
+    <author><name>Author {i}</name></author>
+    <author><name>Coauthor {i}</name></author>
+    <arxiv:doi>10.1103/PhysRevB.{i}</arxiv:doi>
+    <link title="pdf" href="http://arxiv.org/pdf/2401.0000{i}v2" rel="related" type="application/pdf"/>
+    <category term="cond-mat.mtrl-sci"/>
+  </entry>'''
+
+
+def make_feed(numbers, total) -> bytes:
+    entries = ''.join(ENTRY.format(i=i) for i in numbers)
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/"
+      xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <title>arXiv Query</title>
+  <opensearch:totalResults>{total}</opensearch:totalResults>{entries}
+</feed>'''.encode('utf-8')
+
+
+class FakeArxiv:
+    """按 start/max_results 分页返回 1-5 号条目的本地服务"""
+
+    def __init__(self, empty_once_at=None):
+        self.requests = []
+        self.empty_once_at = empty_once_at
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                fake.requests.append(params)
+                start, size = int(params['start']), int(params['max_results'])
+                numbers = list(range(1, 6))[start:start + size]
+                if fake.empty_once_at == start:
+                    fake.empty_once_at = None
+                    numbers = []
+                body = make_feed(numbers, total=5)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/atom+xml')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/query"
+
+    def harvester(self, **options) -> ArxivHarvester:
+        return ArxivHarvester(delay=0, api_url=self.url, **options)
+
+    def close(self):
+        self.server.shutdown()
+
+
+def test_feed_parser_streams_records():
+    """测试按任意大小的字节块增量解析，并释放已处理的条目"""
+    feed = make_feed([1, 2, 3], total=3)
+    parser = ArxivFeedParser()
+    records = []
+    for i in range(0, len(feed), 7):
+        records.extend(parser.feed(feed[i:i + 7]))
+    records.extend(parser.close())
+
+    assert parser.total_results == 3 and parser.entries == 3
+    assert len(parser._root) == 0
+    assert records[0] == {
+        'title': 'Flux growth of compound 1', 'authors': 'Author 1, Coauthor 1', 'year': 2024,
+        'abstract': 'Single crystals 1 were grown.', 'pdf_url': 'http://arxiv.org/pdf/2401.00001v2',
+        'doi': '10.1103/physrevb.1', 'arxiv_id': '2401.00001', 'published': '2024-01-01T10:00:00Z',
+        'updated': '2024-01-01T12:00:00Z', 'categories': ['cond-mat.mtrl-sci'], 'source': 'arXiv'
+    }
+    assert [r['arxiv_id'] for r in parse_arxiv_feed([feed])] == ['2401.00001', '2401.00002', '2401.00003']
+    print("✅ 流式解析正确")
+
+
+def test_harvest_pages_and_retries_empty_page():
+    """测试按 start 翻页收割全部结果，空页时重试同一页"""
+    fake = FakeArxiv(empty_once_at=2)
+    try:
+        harvester = fake.harvester(page_size=2)
+        records = list(harvester.harvest('cat:cond-mat.mtrl-sci'))
+        assert [r['arxiv_id'][-1] for r in records] == ['1', '2', '3', '4', '5']
+        assert [(r['start'], r['max_results']) for r in fake.requests] == \
+            [('0', '2'), ('2', '2'), ('2', '2'), ('4', '2')]
+        assert fake.requests[0]['sortBy'] == 'submittedDate' and fake.requests[0]['sortOrder'] == 'ascending'
+        assert harvester.last_submitted == datetime(2024, 1, 5, 10, tzinfo=timezone.utc)
+
+        fake.requests.clear()
+        assert len(list(harvester.harvest('cat:cond-mat.mtrl-sci', max_results=3))) == 3
+        assert [(r['start'], r['max_results']) for r in fake.requests] == [('0', '2'), ('2', '1')]
+    finally:
+        fake.close()
+    print("✅ 分页收割正确")
+
+
+def test_incremental_harvest_by_watermark():
+    """测试按提交时间水位增量收割"""
+    fake = FakeArxiv()
+    state_file = os.path.join(tempfile.mkdtemp(), 'arxiv_state.json')
+    try:
+        harvester = fake.harvester(page_size=10)
+        first = list(harvester.harvest_incremental('cat:cond-mat', state_file, max_results=3))
+        assert [r['arxiv_id'][-1] for r in first] == ['1', '2', '3']
+        with open(state_file, encoding='utf-8') as f:
+            assert json.load(f) == {'cat:cond-mat': '2024-01-03T10:00:00Z'}
+
+        second = list(harvester.harvest_incremental('cat:cond-mat', state_file))
+        assert [r['arxiv_id'][-1] for r in second] == ['4', '5']
+        assert fake.requests[-1]['search_query'] == \
+            '(cat:cond-mat) AND submittedDate:[202401031000 TO 999912312359]'
+
+        assert list(harvester.harvest_incremental('cat:cond-mat', state_file)) == []
+        with open(state_file, encoding='utf-8') as f:
+            assert json.load(f)['cat:cond-mat'] == '2024-01-05T10:00:00Z'
+    finally:
+        fake.close()
+    print("✅ 增量收割正确")
+
+
+if __name__ == "__main__":
+    test_feed_parser_streams_records()
+    test_harvest_pages_and_retries_empty_page()
+    test_incremental_harvest_by_watermark()
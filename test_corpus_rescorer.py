@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+测试语料库重新评分（离线）
+"""
+
+import copy
+
+from corpus_rescorer import CorpusRescorer
+from paper_scoring_system import PaperScoringSystem
+from test_literature_database import make_database, make_paper
+
+TITLES = [
+    'Single crystal growth by the flux method',
+    'Thin film deposition by sputtering',
+    'Chemical vapor transport growth of single crystals',
+    'Density functional theory study',
+]
+
+
+def store_scored_papers(db, scorer, count):
+    """按当前关键词表评分后入库"""
+    papers = []
+    for i in range(count):
+        paper = make_paper(i, title=TITLES[i % len(TITLES)], abstract='')
+        score, matched_keywords = scorer.calculate_score(paper)
+        recommendation, description = scorer.get_download_recommendation(score)
+        paper.update(score=score, matched_keywords=matched_keywords,
+                     recommendation=recommendation, description=description)
+        papers.append(paper)
+    db.save_papers_bulk(papers)
+
+
+def test_rescore_matches_full_reanalysis():
+    """测试调整权重后的重新评分与逐篇重新分析结果一致，且只写回变化的行"""
+    with make_database() as db:
+        scorer = PaperScoringSystem()
+        store_scored_papers(db, scorer, 40)
+
+        rescorer = CorpusRescorer(db, scorer, chunk_size=7)
+        assert rescorer.rescore() == {'total': 40, 'scanned': 40, 'changed': 0}
+
+        # 调整权重并删除一个关键词
+        tuned = copy.deepcopy(scorer.scoring_keywords)
+        for keywords in tuned.values():
+            for keyword in keywords:
+                keywords[keyword] += 5
+        first_category = next(iter(tuned))
+        tuned[first_category].pop(next(iter(tuned[first_category])))
+        scorer.scoring_keywords = tuned
+        scorer.compile_keywords()
+
+        # 新实例从磁盘缓存加载出现矩阵，无需重新扫描
+        result = CorpusRescorer(db, scorer, chunk_size=7).rescore()
+        assert result['scanned'] == 0
+        assert result['changed'] > 0
+
+        for record in db.iter_papers():
+            score, matched_keywords = scorer.calculate_score(record)
+            assert record['score'] == score
+            assert record['matched_keywords'] == matched_keywords
+            assert record['recommendation'] == scorer.get_download_recommendation(score)[0]
+        print("✅ 重新评分结果正确")
+
+
+def test_incremental_refresh_and_dry_run():
+    """测试缓存之后新增/修改的论文会被增量扫描，dry_run 不写回"""
+    with make_database() as db:
+        scorer = PaperScoringSystem()
+        store_scored_papers(db, scorer, 10)
+        CorpusRescorer(db, scorer).rescore()
+
+        db.save_paper(make_paper(3, title='Bridgman growth of large single crystals', abstract='', score=0))
+        db.save_paper(make_paper(50, title='Flux growth of CrI3', abstract='', score=0))
+
+        rescorer = CorpusRescorer(db, scorer)
+        result = rescorer.rescore(dry_run=True)
+        assert result == {'total': 11, 'scanned': 2, 'changed': 2}
+        assert rescorer.presence.shape[0] == len(rescorer.ids) == 11
+        assert list(rescorer.ids) == sorted(rescorer.ids)
+        assert {p['paper_id']: p['score'] for p in db.iter_papers()}['paper-3'] == 0
+
+        assert CorpusRescorer(db, scorer).rescore()['changed'] == 2
+        rescored = {p['paper_id']: p['score'] for p in db.iter_papers()}
+        assert rescored['paper-50'] == scorer.calculate_score({'title': 'Flux growth of CrI3'})[0]
+
+        # 写回评分后水位随之推进，不会把刚写回的行当作已更新重新扫描
+        assert CorpusRescorer(db, scorer).rescore() == {'total': 11, 'scanned': 0, 'changed': 0}
+        # 紧接着（同一秒内）的修改按变更序号识别，不会因时间戳相同被漏掉
+        db.save_paper(make_paper(5, title='Flux growth of CrI3', abstract='', score=0))
+        assert CorpusRescorer(db, scorer).rescore() == {'total': 11, 'scanned': 1, 'changed': 1}
+        print("✅ 增量扫描正确")
+
+
+if __name__ == "__main__":
+    test_rescore_matches_full_reanalysis()
+    test_incremental_refresh_and_dry_run()
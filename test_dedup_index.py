@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+测试论文去重索引（离线）
+"""
+
+import sqlite3
+
+from app.utils.identifiers import normalize_doi, normalize_title, title_fingerprint
+from dedup_index import DedupIndex
+from enhanced_literature_system import EnhancedLiteratureSystem
+from literature_database import LiteratureDatabase
+from test_literature_database import make_database, make_paper
+
+
+def test_identifier_normalization():
+    """测试 DOI 和标题规范化"""
+    assert normalize_doi('https://doi.org/10.1103/PhysRevB.99.1') == '10.1103/physrevb.99.1'
+    assert normalize_doi('doi: 10.1103/PHYSREVB.99.1.') == '10.1103/physrevb.99.1'
+    assert normalize_doi('http://dx.doi.org/10.1021%2Facs.cgd.5') == '10.1021/acs.cgd.5'
+    assert normalize_doi('Unknown') is None and normalize_doi(None) is None
+
+    assert normalize_title('Flux-Growth of  CrI₃: a Study.') == 'flux growth of cri3 a study'
+    assert title_fingerprint('Flux growth of CrI3 -- a study') == title_fingerprint('FLUX GROWTH OF CRI3: A STUDY')
+    assert title_fingerprint('Unknown') is None
+    print("✅ 标识符规范化正确")
+
+
+def test_dedup_index_matches_all_keys():
+    """测试按 paper_id / DOI / 标题查重，并支持 Semantic Scholar 原始格式"""
+    with make_database() as db:
+        db.save_papers_bulk([make_paper(i) for i in range(5)])
+        index = DedupIndex(db)
+
+        assert index.find({'paperId': 'paper-1'}) == 'paper_id'
+        assert index.find({'paperId': 'new', 'externalIds': {'DOI': 'https://doi.org/10.1103/PHYSREVB.2'}}) == 'doi'
+        assert index.find({'paper_id': 'new', 'title': 'single-crystal growth of COMPOUND 3.'}) == 'title'
+        assert index.find({'paper_id': 'new', 'title': 'Something else', 'doi': 'Unknown'}) is None
+
+        db.save_paper(make_paper(9))
+        assert index.find({'paper_id': 'paper-9'}) is None
+        assert index.refresh() == 1
+        assert index.find({'paper_id': 'paper-9'}) == 'paper_id'
+        assert len(index) == 6
+        print("✅ 去重索引查重正确")
+
+
+def test_dedup_keys_backfilled_on_upgrade():
+    """测试旧数据库升级时添加并回填去重键列"""
+    with make_database() as db:
+        path = db.db_path
+
+    conn = sqlite3.connect(path)
+    conn.execute('DROP TABLE papers')
+    conn.execute('''
+        CREATE TABLE papers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, paper_id TEXT UNIQUE, title TEXT NOT NULL,
+            authors TEXT, year INTEGER, venue TEXT, abstract TEXT, doi TEXT,
+            citation_count INTEGER, is_open_access BOOLEAN, score INTEGER, matched_keywords TEXT,
+            recommendation TEXT, description TEXT, search_query TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute("INSERT INTO papers (paper_id, title, doi) VALUES ('old-1', 'Legacy Paper', 'DOI:10.1000/ABC')")
+    conn.commit()
+    conn.close()
+
+    with LiteratureDatabase(path) as upgraded:
+        keys = list(upgraded.iter_dedup_keys())
+        assert keys == [(1, 'old-1', '10.1000/abc', title_fingerprint('legacy paper'))]
+        plan = upgraded.get_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM papers WHERE doi_norm = '10.1000/abc'"
+        ).fetchall()
+        assert 'idx_papers_doi_norm' in str(plan)
+        print("✅ 去重键回填正确")
+
+
+def test_system_counts_duplicates_without_second_lookup():
+    """测试存储流程：重复论文只检查一次，新存储的论文立即进入索引"""
+    system = EnhancedLiteratureSystem(make_database().db_path)
+    paper = {'paperId': 'abc', 'title': 'Flux growth of CrI3', 'externalIds': {'DOI': '10.1/x.1'}}
+
+    assert system._process_paper(paper, 'flux') == 'stored'
+    assert system._process_paper(dict(paper, paperId='other'), 'flux') == 'duplicate'
+    assert 'abc' in system.processed_papers
+    system.database.close()
+    print("✅ 存储流程去重正确")
+
+
+if __name__ == "__main__":
+    test_identifier_normalization()
+    test_dedup_index_matches_all_keys()
+    test_dedup_keys_backfilled_on_upgrade()
+    test_system_counts_duplicates_without_second_lookup()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+测试只追加的 JSONL 日志
+"""
+
+import tempfile
+import threading
+from pathlib import Path
+
+from app.utils.jsonl_journal import JSONLJournal
+
+
+def test_append_and_reload():
+    """测试追加、跨实例读入和多线程追加"""
+    path = Path(tempfile.mkdtemp()) / 'log.jsonl'
+    journal = JSONLJournal(path, fsync_every=10)
+    journal.append({'id': 0, 'title': '单晶生长'})
+
+    threads = [threading.Thread(target=lambda n=n: [journal.append({'id': n, 'i': i}) for i in range(50)])
+               for n in range(1, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(journal) == 201
+    journal.close()
+
+    reopened = JSONLJournal(path)
+    assert len(reopened) == 201
+    assert reopened.entries[0] == {'id': 0, 'title': '单晶生长'}
+    assert len(path.read_text(encoding='utf-8').splitlines()) == 201
+    print("✅ 追加和读入正确")
+
+
+def test_torn_line_and_compact():
+    """测试跳过崩溃留下的不完整行，以及按键压缩"""
+    path = Path(tempfile.mkdtemp()) / 'log.jsonl'
+    path.write_text('{"key": "a", "n": 1}\n{"key": "b", "n": 1}\n{"key": "a", "n"', encoding='utf-8')
+
+    journal = JSONLJournal(path)
+    assert [entry['n'] for entry in journal.entries] == [1, 1]
+    journal.append({'key': 'a', 'n': 2})
+    journal.close()
+    assert len(JSONLJournal(path)) == 3
+
+    journal = JSONLJournal(path)
+    assert journal.latest(lambda entry: entry['key'])['a']['n'] == 2
+    assert journal.compact(lambda entry: entry['key']) == 1
+    journal.append({'key': 'c', 'n': 1})
+    journal.close()
+    assert [line for line in path.read_text(encoding='utf-8').splitlines()] == [
+        '{"key": "a", "n": 2}', '{"key": "b", "n": 1}', '{"key": "c", "n": 1}'
+    ]
+    print("✅ 不完整行和压缩正确")
+
+
+if __name__ == "__main__":
+    test_append_and_reload()
+    test_torn_line_and_compact()
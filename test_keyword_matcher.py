@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+测试关键词匹配器（离线）
+"""
+
+import random
+
+from keyword_matcher import KeywordMatcher
+
+# 与 PaperScoringSystem.scoring_keywords 结构相同，包含重叠/互为前缀的关键词
+KEYWORD_TABLE = {
+    'crystal_keywords': {
+        'single crystal': 80,
+        'crystal growth': 75,
+        'crystal': 1,
+    },
+    'method_keywords': {
+        'flux method': 80,
+        'Czochralski method': 75,
+    },
+    'process_keywords': {
+        'crystals were grown': 80,
+        'single crystals were grown': 80,
+    },
+    'condition_keywords': {
+        'using flux': 75,
+        'for X hours': 65,
+    },
+    'relevance_keywords': {
+        'crystal growth': 3,
+        'crystal size': 2,
+    },
+}
+
+
+def reference_score(text: str):
+    """原 calculate_score 的逐词扫描实现"""
+    text = text.lower()
+    score = 0
+    matched_keywords = {}
+    for keywords in KEYWORD_TABLE.values():
+        for keyword, points in keywords.items():
+            if keyword.lower() in text:
+                score += points
+                matched_keywords[keyword] = points
+    return score, matched_keywords
+
+
+def test_score_matches_reference():
+    """测试评分结果（含顺序）与逐词扫描一致"""
+    matcher = KeywordMatcher(KEYWORD_TABLE)
+    vocabulary = ['single', 'crystals', 'crystal', 'were', 'grown', 'growth', 'using',
+                  'flux', 'method', 'czochralski', 'for', 'x', 'hours', 'size', 'the']
+    rng = random.Random(42)
+
+    for _ in range(2000):
+        text = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(0, 30)))
+        if rng.random() < 0.5:
+            text = text.title()
+        score, matched = matcher.score(text)
+        expected_score, expected_matched = reference_score(text)
+        assert score == expected_score
+        assert list(matched.items()) == list(expected_matched.items())
+    print("✅ 评分与逐词扫描一致")
+
+
+def test_overlapping_matches_and_counts():
+    """测试重叠命中、偏移量和计数"""
+    matcher = KeywordMatcher(KEYWORD_TABLE)
+    text = "Single crystals were grown using flux; crystal growth for X hours."
+
+    matches = matcher.find_all(text)
+    found = {(m.start, m.keyword) for m in matches}
+    assert (0, 'single crystals were grown') in found
+    assert (0, 'single crystal') in found
+    assert (7, 'crystals were grown') in found
+    assert (7, 'crystal') in found
+    assert all(text.lower()[m.start:m.end] == m.keyword for m in matches)
+
+    counts = matcher.count(text)
+    assert counts['crystal'] == 2
+    assert counts['for x hours'] == 1
+    assert KeywordMatcher({}).score(text) == (0, {})
+    print("✅ 重叠命中正确")
+
+
+if __name__ == "__main__":
+    test_score_matches_reference()
+    test_overlapping_matches_and_counts()
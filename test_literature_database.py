@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+测试文献数据库（离线，使用临时数据库文件）
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.identifiers import extract_identifiers
+from literature_database import DOWNLOAD_FAILED, DOWNLOAD_MANUAL, DOWNLOAD_SUCCESS, LiteratureDatabase
+
+
+def make_paper(i: int, score: int = 50, **overrides) -> dict:
+    """构造测试论文数据"""
+    paper = {
+        'paper_id': f'paper-{i}',
+        'title': f'Single crystal growth of compound {i}',
+        'authors': [{'name': f'Author {i}'}],
+        'year': 2020 + i % 5,
+        'venue': 'Physical Review B' if i % 2 else 'Physical Review Materials',
+        'abstract': f'Crystals were grown by the flux method for sample {i}.',
+        'doi': f'10.1103/PhysRevB.{i}',
+        'citation_count': i,
+        'is_open_access': bool(i % 2),
+        'score': score,
+        'matched_keywords': {'single crystal': 80},
+        'recommendation': '必须下载',
+        'description': '强烈实验论文',
+    }
+    paper.update(overrides)
+    return paper
+
+
+def make_database() -> LiteratureDatabase:
+    """在临时目录中创建数据库"""
+    tmp_dir = tempfile.mkdtemp()
+    return LiteratureDatabase(os.path.join(tmp_dir, "test_literature.db"))
+
+
+def test_connection_pragmas():
+    """测试长连接配置 (WAL, synchronous=NORMAL)"""
+    with make_database() as db:
+        conn = db.get_connection()
+        assert conn is db.get_connection()
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        # NORMAL == 1
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1
+        print("✅ 连接配置正确")
+
+
+def test_transaction_rollback():
+    """测试事务异常回滚"""
+    with make_database() as db:
+        try:
+            with db.transaction() as conn:
+                conn.execute("INSERT INTO search_sessions (query) VALUES ('rollback')")
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+
+        count = db.get_connection().execute('SELECT COUNT(*) FROM search_sessions').fetchone()[0]
+        assert count == 0
+        print("✅ 事务回滚正确")
+
+
+def test_search_session_single_transaction():
+    """测试搜索会话与论文在同一事务中保存"""
+    with make_database() as db:
+        papers = [make_paper(i, score=40 + i * 10) for i in range(5)]
+        session_id = db.save_search_session("single crystal growth", papers)
+
+        assert session_id > 0
+        assert db.get_database_stats()['total_papers'] == 5
+        assert all(p['search_query'] == "single crystal growth"
+                   for p in db.get_papers_by_query("single crystal growth"))
+        print("✅ 搜索会话保存正确")
+
+
+def test_thread_local_connections():
+    """测试多线程各自持有连接并发写入"""
+    with make_database() as db:
+        def worker(offset: int):
+            for i in range(offset, offset + 20):
+                assert db.save_paper(make_paper(i))
+
+        threads = [threading.Thread(target=worker, args=(n * 100,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert db.get_database_stats()['total_papers'] == 80
+        print("✅ 多线程写入正确")
+
+
+def test_thread_pool_connections_released():
+    """测试临时线程池结束后，其线程持有的连接随之关闭"""
+    with make_database() as db:
+        for round_number in range(5):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                list(pool.map(lambda i: db.save_paper(make_paper(round_number * 100 + i)), range(8)))
+        # 只剩主线程的连接
+        assert db.open_connections == 1, db.open_connections
+        assert db.get_database_stats()['total_papers'] == 40
+    assert db.open_connections == 0
+    print("✅ 线程池连接释放正确")
+
+
+def test_bulk_upsert_preserves_identity():
+    """测试批量写入统计新增/更新数，且更新时保留 id 和 created_at"""
+    with make_database() as db:
+        counts = db.save_papers_bulk((make_paper(i) for i in range(250)), batch_size=100)
+        assert counts == {'inserted': 250, 'updated': 0}
+
+        conn = db.get_connection()
+        before = conn.execute(
+            "SELECT id, created_at FROM papers WHERE paper_id = 'paper-7'"
+        ).fetchone()
+
+        counts = db.save_papers_bulk(
+            [make_paper(i, score=90) for i in range(200, 300)], batch_size=64
+        )
+        assert counts == {'inserted': 50, 'updated': 50}
+
+        counts = db.save_papers_bulk([make_paper(7, score=95)])
+        assert counts == {'inserted': 0, 'updated': 1}
+        after = conn.execute(
+            "SELECT id, created_at, score FROM papers WHERE paper_id = 'paper-7'"
+        ).fetchone()
+        assert after[:2] == before
+        assert after[2] == 95
+        assert db.get_database_stats()['total_papers'] == 300
+        print("✅ 批量写入正确")
+
+
+def test_fulltext_search():
+    """测试 FTS5 全文搜索：相关度排序、短语/布尔查询、高亮及更新同步"""
+    with make_database() as db:
+        db.save_papers_bulk([
+            make_paper(1, title='Flux growth of CrI3 single crystals', abstract='Magnetic order.'),
+            make_paper(2, title='Thin films by sputtering', abstract='No crystal growth here, only single crystal substrates.'),
+            make_paper(3, title='Chemical vapor transport of Fe3GeTe2: a study', abstract='Crystals were grown.'),
+        ])
+
+        results = db.search_papers("single crystal")
+        assert [p['paper_id'] for p in results] == ['paper-1', 'paper-2']
+
+        # 标点不会被解析为查询语法，截断词按前缀匹配
+        assert [p['paper_id'] for p in db.search_papers("Fe3GeTe2: a stu")] == ['paper-3']
+
+        results = db.search_papers('"vapor transport" OR sputtering', raw_query=True)
+        assert {p['paper_id'] for p in results} == {'paper-2', 'paper-3'}
+        assert db.search_papers('crystal NOT films', raw_query=True, limit=5)[0]['paper_id'] == 'paper-1'
+
+        highlighted = db.search_papers("flux", highlight=True)[0]
+        assert highlighted['title_highlight'] == '[Flux] growth of CrI3 single crystals'
+
+        db.save_paper(make_paper(1, title='Bridgman growth of CrI3', abstract='Magnetic order.'))
+        assert db.search_papers("flux") == []
+        assert db.search_papers("bridgman")[0]['paper_id'] == 'paper-1'
+        print("✅ 全文搜索正确")
+
+
+def test_fulltext_backfill_existing_database():
+    """测试已有数据库升级时回填全文索引"""
+    db = make_database()
+    conn = db.get_connection()
+    conn.execute("DROP TABLE papers_fts")
+    for name in ('insert', 'delete', 'update'):
+        conn.execute(f"DROP TRIGGER papers_fts_{name}")
+    db.save_paper(make_paper(1, title='Czochralski pulling of silicon'))
+    db.close()
+
+    with LiteratureDatabase(db.db_path) as upgraded:
+        assert upgraded.search_papers("czochralski")[0]['paper_id'] == 'paper-1'
+        print("✅ 全文索引回填正确")
+
+
+def test_materialized_stats_match_scan():
+    """测试 paper_stats 汇总表在插入/更新/删除后与逐项 COUNT 结果一致"""
+    scanned = make_database()
+    materialized = LiteratureDatabase(scanned.db_path.replace('.db', '_stats.db'),
+                                      materialized_stats=True)
+
+    for db in (scanned, materialized):
+        db.save_papers_bulk([make_paper(i, score=(i * 7) % 100) for i in range(60)])
+        db.save_papers_bulk([make_paper(i, score=85, year=None, venue='Nature') for i in range(10)])
+        with db.transaction() as conn:
+            conn.execute("DELETE FROM papers WHERE paper_id IN ('paper-20', 'paper-21')")
+        db.save_search_session("flux method", [make_paper(100, score=30)])
+
+    conn = scanned.get_connection()
+    expected_high = conn.execute('SELECT COUNT(*) FROM papers WHERE score >= 70').fetchone()[0]
+    expected_years = conn.execute(
+        'SELECT year, COUNT(*) FROM papers GROUP BY year ORDER BY year DESC'
+    ).fetchall()
+
+    stats = materialized.get_database_stats()
+    assert stats == scanned.get_database_stats()
+    assert stats['total_papers'] == 59
+    assert stats['high_score_papers'] == expected_high
+    assert stats['year_stats'] == expected_years
+    assert stats['venue_stats'][0] == ('Physical Review Materials', 25)
+
+    scanned.close()
+    materialized.close()
+    print("✅ 统计汇总表正确")
+
+
+def test_keyset_iteration():
+    """测试键集分页：跨页无重复/遗漏，顺序与一次性查询一致，NULL 排在最后"""
+    with make_database() as db:
+        db.save_papers_bulk([make_paper(i, score=i % 7 * 10) for i in range(103)])
+        db.save_papers_bulk([make_paper(i, score=None) for i in range(200, 205)])
+
+        streamed = [p['paper_id'] for p in db.iter_papers(page_size=10)]
+        expected = [row[0] for row in db.get_connection().execute(
+            'SELECT paper_id FROM papers ORDER BY score IS NULL, score DESC, id DESC'
+        )]
+        assert streamed == expected
+        assert len(streamed) == 108
+
+        high = list(db.iter_papers({'min_score': 50, 'year_from': 2022}, page_size=4))
+        assert high and all(p['score'] >= 50 and p['year'] >= 2022 for p in high)
+
+        by_time = list(db.iter_papers(order='created_at', page_size=7))
+        assert len({p['id'] for p in by_time}) == 108
+
+        assert set(db.iter_paper_ids(page_size=9)) == set(expected)
+
+        # 游标条件必须形成索引上的双侧范围，否则每页都要从索引开头重新扫描
+        for column, index in (('score', 'idx_papers_score'), ('created_at', 'idx_papers_created')):
+            plan = ' '.join(row[-1] for row in db.get_connection().execute(
+                f'EXPLAIN QUERY PLAN SELECT * FROM papers WHERE {column} IS NOT NULL '
+                f'AND ({column}, id) < (?, ?) ORDER BY {column} DESC, id DESC LIMIT 10', (50, 10)
+            ))
+            assert f'{index} ({column}>? AND {column}<?)' in plan, plan
+        print("✅ 键集分页正确")
+
+
+def test_paper_record_mapping():
+    """测试 PaperRecord：按列名访问、列投影、JSON 列延迟解码"""
+    with make_database() as db:
+        db.save_paper(make_paper(1, score=88))
+
+        record = db.get_papers_by_score(min_score=0)[0]
+        assert record['title'] == record.title == 'Single crystal growth of compound 1'
+        assert record['is_open_access'] is True
+        assert record._decoded is None
+        assert record['authors'] == [{'name': 'Author 1'}]
+        assert record['authors'] is record['authors']
+        assert record.to_dict()['matched_keywords'] == {'single crystal': 80}
+        assert set(record) == set(record.to_dict())
+
+        titles = db.get_papers_by_score(min_score=0, columns=('paper_id', 'title'))
+        assert list(titles[0].keys()) == ['paper_id', 'title']
+        assert titles[0] == {'paper_id': 'paper-1', 'title': 'Single crystal growth of compound 1'}
+        assert titles[0].get('abstract') is None
+
+        projected = next(db.iter_papers(columns=('score',)))
+        assert dict(projected) == {'score': 88}
+
+        # 未知列被拒绝（错误已记录，返回空列表）
+        assert db.get_all_papers(columns=('title; DROP TABLE papers',)) == []
+        assert db.get_database_stats()['total_papers'] == 1
+        print("✅ PaperRecord 映射正确")
+
+
+def test_identifier_resolution():
+    """测试标识符规范化、作品 ID 解析与合并"""
+    assert extract_identifiers({
+        'paperId': 'ABCDEF0123456789ABCDEF0123456789ABCDEF01',
+        'externalIds': {'DOI': 'https://doi.org/10.1103/PhysRevB.1', 'ArXiv': '2401.01234', 'PubMed': '0042'},
+    }) == {'doi': '10.1103/physrevb.1', 'arxiv': '2401.01234', 'pmid': '42',
+           's2': 'abcdef0123456789abcdef0123456789abcdef01'}
+    assert extract_identifiers({'pdf_url': 'http://arxiv.org/pdf/cond-mat/0601001v2', 'doi': None}) == \
+        {'arxiv': 'cond-mat/0601001'}
+
+    with make_database() as db:
+        db.save_papers_bulk([make_paper(i) for i in range(3)])
+        assert db.resolve_work_id({'doi': 'DOI:10.1103/PHYSREVB.1'}) == 'doi:10.1103/physrevb.1'
+        assert db.resolve_work_id({'paperId': 'paper-2'}) == 'doi:10.1103/physrevb.2'
+
+        # 预印本和 PubMed 记录先各自成为作品，带全部标识符的记录把它们合并
+        preprint, pubmed = db.register_identifiers([{'arxiv_id': '2401.01234v1'}, {'pmid': '42'}])
+        assert (preprint, pubmed) == ('arxiv:2401.01234', 'pmid:42')
+        merged = db.register_identifiers([{'doi': '10.1103/PhysRevB.1', 'arxiv_id': '2401.01234', 'pmid': '42'}])
+        assert merged == ['doi:10.1103/physrevb.1']
+        assert db.resolve_work_ids([{'pmid': 42}, {'arxiv_id': 'arXiv:2401.01234v3'}, {'doi': '10.9999/none'}]) == \
+            ['doi:10.1103/physrevb.1', 'doi:10.1103/physrevb.1', None]
+        assert db.get_work_identifiers('doi:10.1103/physrevb.1') == {
+            'arxiv': ['2401.01234'], 'doi': ['10.1103/physrevb.1'], 'pmid': ['42'], 's2': ['paper-1']
+        }
+    print("✅ 标识符解析正确")
+
+
+def test_download_records_and_pending():
+    """测试下载记录写入、作品 ID 换算、状态统计和待下载查询"""
+    with make_database() as db:
+        db.save_papers_bulk([make_paper(i, score=60 + i * 5) for i in range(6)])
+        # 分数 60/65/70/75/80/85
+        db.record_download('paper-5', DOWNLOAD_FAILED, 'https://a.org/5.pdf', error_message='404')
+        db.record_download('doi:10.1103/physrevb.5', DOWNLOAD_SUCCESS, 'https://b.org/5.pdf',
+                           file_path='/store/ab/cd/x', file_size=1024, sha256='x' * 64, elapsed=0.5)
+        db.record_download('paper-4', DOWNLOAD_MANUAL, 'https://journals.aps.org/4.pdf')
+        db.record_download('paper-3', DOWNLOAD_FAILED, 'https://a.org/3.pdf')
+        db.record_download('paper-3', DOWNLOAD_FAILED, 'https://c.org/3.pdf')
+
+        records = db.get_download_records('doi:10.1103/physrevb.5')
+        assert [r['download_status'] for r in records] == [DOWNLOAD_FAILED, DOWNLOAD_SUCCESS]
+        assert records[1]['paper_id'] == 'paper-5' and records[1]['file_size'] == 1024
+        assert db.get_download_status_counts() == {DOWNLOAD_SUCCESS: 1, DOWNLOAD_FAILED: 2, DOWNLOAD_MANUAL: 1}
+
+        pending = db.pending_downloads(min_score=70, columns=['paper_id', 'score'])
+        assert [p['paper_id'] for p in pending] == ['paper-3', 'paper-2']
+        assert [p['paper_id'] for p in db.pending_downloads(70, include_manual=True)] == \
+            ['paper-4', 'paper-3', 'paper-2']
+        assert [p['paper_id'] for p in db.pending_downloads(70, max_attempts=2)] == ['paper-2']
+        assert [p['paper_id'] for p in db.pending_downloads(0, limit=1)] == ['paper-3']
+
+        try:
+            db.record_download('paper-1', 'unknown')
+            assert False, "未知状态应报错"
+        except ValueError:
+            pass
+
+        plan = ' '.join(row[-1] for row in db.get_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT 1 FROM download_records WHERE download_status = 'failed'"
+        ))
+        assert 'idx_download_records_status' in plan
+    print("✅ 下载记录正确")
+
+
+def test_download_records_migration():
+    """测试旧数据库的下载记录表补齐新增列和索引"""
+    path = os.path.join(tempfile.mkdtemp(), "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE download_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, paper_id TEXT, download_status TEXT,
+            download_url TEXT, file_path TEXT, download_time TIMESTAMP, error_message TEXT
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+    with LiteratureDatabase(path) as db:
+        db.record_download('paper-1', DOWNLOAD_SUCCESS, sha256='a' * 64)
+        assert db.get_download_records('paper-1')[0]['sha256'] == 'a' * 64
+        indexes = {row[1] for row in db.get_connection().execute('PRAGMA index_list(download_records)')}
+        assert {'idx_download_records_paper', 'idx_download_records_status'} <= indexes
+    print("✅ 下载记录表迁移正确")
+
+
+if __name__ == "__main__":
+    test_connection_pragmas()
+    test_transaction_rollback()
+    test_search_session_single_transaction()
+    test_thread_local_connections()
+    test_thread_pool_connections_released()
+    test_bulk_upsert_preserves_identity()
+    test_fulltext_search()
+    test_fulltext_backfill_existing_database()
+    test_materialized_stats_match_scan()
+    test_keyset_iteration()
+    test_paper_record_mapping()
+    test_identifier_resolution()
+    test_download_records_and_pending()
+    test_download_records_migration()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+测试文献数据库流式导出（离线）
+"""
+
+import csv
+import gzip
+import json
+import os
+import tempfile
+
+from literature_exporter import LiteratureExporter, infer_format
+from test_literature_database import make_database, make_paper
+
+
+def test_infer_format():
+    """测试按扩展名推断格式和压缩"""
+    assert infer_format("papers.csv") == {'format': 'csv', 'compression': None}
+    assert infer_format("papers.jsonl.gz") == {'format': 'jsonl', 'compression': 'gzip'}
+    assert infer_format("papers.parquet.zst") == {'format': 'parquet', 'compression': 'zstd'}
+    print("✅ 格式推断正确")
+
+
+def test_csv_export_matches_legacy_layout():
+    """测试 CSV 导出保持原有标题行，并按评分降序分块写出"""
+    with make_database() as db:
+        db.save_papers_bulk([make_paper(i, score=i) for i in range(25)])
+        filename = os.path.join(tempfile.mkdtemp(), "export.csv")
+
+        assert db.export_to_csv(filename)
+        with open(filename, encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+
+        assert rows[0][:3] == ['ID', 'Paper ID', 'Title']
+        assert len(rows) == 26
+        assert [int(r[10]) for r in rows[1:]] == list(range(24, -1, -1))
+        print("✅ CSV 导出正确")
+
+
+def test_jsonl_gzip_projection_and_filter():
+    """测试 JSONL + gzip 导出、列投影和过滤条件"""
+    with make_database() as db:
+        db.save_papers_bulk([make_paper(i, score=i * 10) for i in range(10)])
+        exporter = LiteratureExporter(db, chunk_size=3)
+        filename = os.path.join(tempfile.mkdtemp(), "export.jsonl.gz")
+
+        result = exporter.export(filename, columns=['paper_id', 'authors'],
+                                 filters={'min_score': 50})
+        assert result['success'] and result['rows'] == 5
+
+        with gzip.open(filename, 'rt', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert lines[0] == {'paper_id': 'paper-9', 'authors': [{'name': 'Author 9'}]}
+        assert not os.path.exists(filename + '.tmp')
+        print("✅ JSONL 导出正确")
+
+
+def test_incremental_export():
+    """测试增量导出只写出水位之后更新的论文"""
+    with make_database() as db:
+        exporter = LiteratureExporter(db)
+        out_dir = tempfile.mkdtemp()
+
+        db.save_papers_bulk([make_paper(i) for i in range(5)])
+        first = exporter.export(os.path.join(out_dir, "day1.jsonl"),
+                                incremental=True, export_name="nightly")
+        assert first['rows'] == 5
+
+        db.save_paper(make_paper(2, score=99))
+        db.save_paper(make_paper(7))
+        second = exporter.export(os.path.join(out_dir, "day2.jsonl"),
+                                 incremental=True, export_name="nightly")
+        assert second['rows'] == 2
+        assert second['watermark'] > first['watermark']
+
+        third = exporter.export(os.path.join(out_dir, "day3.jsonl"),
+                                incremental=True, export_name="nightly")
+        assert third['rows'] == 0 and third['filename'] is None
+        assert sorted(os.listdir(out_dir)) == [f"day1.{first['watermark']}.jsonl",
+                                               f"day2.{second['watermark']}.jsonl"]
+        print("✅ 增量导出正确")
+
+
+def test_incremental_export_same_path_keeps_deltas():
+    """测试同一路径重复增量导出时每次写入新文件，且同一时间戳的后续写入不会被跳过"""
+    with make_database() as db:
+        exporter = LiteratureExporter(db)
+        filename = os.path.join(tempfile.mkdtemp(), "nightly.jsonl.gz")
+
+        db.save_papers_bulk([make_paper(i) for i in range(3)])
+        first = exporter.export(filename, columns=['paper_id'], incremental=True)
+
+        # 后提交的写入带有与已导出行相同的 updated_at
+        stamp = db.get_connection().execute('SELECT MAX(updated_at) FROM papers').fetchone()[0]
+        with db.transaction() as conn:
+            conn.execute("UPDATE papers SET score = 99, updated_at = ? WHERE paper_id = 'paper-0'", (stamp,))
+        second = exporter.export(filename, columns=['paper_id'], incremental=True)
+
+        def read(path):
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return [json.loads(line)['paper_id'] for line in f]
+
+        assert first['filename'] != second['filename']
+        assert first['filename'].endswith(f".{first['watermark']}.jsonl.gz")
+        assert read(first['filename']) == ['paper-0', 'paper-1', 'paper-2']
+        assert read(second['filename']) == ['paper-0']
+        print("✅ 重复增量导出正确")
+
+
+if __name__ == "__main__":
+    test_infer_format()
+    test_csv_export_matches_legacy_layout()
+    test_jsonl_gzip_projection_and_filter()
+    test_incremental_export()
+    test_incremental_export_same_path_keeps_deltas()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+测试 MinHash/LSH 近似重复检测（离线）
+"""
+
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+from app.utils.minhash import (
+    MinHasher, NearDuplicateIndex, choose_lsh_params, cluster_near_duplicates, merge_clusters
+)
+from dedup_index import DedupIndex
+from enhanced_literature_system import EnhancedLiteratureSystem
+from test_literature_database import make_database, make_paper
+
+PREPRINT = ('Flux growth of large single crystals of the van der Waals magnet CrI3',
+            'We report the growth of millimetre-sized single crystals of CrI3 from an iodine flux '
+            'and characterise their magnetic and structural properties.')
+PUBLISHED = ('Flux Growth of Large Single Crystals of the van der Waals Magnet CrI$_3$',
+             'We report the growth of millimeter-sized single crystals of CrI3 from an iodine flux, '
+             'and characterize their magnetic and structural properties.')
+# 只差化学式的不同工作
+CRBR3 = ('Flux growth of large single crystals of the van der Waals magnet CrBr3',
+         'We report the growth of millimetre-sized single crystals of CrBr3 from a bromine flux '
+         'and characterise their magnetic and structural properties.')
+BI2SE3 = ('Flux growth and quantum oscillations of the topological insulator Bi2Se3',
+          'Large single crystals of Bi2Se3 were grown from a self flux and studied by magnetotransport.')
+BI2TE3 = ('Flux growth and quantum oscillations of the topological insulator Bi2Te3',
+          'Large single crystals of Bi2Te3 were grown from a self flux and studied by magnetotransport.')
+UNRELATED = ('Density functional theory study of defect formation in silicon',
+             'First-principles calculations of vacancy and interstitial formation energies.')
+
+
+def test_signature_estimates_similarity():
+    """测试签名稳定且相似文本的估计相似度高"""
+    hasher = MinHasher()
+    first = hasher.signature(' '.join(PREPRINT))
+    assert (first == MinHasher().signature(' '.join(PREPRINT))).all()
+    assert MinHasher.similarity(first, hasher.signature(' '.join(PUBLISHED))) > 0.7
+    assert MinHasher.similarity(first, hasher.signature(' '.join(UNRELATED))) < 0.2
+
+    bands, rows = choose_lsh_params(0.7, 128)
+    assert bands * rows <= 128 and 0.6 < (1.0 / bands) ** (1.0 / rows) < 0.8
+    print("✅ MinHash 签名正确")
+
+
+def test_index_clusters_and_persists():
+    """测试近似查重、簇合并和签名持久化"""
+    path = os.path.join(tempfile.mkdtemp(), 'signatures.minhash')
+    index = NearDuplicateIndex(path)
+    assert index.add('arxiv:1', *PREPRINT) == 'arxiv:1'
+    assert index.add('s2:1', *UNRELATED) == 's2:1'
+    assert index.find_duplicate(*PUBLISHED) == 'arxiv:1'
+    assert index.add('s2:2', *PUBLISHED) == 'arxiv:1'
+    index.close()
+
+    reopened = NearDuplicateIndex(path)
+    assert len(reopened) == 3
+    assert reopened.cluster_members('s2:2') == ['arxiv:1', 's2:2']
+    assert reopened.find_duplicate(*UNRELATED) == 's2:1'
+    reopened.close()
+    print("✅ 近似重复索引正确")
+
+
+def test_cluster_near_duplicates_keeps_order():
+    """测试批量聚类保持首次出现顺序"""
+    items = [PREPRINT, UNRELATED, PUBLISHED]
+    assert cluster_near_duplicates(items, lambda item: item) == [[PREPRINT, PUBLISHED], [UNRELATED]]
+    print("✅ 批量聚类正确")
+
+
+def test_merge_clusters_fills_missing_fields():
+    """测试合并簇：保留第一条，缺失字段从同簇的其他版本补全"""
+    @dataclass
+    class Result:
+        title: str
+        abstract: str
+        doi: Optional[str] = None
+        pdf_url: Optional[str] = None
+
+    items = [Result(*PREPRINT, pdf_url='https://arxiv.org/pdf/1'), Result(*UNRELATED),
+             Result(*PUBLISHED, doi='10.1103/x.1', pdf_url='https://journals.aps.org/1')]
+    merged = merge_clusters(items, lambda r: (r.title, r.abstract), fields=('doi', 'pdf_url'))
+    assert merged == [Result(*PREPRINT, doi='10.1103/x.1', pdf_url='https://arxiv.org/pdf/1'), items[1]]
+    print("✅ 簇合并正确")
+
+
+def test_merge_clusters_keeps_conflicting_identifiers_apart():
+    """测试只差化学式的标题即使落入同一簇，DOI / arXiv 标识符冲突时也不合并"""
+    @dataclass
+    class Result:
+        title: str
+        abstract: str
+        doi: Optional[str] = None
+        pdf_url: Optional[str] = None
+
+    items = [Result(*PREPRINT, doi='10.1103/x.1'), Result(*CRBR3, doi='10.1103/x.2'),
+             Result(*BI2SE3, pdf_url='https://arxiv.org/pdf/2101.00001'),
+             Result(*BI2TE3, pdf_url='https://arxiv.org/pdf/2101.00002')]
+    key = lambda r: (r.title, r.abstract)
+    assert cluster_near_duplicates(items, key, threshold=0.5) == [items[:2], items[2:]]
+    assert merge_clusters(items, key, fields=('doi', 'pdf_url'), threshold=0.5) == items
+    print("✅ 标识符冲突的结果不合并")
+
+
+def test_dedup_index_falls_back_to_near_duplicates():
+    """测试精确键未命中时按标题+摘要近似查重，并从数据库同步已有论文"""
+    with make_database() as db:
+        db.save_paper(make_paper(1, title=PREPRINT[0], abstract=PREPRINT[1]))
+        index = DedupIndex(db, NearDuplicateIndex())
+
+        assert index.find({'paperId': 'new', 'title': PUBLISHED[0], 'abstract': PUBLISHED[1]}) == 'near'
+        assert index.find({'paperId': 'new', 'title': UNRELATED[0], 'abstract': UNRELATED[1]}) is None
+        assert index.near_duplicates.get_meta('last_id') == '1'
+    print("✅ 去重索引近似匹配正确")
+
+
+def test_system_skips_published_version_of_stored_preprint():
+    """测试存储流程跳过已存储预印本的正式发表版本"""
+    system = EnhancedLiteratureSystem(make_database().db_path, near_duplicate_threshold=0.7)
+    preprint = {'paperId': 'arxiv', 'title': PREPRINT[0], 'abstract': PREPRINT[1]}
+    published = {'paperId': 'journal', 'title': PUBLISHED[0], 'abstract': PUBLISHED[1],
+                 'externalIds': {'DOI': '10.1103/physrevmaterials.1'}}
+
+    assert system._process_paper(preprint, 'flux') == 'stored'
+    assert system._process_paper(published, 'flux') == 'duplicate'
+    system.database.close()
+    print("✅ 存储流程近似去重正确")
+
+
+if __name__ == "__main__":
+    test_signature_estimates_similarity()
+    test_index_clusters_and_persists()
+    test_cluster_near_duplicates_keeps_order()
+    test_merge_clusters_fills_missing_fields()
+    test_merge_clusters_keeps_conflicting_identifiers_apart()
+    test_dedup_index_falls_back_to_near_duplicates()
+    test_system_skips_published_version_of_stored_preprint()
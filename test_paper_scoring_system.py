@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+测试论文评分系统的批量分析（离线）
+"""
+
+import time
+
+import paper_scoring_system
+from paper_scoring_system import PaperScoringSystem
+
+
+def make_papers(n: int) -> list:
+    """构造 Semantic Scholar 格式的测试论文"""
+    abstracts = [
+        "Single crystals were grown by chemical vapor transport.",
+        "Samples were prepared using flux at temperature 900 C.",
+        "A theoretical study of crystal structure and crystal size.",
+        "",
+    ]
+    return [
+        {
+            'paperId': f'p{i}',
+            'title': f'Crystal growth study {i}',
+            'abstract': abstracts[i % len(abstracts)],
+            'externalIds': {'DOI': f'10.1000/{i}'},
+        }
+        for i in range(n)
+    ]
+
+
+def test_batch_analyze_without_sleep():
+    """测试串行批量分析不再有人为延迟"""
+    scorer = PaperScoringSystem()
+    papers = make_papers(200)
+
+    start = time.time()
+    results = scorer.batch_analyze_papers(papers)
+    assert time.time() - start < 5
+    assert [r['paper_id'] for r in results] == [p['paperId'] for p in papers]
+    print("✅ 串行批量分析正确")
+
+
+def test_parallel_matches_serial():
+    """测试多进程分析结果与串行完全一致（包括顺序）"""
+    scorer = PaperScoringSystem()
+    scorer.scoring_keywords['relevance_keywords']['theoretical study'] = 1
+    scorer.compile_keywords()
+    papers = make_papers(103)
+
+    serial = scorer.batch_analyze_papers(papers)
+    parallel = scorer.batch_analyze_papers(papers, workers=2, chunk_size=10)
+    assert parallel == serial
+    assert any('theoretical study' in r['matched_keywords'] for r in parallel)
+    print("✅ 多进程分析与串行一致")
+
+
+def test_scoring_worker_skips_client_setup(monkeypatch):
+    """测试工作进程的评分器不创建 API 客户端，评分结果与完整实例一致"""
+    full = PaperScoringSystem()
+
+    def fail():
+        raise AssertionError("评分器不应创建客户端")
+
+    monkeypatch.setattr(paper_scoring_system, 'get_default_client', fail)
+    paper_scoring_system._init_scoring_worker(full.scoring_keywords)
+    scorer = paper_scoring_system._worker_scorer
+    assert scorer.client is None
+    paper = {'title': 'Flux growth of single crystals', 'abstract': 'Single crystals were grown by the flux method.'}
+    assert scorer.analyze_paper(paper) == full.analyze_paper(paper)
+    print("✅ 轻量评分器正确")
+
+
+if __name__ == "__main__":
+    test_batch_analyze_without_sleep()
+    test_parallel_matches_serial()
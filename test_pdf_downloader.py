@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+测试并发 PDF 下载引擎（离线，使用本地 HTTP 服务；127.0.0.1 和 localhost 视为两个主机）
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from app.services.pdf_downloader import (
+    HostLimiter, HostPolicy, InvalidPDFError, PDFDownloader, PDFStreamCheck, STALE_PARTIAL_AGE
+)
+from app.utils.pdf_store import PDFStore
+from literature_database import LiteratureDatabase
+
+
+def make_pdf(text: str) -> bytes:
+    """生成一页包含指定文本的最小 PDF"""
+    stream = f"BT /F1 12 Tf 72 712 Td ({text}) Tj ET".encode('latin-1')
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    # 注释填充，使文件超过 1KB
+    out = b"%PDF-1.4\n" + b"%" + b"x" * 1200 + b"\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+class FakePDFServer:
+    """按路径返回 PDF 的本地服务，记录每个主机的并发数和请求开始时间"""
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = {}
+        self.max_active = {}
+        self.starts = {}
+        self.paths = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                host = self.headers['Host'].split(':')[0]
+                with fake.lock:
+                    fake.paths.append(self.path)
+                    fake.starts.setdefault(host, []).append(time.monotonic())
+                    fake.active[host] = fake.active.get(host, 0) + 1
+                    fake.max_active[host] = max(fake.max_active.get(host, 0), fake.active[host])
+                time.sleep(fake.delay)
+                with fake.lock:
+                    fake.active[host] -= 1
+
+                if self.path.startswith('/missing'):
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body = make_pdf(f"Single crystal growth sample {self.path}")
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/pdf')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_port
+
+    def url(self, host: str, path: str) -> str:
+        return f"http://{host}:{self.port}{path}"
+
+    def close(self):
+        self.server.shutdown()
+
+
+class RangeServer:
+    """支持 Range/If-Range 的本地服务，可在前几次请求中途断开连接"""
+
+    def __init__(self, body: bytes, etag: str = '"v1"', cut_after=None):
+        self.body = body
+        self.etag = etag
+        self.cut_after = list(cut_after or [])
+        self.requests = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                range_header = self.headers.get('Range')
+                fake.requests.append((range_header, self.headers.get('If-Range')))
+                start = 0
+                if range_header and self.headers.get('If-Range') == fake.etag:
+                    start = int(range_header.split('=')[1].rstrip('-'))
+                    if start >= len(fake.body):
+                        self.send_response(416)
+                        self.send_header('Content-Range', f"bytes */{len(fake.body)}")
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header('Content-Range', f"bytes {start}-{len(fake.body) - 1}/{len(fake.body)}")
+                else:
+                    self.send_response(200)
+                payload = fake.body[start:]
+                self.send_header('Content-Type', 'application/pdf')
+                self.send_header('Content-Length', str(len(payload)))
+                self.send_header('ETag', fake.etag)
+                self.send_header('Accept-Ranges', 'bytes')
+                self.end_headers()
+                if fake.cut_after:
+                    # 只发送一部分后断开连接
+                    self.wfile.write(payload[:fake.cut_after.pop(0)])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/supplement.pdf"
+
+    def close(self):
+        self.server.shutdown()
+
+
+def resumable_downloader(download_dir: str, max_retries: int = 3) -> PDFDownloader:
+    return PDFDownloader(download_dir=download_dir, max_retries=max_retries,
+                         host_policy=HostPolicy(max_concurrency=2, interval=0), host_policies={})
+
+
+def test_resume_after_interrupted_transfer(monkeypatch):
+    """测试连接中断后用 Range 续传，验证通过后才改名"""
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    body = make_pdf("Large supplementary material for crystal growth")
+    fake = RangeServer(body, cut_after=[500, 400])
+    download_dir = Path(tempfile.mkdtemp())
+    try:
+        result = resumable_downloader(str(download_dir)).download_pdf(fake.url, 'supplement.pdf')
+        assert result.success, result.error_message
+        assert (download_dir / 'supplement.pdf').read_bytes() == body
+        assert fake.requests == [(None, None), ('bytes=500-', '"v1"'), ('bytes=900-', '"v1"')]
+        assert not list(download_dir.glob('*.part*'))
+    finally:
+        fake.close()
+    print("✅ 断点续传正确")
+
+
+def test_resume_across_runs_and_changed_resource():
+    """测试进程中断后按记录续传，资源变化 (ETag 不同) 时从头下载"""
+    body = make_pdf("Crystal growth supplementary data set")
+    fake = RangeServer(body, cut_after=[600])
+    download_dir = Path(tempfile.mkdtemp())
+    try:
+        # 第一次运行只尝试一次，留下 .part 文件和记录
+        first = resumable_downloader(str(download_dir), max_retries=1).download_pdf(fake.url, 'a.pdf')
+        assert not first.success and not (download_dir / 'a.pdf').exists()
+        assert (download_dir / 'a.pdf.part').stat().st_size == 600
+        with open(download_dir / 'a.pdf.part.json', encoding='utf-8') as f:
+            journal = json.load(f)
+        assert journal['expected_length'] == len(body) and journal['etag'] == '"v1"'
+
+        # 第二次运行续传
+        second = resumable_downloader(str(download_dir)).download_pdf(fake.url, 'a.pdf')
+        assert second.success and (download_dir / 'a.pdf').read_bytes() == body
+        assert fake.requests[-1] == ('bytes=600-', '"v1"')
+
+        # 资源在两次运行之间变化：If-Range 不匹配，服务端返回完整的新内容
+        fake.cut_after = [700]
+        assert not resumable_downloader(str(download_dir), max_retries=1).download_pdf(fake.url, 'b.pdf').success
+        fake.body = make_pdf("Crystal growth supplementary data set, revised")
+        fake.etag = '"v2"'
+        third = resumable_downloader(str(download_dir)).download_pdf(fake.url, 'b.pdf')
+        assert third.success and (download_dir / 'b.pdf').read_bytes() == fake.body
+        assert fake.requests[-1] == ('bytes=700-', '"v1"')
+    finally:
+        fake.close()
+    print("✅ 跨进程续传正确")
+
+
+def test_invalid_and_stale_partials_are_removed():
+    """测试验证失败的文件不会留下，过期的未完成下载会被清理"""
+    fake = RangeServer(b"<html>not a pdf</html>" * 100)
+    download_dir = Path(tempfile.mkdtemp())
+    try:
+        downloader = resumable_downloader(str(download_dir))
+        result = downloader.download_pdf(fake.url, 'bad.pdf')
+        assert not result.success and result.error_message.startswith("PDF文件验证失败: 缺少 %PDF- 文件头")
+        assert len(fake.requests) == 1
+        assert not list(download_dir.glob('bad.pdf*'))
+
+        stale = download_dir / 'old.pdf.part'
+        stale.write_bytes(b'%PDF-partial')
+        (download_dir / 'old.pdf.part.json').write_text('{}', encoding='utf-8')
+        fresh = download_dir / 'new.pdf.part'
+        fresh.write_bytes(b'%PDF-partial')
+        (download_dir / 'orphan.pdf.part.json').write_text('{}', encoding='utf-8')
+        past = time.time() - STALE_PARTIAL_AGE - 60
+        for path in (stale, download_dir / 'old.pdf.part.json'):
+            os.utime(path, (past, past))
+
+        assert downloader.cleanup_stale_partials() == 1
+        assert sorted(p.name for p in download_dir.glob('*.part*')) == ['new.pdf.part']
+    finally:
+        fake.close()
+    print("✅ 未完成下载清理正确")
+
+
+def test_store_dedupes_across_sources():
+    """测试使用内容寻址存储时同一论文只下载一次、相同内容只存一份"""
+    body = make_pdf("Flux growth of CeCoIn5 single crystals")
+    fake = RangeServer(body)
+    download_dir = Path(tempfile.mkdtemp())
+    try:
+        store = PDFStore(download_dir / 'store')
+        downloader = PDFDownloader(download_dir=str(download_dir), store=store,
+                                   host_policy=HostPolicy(max_concurrency=2, interval=0), host_policies={})
+        results = downloader.batch_download([
+            {'pdf_url': fake.url, 'filename': 'same_long_title.pdf', 'paper_id': 'doi:10.1/a'},
+            {'pdf_url': fake.url + '?mirror=1', 'filename': 'same_long_title.pdf', 'paper_id': 'arxiv:2401.00001'},
+        ])
+        assert all(r.success for r in results)
+        assert results[0].sha256 == results[1].sha256 and results[0].file_path == results[1].file_path
+        assert store.stats()['blobs'] == 1 and store.stats()['papers'] == 2
+        assert Path(results[0].file_path).read_bytes() == body
+        assert not list(download_dir.glob('*.pdf*'))
+
+        # 已存储的论文直接命中索引，不再请求
+        requests_before = len(fake.requests)
+        again = downloader.download_pdf(fake.url, 'x.pdf', paper_id='arxiv:2401.00001')
+        assert again.success and again.file_path == results[0].file_path and len(fake.requests) == requests_before
+        store.close()
+    finally:
+        fake.close()
+    print("✅ 下载结果按内容去重存储")
+
+
+def test_stream_check():
+    """测试边下载边做的文件头/文件尾检查"""
+    body = make_pdf("Crystal growth")
+    check = PDFStreamCheck()
+    for i in range(0, len(body), 100):
+        check.feed(body[i:i + 100])
+    check.finish()
+
+    # 文件头前允许有少量多余字节
+    check = PDFStreamCheck()
+    check.feed(b"\r\n" * 10 + body)
+    check.finish()
+
+    for data, message in ((b"<!DOCTYPE html><html>" + b" " * 2000, "文件头"),
+                          (body[:-300], "%%EOF"), (b"%PDF-1.4\n%%EOF", "太小")):
+        check = PDFStreamCheck()
+        try:
+            check.feed(data)
+            check.finish()
+        except InvalidPDFError as e:
+            assert message in str(e), e
+        else:
+            raise AssertionError(f"应当拒绝: {message}")
+    print("✅ 流式 PDF 检查正确")
+
+
+def test_validation_levels_per_batch():
+    """测试按批次选择验证级别：basic 不解析页面，deep 在进程池中用 PyMuPDF 检查"""
+    fake = RangeServer(make_pdf(""))  # 第一页没有文本
+    download_dir = Path(tempfile.mkdtemp())
+    try:
+        downloader = resumable_downloader(str(download_dir))
+        deep = downloader.batch_download([{'pdf_url': fake.url, 'filename': 'blank.pdf'}], validation='deep')
+        assert not deep[0].success and deep[0].error_message == "PDF文件验证失败"
+        assert not list(download_dir.glob('blank.pdf*'))
+
+        basic = downloader.batch_download([{'pdf_url': fake.url, 'filename': 'blank.pdf'}])
+        assert basic[0].success
+
+        fake.body = make_pdf("Text on the first page")
+        assert downloader.download_pdf(fake.url, 'text.pdf', validation='deep').success
+        downloader.close()
+    finally:
+        fake.close()
+    print("✅ 分级验证正确")
+
+
+def test_host_policy_matching():
+    """测试按域名后缀匹配主机策略"""
+    limiter = HostLimiter(HostPolicy(3, 0.1), {'arxiv.org': HostPolicy(1, 3.0)})
+    assert limiter.policy_for('arxiv.org').interval == 3.0
+    assert limiter.policy_for('export.arxiv.org').max_concurrency == 1
+    assert limiter.policy_for('notarxiv.org').max_concurrency == 3
+    print("✅ 主机策略匹配正确")
+
+
+def test_batch_download_runs_concurrently_per_host():
+    """测试全局并发、每主机并发上限、结果顺序和失败处理"""
+    fake = FakePDFServer(delay=0.2)
+    download_dir = tempfile.mkdtemp()
+    try:
+        downloader = PDFDownloader(download_dir=download_dir, max_retries=1, max_workers=8,
+                                   host_policy=HostPolicy(max_concurrency=2, interval=0), host_policies={})
+        pdf_infos = [
+            {'pdf_url': fake.url(host, f'/{host}/{i}.pdf'), 'filename': f'{host}_{i}.pdf', 'access_type': 'open'}
+            for i in range(4) for host in ('127.0.0.1', 'localhost')
+        ]
+        pdf_infos.append({'pdf_url': fake.url('localhost', '/missing.pdf'), 'filename': 'missing.pdf'})
+        # 同名文件只下载一次
+        pdf_infos.append(dict(pdf_infos[0]))
+
+        progress = []
+        start = time.monotonic()
+        results = downloader.batch_download(pdf_infos, lambda current, total, _: progress.append((current, total)))
+        elapsed = time.monotonic() - start
+
+        # 串行需要 9 × 0.2 秒；每主机 2 个并发时约 5 轮
+        assert elapsed < 1.5, elapsed
+        assert fake.max_active == {'127.0.0.1': 2, 'localhost': 2}
+        assert [r.success for r in results] == [True] * 8 + [False, True]
+        assert results[0].file_path == str(Path(download_dir) / '127.0.0.1_0.pdf')
+        assert results[-1] is results[0]
+        assert len(fake.paths) == 9
+        assert progress[-1] == (10, 10)
+        assert not list(Path(download_dir).glob('*.part'))
+        assert not (Path(download_dir) / 'missing.pdf').exists()
+        assert downloader.get_download_stats()['successful'] == 8
+    finally:
+        fake.close()
+    print("✅ 并发下载正确")
+
+
+def test_limited_host_does_not_starve_others():
+    """测试受限主机排队的下载不占住全局线程，其他主机的下载照常进行"""
+    fake = FakePDFServer(delay=0.1)
+    try:
+        downloader = PDFDownloader(download_dir=tempfile.mkdtemp(), max_retries=1, max_workers=3,
+                                   host_policy=HostPolicy(max_concurrency=4, interval=0),
+                                   host_policies={'127.0.0.1': HostPolicy(max_concurrency=1, interval=0)})
+        # 受限主机的条目全部排在前面
+        pdf_infos = [{'pdf_url': fake.url('127.0.0.1', f'/slow/{i}.pdf'), 'filename': f'slow_{i}.pdf'}
+                     for i in range(6)]
+        pdf_infos += [{'pdf_url': fake.url('localhost', f'/fast/{i}.pdf'), 'filename': f'fast_{i}.pdf'}
+                      for i in range(4)]
+        results = downloader.batch_download(pdf_infos)
+
+        assert all(r.success for r in results)
+        assert fake.max_active['127.0.0.1'] == 1
+        # 受限主机每次只下载一个，其余两个线程留给 localhost：
+        # localhost 的 4 个下载在受限主机的第 4 个下载开始前全部开始
+        slow_starts = sorted(fake.starts['127.0.0.1'])
+        assert max(fake.starts['localhost']) < slow_starts[3], (fake.starts['localhost'], slow_starts)
+        downloader.close()
+    finally:
+        fake.close()
+    print("✅ 按主机调度正确")
+
+
+def test_download_log_persists_across_runs():
+    """测试下载日志跨实例保留、按最后一次结果统计、压缩和旧版日志迁移"""
+    fake = FakePDFServer(delay=0)
+    download_dir = Path(tempfile.mkdtemp())
+    legacy = [{'pdf_url': 'https://example.org/old.pdf', 'filename': 'old.pdf', 'success': True}]
+    (download_dir / 'download_log.json').write_text(json.dumps(legacy), encoding='utf-8')
+    try:
+        first = resumable_downloader(str(download_dir), max_retries=1)
+        missing = {'pdf_url': fake.url('127.0.0.1', '/missing.pdf'), 'filename': 'later.pdf',
+                   'paper_id': 'doi:10.1/later'}
+        results = first.batch_download([
+            missing,
+            {'pdf_url': fake.url('127.0.0.1', '/a.pdf'), 'filename': 'a.pdf'},
+            {'pdf_url': 'https://journals.aps.org/x.pdf', 'filename': 'x.pdf',
+             'access_type': 'subscription', 'requires_auth': True},
+        ])
+        assert [r.success for r in results] == [False, True, False]
+        first.close()
+        assert not (download_dir / 'download_log.json').exists()
+
+        second = resumable_downloader(str(download_dir), max_retries=1)
+        assert len(second.download_log) == 4
+        assert sorted(r['filename'] for r in second.get_failed_downloads()) == ['later.pdf', 'x.pdf']
+        assert [r['filename'] for r in second.get_manual_intervention_list()] == ['x.pdf']
+
+        # 同一论文改用其他地址重新下载成功后不再计为失败
+        assert second.download_pdf(fake.url('127.0.0.1', '/later.pdf'), 'later.pdf',
+                                   paper_id='doi:10.1/later').success
+        stats = second.get_download_stats()
+        assert (stats['total'], stats['successful'], stats['failed']) == (4, 3, 1)
+
+        assert second.compact_log() == 1
+        second.close()
+        lines = (download_dir / 'download_log.jsonl').read_text(encoding='utf-8').splitlines()
+        latest = {entry['filename']: entry['success'] for entry in map(json.loads, lines)}
+        assert latest == {'old.pdf': True, 'later.pdf': True, 'a.pdf': True, 'x.pdf': False}
+    finally:
+        fake.close()
+    print("✅ 下载日志正确")
+
+
+def test_download_outcomes_recorded_in_database():
+    """测试下载结果写入数据库的下载记录表，待下载查询随之更新"""
+    fake = FakePDFServer(delay=0)
+    download_dir = Path(tempfile.mkdtemp())
+    database = LiteratureDatabase(str(download_dir / 'literature.db'))
+    database.save_papers_bulk([
+        {'paper_id': f'paper-{i}', 'title': f'Crystal {i}', 'doi': f'10.1103/PhysRevB.{i}', 'score': 80}
+        for i in range(3)
+    ])
+    try:
+        downloader = PDFDownloader(download_dir=str(download_dir), max_retries=1, database=database,
+                                   host_policy=HostPolicy(max_concurrency=2, interval=0), host_policies={})
+        results = downloader.batch_download([
+            {'pdf_url': fake.url('127.0.0.1', '/0.pdf'), 'filename': '0.pdf', 'paper_id': 'paper-0'},
+            {'pdf_url': fake.url('127.0.0.1', '/missing.pdf'), 'filename': '1.pdf',
+             'paper_id': 'doi:10.1103/physrevb.1'},
+            {'pdf_url': fake.url('127.0.0.1', '/anonymous.pdf'), 'filename': 'anonymous.pdf'},
+        ])
+        assert [r.success for r in results] == [True, False, True]
+        # 下载线程不持有数据库连接
+        assert database.open_connections == 1
+        downloader.close()
+
+        record = database.get_download_records('paper-0')[0]
+        assert record['download_status'] == 'success' and record['sha256'] == results[0].sha256
+        assert database.get_download_records('paper-1')[0]['download_status'] == 'failed'
+        assert database.get_download_status_counts() == {'success': 1, 'failed': 1}
+        assert sorted(p['paper_id'] for p in database.pending_downloads(70)) == ['paper-1', 'paper-2']
+    finally:
+        database.close()
+        fake.close()
+    print("✅ 下载记录表正确")
+
+
+def test_batch_entries_without_key_are_not_merged():
+    """测试既无论文 ID 也无文件名的条目按 PDF 地址区分，不会合并为一次下载"""
+    downloader = resumable_downloader(tempfile.mkdtemp(), max_retries=1)
+    results = downloader.batch_download([
+        {'pdf_url': 'http://127.0.0.1:9/a.pdf'},
+        {'pdf_url': 'http://127.0.0.1:9/b.pdf'},
+        {'pdf_url': 'http://127.0.0.1:9/a.pdf'},
+        {},
+        {},
+    ])
+    assert results[0] is results[2]
+    assert len({id(r) for r in results}) == 4
+    downloader.close()
+    print("✅ 无键条目处理正确")
+
+
+def test_politeness_interval():
+    """测试同一主机相邻请求的最小间隔"""
+    fake = FakePDFServer(delay=0)
+    try:
+        downloader = PDFDownloader(download_dir=tempfile.mkdtemp(), max_retries=1, max_workers=4,
+                                   host_policies={'127.0.0.1': HostPolicy(max_concurrency=4, interval=0.2)})
+        results = downloader.batch_download([
+            {'pdf_url': fake.url('127.0.0.1', f'/{i}.pdf'), 'filename': f'{i}.pdf'} for i in range(3)
+        ])
+        assert all(r.success for r in results)
+        starts = sorted(fake.starts['127.0.0.1'])
+        assert all(later - earlier >= 0.18 for earlier, later in zip(starts, starts[1:])), starts
+    finally:
+        fake.close()
+    print("✅ 请求间隔正确")
+
+
+if __name__ == "__main__":
+    test_host_policy_matching()
+    test_stream_check()
+    test_validation_levels_per_batch()
+    test_batch_download_runs_concurrently_per_host()
+    test_limited_host_does_not_starve_others()
+    test_politeness_interval()
+    test_batch_entries_without_key_are_not_merged()
+    test_download_log_persists_across_runs()
+    test_download_outcomes_recorded_in_database()
+    test_resume_across_runs_and_changed_resource()
+    test_invalid_and_stale_partials_are_removed()
+    test_store_dedupes_across_sources()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+测试内容寻址 PDF 存储
+"""
+
+import hashlib
+import tempfile
+from pathlib import Path
+
+from app.utils.identifiers import default_work_id
+from app.utils.pdf_store import PDFStore
+
+
+def write(directory: Path, name: str, content: bytes) -> Path:
+    path = directory / name
+    path.write_bytes(content)
+    return path
+
+
+def test_ingest_dedupes_and_shards():
+    """测试按摘要分片存放、相同内容只存一份、按论文 ID 查找"""
+    root = Path(tempfile.mkdtemp())
+    incoming = Path(tempfile.mkdtemp())
+    store = PDFStore(root / 'store')
+    content = b'%PDF-1.4 crystal growth'
+    digest = hashlib.sha256(content).hexdigest()
+
+    first = store.ingest(write(incoming, 'a.pdf', content), paper_id='doi:10.1103/physrevb.1',
+                         source_url='https://journals.aps.org/a.pdf')
+    assert first.digest == digest and first.size == len(content) and first.mime == 'application/pdf'
+    assert Path(first.path) == root / 'store' / digest[:2] / digest[2:4] / digest
+    assert Path(first.path).read_bytes() == content
+    assert not (incoming / 'a.pdf').exists()
+
+    # 同一内容经另一来源下载：只建立映射
+    second = store.ingest(write(incoming, 'b.pdf', content), digest=digest, paper_id='arxiv:2401.00001')
+    assert second.path == first.path and not (incoming / 'b.pdf').exists()
+    assert store.get('arxiv:2401.00001').digest == digest
+    assert store.get('doi:10.1103/physrevb.1').path == first.path
+    assert store.get('pmid:1') is None and digest in store
+    assert store.stats() == {'blobs': 1, 'papers': 2, 'total_bytes': len(content)}
+
+    # 复制模式保留源文件
+    other = write(incoming, 'c.pdf', b'%PDF-1.4 other')
+    copied = store.ingest(other, move=False)
+    assert other.exists() and Path(copied.path).read_bytes() == b'%PDF-1.4 other'
+
+    # 没有论文引用的文件由垃圾回收删除
+    store.unlink_paper('doi:10.1103/physrevb.1')
+    assert store.collect_garbage() == 1
+    assert not Path(copied.path).exists() and Path(first.path).exists()
+    store.close()
+
+    # 索引持久化
+    reopened = PDFStore(root / 'store')
+    assert reopened.get('arxiv:2401.00001').size == len(content)
+    reopened.close()
+    print("✅ 内容寻址存储正确")
+
+
+def test_default_work_id():
+    """测试无数据库时的规范论文 ID"""
+    assert default_work_id({'doi': 'https://doi.org/10.1103/PhysRevB.1',
+                            'pdf_url': 'http://arxiv.org/pdf/2401.00001v2'}) == 'doi:10.1103/physrevb.1'
+    assert default_work_id({'pdf_url': 'http://arxiv.org/pdf/2401.00001v2'}) == 'arxiv:2401.00001'
+    assert default_work_id({'title': 'No identifiers'}) is None
+    print("✅ 规范论文 ID 正确")
+
+
+if __name__ == "__main__":
+    test_ingest_dedupes_and_shards()
+    test_default_work_id()
@@ -7,7 +7,8 @@ import requests
 import time
 import logging
 from datetime import datetime
-import xml.etree.ElementTree as ET
+
+from app.services.arxiv_harvester import parse_arxiv_feed
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -52,26 +53,23 @@ class PreciseCrystalGrowthSearcher:
                     'sortOrder': 'descending'
                 }
                 
-                response = self.session.get(url, params=params, timeout=30)
+                response = self.session.get(url, params=params, timeout=30, stream=True)
                 
                 if response.status_code == 200:
-                    root = ET.fromstring(response.content)
-                    entries = root.findall('{http://www.w3.org/2005/Atom}entry')
+                    # 流式解析，只保留精简记录
+                    with response:
+                        entries = list(parse_arxiv_feed(response.iter_content(chunk_size=64 * 1024)))
                     
                     print(f"找到: {len(entries)} 篇论文")
                     
                     # 过滤和显示论文
                     for i, entry in enumerate(entries[:3]):  # 只显示前3篇
-                        title = entry.find('{http://www.w3.org/2005/Atom}title').text
-                        authors = entry.findall('{http://www.w3.org/2005/Atom}author')
-                        author_names = [author.find('{http://www.w3.org/2005/Atom}name').text for author in authors[:2]]
-                        published = entry.find('{http://www.w3.org/2005/Atom}published').text
-                        summary = entry.find('{http://www.w3.org/2005/Atom}summary').text
+                        author_names = entry['authors'].split(', ')[:2]
                         
-                        print(f"  {i+1}. {title[:60]}...")
+                        print(f"  {i+1}. {entry['title'][:60]}...")
                         print(f"     作者: {', '.join(author_names)}")
-                        print(f"     日期: {published[:10]}")
-                        print(f"     摘要: {summary[:100]}...")
+                        print(f"     日期: {entry['published'][:10]}")
+                        print(f"     摘要: {entry['abstract'][:100]}...")
                         print()
                     
                     all_papers.extend(entries)
@@ -88,7 +86,7 @@ class PreciseCrystalGrowthSearcher:
         unique_papers = []
         seen_titles = set()
         for entry in all_papers:
-            title = entry.find('{http://www.w3.org/2005/Atom}title').text
+            title = entry['title']
             if title not in seen_titles:
                 unique_papers.append(entry)
                 seen_titles.add(title)
@@ -109,8 +107,8 @@ class PreciseCrystalGrowthSearcher:
         ]
         
         for entry in papers:
-            title = entry.find('{http://www.w3.org/2005/Atom}title').text.lower()
-            summary = entry.find('{http://www.w3.org/2005/Atom}summary').text.lower()
+            title = entry['title'].lower()
+            summary = entry['abstract'].lower()
             
             # 计算关键词匹配度
             keyword_count = sum(1 for keyword in crystal_keywords if keyword in title or keyword in summary)
@@ -126,14 +124,11 @@ class PreciseCrystalGrowthSearcher:
         # 显示最相关的论文
         print("\n最相关的论文:")
         for i, (entry, score) in enumerate(relevant_papers[:10], 1):
-            title = entry.find('{http://www.w3.org/2005/Atom}title').text
-            authors = entry.findall('{http://www.w3.org/2005/Atom}author')
-            author_names = [author.find('{http://www.w3.org/2005/Atom}name').text for author in authors[:2]]
-            published = entry.find('{http://www.w3.org/2005/Atom}published').text
+            author_names = entry['authors'].split(', ')[:2]
             
-            print(f"\n{i}. {title[:70]}...")
+            print(f"\n{i}. {entry['title'][:70]}...")
             print(f"   作者: {', '.join(author_names)}")
-            print(f"   日期: {published[:10]}")
+            print(f"   日期: {entry['published'][:10]}")
             print(f"   相关性得分: {score}")
         
         return relevant_papers
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+测试 PubMed E-utilities 批量客户端（离线，使用本地 HTTP 服务模拟 E-utilities）
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from app.services.pubmed_client import PubMedClient, parse_pubmed_articles
+from app.utils.rate_limit import TokenBucket
+from app.utils.response_cache import ResponseCache, install_cache
+
+ARTICLE = '''
+  <PubmedArticle>
+    <MedlineCitation Status="MEDLINE" Owner="NLM">
+      <PMID Version="1">{pmid}</PMID>
+      <Article PubModel="Print">
+        <Journal>
+          <Title>Journal of Crystal Growth</Title>
+          <JournalIssue><PubDate><Year>2021</Year><Month>Mar</Month></PubDate></JournalIssue>
+        </Journal>
+        <ArticleTitle>Flux growth of <i>R</i>Fe<sub>2</sub> crystals {pmid}</ArticleTitle>
+        <ELocationID EIdType="doi" ValidYN="Y">10.1016/J.JCRYSGRO.{pmid}</ELocationID>
+        <Abstract>
+          <AbstractText Label="BACKGROUND">Large single crystals are needed.</AbstractText>
+          <AbstractText Label="METHODS">Grown from Sn flux.</AbstractText>
+        </Abstract>
+        <AuthorList>
+          <Author><LastName>Canfield</LastName><ForeName>Paul C</ForeName></Author>
+          <Author><CollectiveName>Crystal Growth Consortium</CollectiveName></Author>
+        </AuthorList>
+      </Article>
+    </MedlineCitation>
+    <PubmedData>
+      <ArticleIdList>
+        <ArticleId IdType="pubmed">{pmid}</ArticleId>
+        {doi}
+      </ArticleIdList>
+    </PubmedData>
+  </PubmedArticle>'''
+
+
+def make_articles(pmids, with_doi=True) -> bytes:
+    articles = ''.join(
+        ARTICLE.format(pmid=pmid, doi=f'<ArticleId IdType="doi">10.1016/j.jcrysgro.{pmid}</ArticleId>'
+                       if with_doi else '')
+        for pmid in pmids
+    )
+    return f'<?xml version="1.0" ?>\n<PubmedArticleSet>{articles}\n</PubmedArticleSet>'.encode('utf-8')
+
+
+class FakeEutils:
+    """esearch 返回 5 条结果的历史服务器会话，efetch 按 retstart/retmax 或 id 返回文章"""
+
+    PMIDS = ['1001', '1002', '1003', '1004', '1005']
+
+    def __init__(self, fail_first_fetch=False):
+        self.requests = []
+        self.fail_first_fetch = fail_first_fetch
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self, params):
+                fake.requests.append((self.command, self.path.split('?')[0], params,
+                                      self.headers.get('Cache-Control')))
+                if self.path.startswith('/esearch.fcgi'):
+                    body = json.dumps({'esearchresult': {
+                        'count': '5', 'retmax': '0', 'webenv': 'MCID_abc', 'querykey': '1', 'idlist': []
+                    }}).encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    if fake.fail_first_fetch:
+                        fake.fail_first_fetch = False
+                        self.send_response(503)
+                        self.send_header('Retry-After', '0')
+                        self.end_headers()
+                        return
+                    if 'id' in params:
+                        pmids = params['id'].split(',')
+                    else:
+                        assert params['WebEnv'] == 'MCID_abc' and params['query_key'] == '1'
+                        start = int(params['retstart'])
+                        pmids = FakeEutils.PMIDS[start:start + int(params['retmax'])]
+                    body = make_articles(pmids)
+                    content_type = 'text/xml'
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._respond({k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()})
+
+            def do_POST(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                length = int(self.headers.get('Content-Length', 0))
+                params.update({k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()})
+                self._respond(params)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.host = f"127.0.0.1:{self.server.server_port}"
+
+    def client(self, **options) -> PubMedClient:
+        options.setdefault('limiter', TokenBucket(rate=1000.0, capacity=1000.0))
+        return PubMedClient(base_url=f"http://{self.host}", backoff_base=0.01, **options)
+
+    def close(self):
+        self.server.shutdown()
+
+
+def test_parse_articles():
+    """测试流式解析：DOI、结构化摘要、作者和内联标记"""
+    data = make_articles(['1001'])
+    records = list(parse_pubmed_articles(data[i:i + 5] for i in range(0, len(data), 5)))
+    assert records == [{
+        'title': 'Flux growth of RFe2 crystals 1001',
+        'authors': 'Paul C Canfield, Crystal Growth Consortium',
+        'year': 2021,
+        'abstract': 'BACKGROUND: Large single crystals are needed.\nMETHODS: Grown from Sn flux.',
+        'pdf_url': None,
+        'doi': '10.1016/j.jcrysgro.1001',
+        'pmid': '1001',
+        'pmcid': None,
+        'journal': 'Journal of Crystal Growth',
+        'source': 'PubMed'
+    }]
+
+    # ArticleIdList 中没有 DOI 时使用 ELocationID
+    record = next(parse_pubmed_articles([make_articles(['1002'], with_doi=False)]))
+    assert record['doi'] == '10.1016/j.jcrysgro.1002'
+    print("✅ PubMed XML 解析正确")
+
+
+def test_search_uses_history_server_in_batches():
+    """测试 usehistory 检索后按 WebEnv/query_key 分批取回，失败时重试"""
+    fake = FakeEutils(fail_first_fetch=True)
+    try:
+        client = fake.client(batch_size=2, email='lab@example.org')
+        records = list(client.search('flux growth[tiab]'))
+        assert [r['pmid'] for r in records] == FakeEutils.PMIDS
+
+        method, path, params, _ = fake.requests[0]
+        assert (method, path) == ('GET', '/esearch.fcgi')
+        assert params['usehistory'] == 'y' and params['term'] == 'flux growth[tiab]'
+        assert params['email'] == 'lab@example.org'
+        fetches = [(p['retstart'], p['retmax']) for _, path, p, _ in fake.requests if path == '/efetch.fcgi']
+        assert fetches == [('0', '2'), ('0', '2'), ('2', '2'), ('4', '1')]
+
+        fake.requests.clear()
+        assert len(list(client.search('flux growth[tiab]', max_results=3))) == 3
+        fetches = [(p['retstart'], p['retmax']) for _, path, p, _ in fake.requests if path == '/efetch.fcgi']
+        assert fetches == [('0', '2'), ('2', '1')]
+    finally:
+        fake.close()
+    print("✅ 历史服务器分批取回正确")
+
+
+def test_history_requests_bypass_cache():
+    """测试依赖 WebEnv 的请求不进入缓存，按 PMID 取回的请求可缓存"""
+    fake = FakeEutils()
+    try:
+        cache = ResponseCache(':memory:')
+        client = fake.client(batch_size=10)
+        install_cache(client.session, cache, hosts=(fake.host,))
+
+        assert len(list(client.search('flux growth'))) == 5
+        assert len(list(client.search('flux growth'))) == 5
+        assert len(fake.requests) == 4
+        assert all(header == 'no-store' for *_, header in fake.requests)
+        assert cache.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0] == 0
+
+        assert [r['pmid'] for r in client.fetch(['1003', 'PMID: 1004'])] == ['1003', '1004']
+        assert [r['pmid'] for r in client.fetch(['1003', '1004'])] == ['1003', '1004']
+        assert len(fake.requests) == 5 and fake.requests[-1][0] == 'POST'
+    finally:
+        fake.close()
+    print("✅ 缓存策略正确")
+
+
+if __name__ == "__main__":
+    test_parse_articles()
+    test_search_uses_history_server_in_batches()
+    test_history_requests_bypass_cache()
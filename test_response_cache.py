@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+测试元数据 API 响应缓存（离线，使用 httpx.MockTransport 和本地 HTTP 服务）
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import httpx
+import requests
+
+from app.utils.response_cache import CacheMissError, ResponseCache, cache_key, install_cache
+from semantic_scholar_client import SemanticScholarClient
+
+
+def make_client(handler, cache: ResponseCache) -> SemanticScholarClient:
+    return SemanticScholarClient(rate=1000.0, burst=1000.0, backoff_base=0.001, cache=cache,
+                                 transport=httpx.MockTransport(handler))
+
+
+def test_cache_key_normalization():
+    """测试缓存键：参数顺序、主机名大小写、密钥参数和 JSON 键顺序不影响结果"""
+    first = cache_key('get', 'https://API.semanticscholar.org/graph/v1/paper/search?query=a&limit=5')
+    second = cache_key('GET', 'https://api.semanticscholar.org/graph/v1/paper/search?limit=5&query=a&api_key=x')
+    assert first == second and first[1] == 'api.semanticscholar.org'
+    assert cache_key('POST', 'https://h/batch', b'{"ids": [1], "a": 2}') == \
+        cache_key('POST', 'https://h/batch', b'{"a":2,"ids":[1]}')
+    assert cache_key('POST', 'https://h/batch', b'{"ids": [1]}') != cache_key('POST', 'https://h/batch', b'{"ids": [2]}')
+    print("✅ 缓存键规范化正确")
+
+
+def test_client_hits_and_revalidates():
+    """测试重复请求命中缓存，过期后按 ETag 条件请求重新验证"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if request.headers.get('If-None-Match') == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={'data': [{'title': 'cached'}]}, headers={'ETag': '"v1"'})
+
+    cache = ResponseCache(':memory:')
+    client = make_client(handler, cache)
+    for _ in range(3):
+        assert client.run(client.search, 'flux', 5) == [{'title': 'cached'}]
+    assert len(calls) == 1 and cache.stats['hits'] == 2
+
+    # 过期后重新验证，304 时沿用缓存正文
+    cache.ttls['api.semanticscholar.org'] = 0
+    cache.conn.execute('UPDATE responses SET expires_at = 0')
+    assert client.run(client.search, 'flux', 5) == [{'title': 'cached'}]
+    assert len(calls) == 2 and calls[-1].headers['If-None-Match'] == '"v1"'
+    assert cache.stats['revalidated'] == 1
+
+    # 不同参数不命中；错误响应不缓存
+    assert client.run(client.search, 'flux', 10) == [{'title': 'cached'}]
+    assert len(calls) == 3 and len(cache) == 2
+    print("✅ 缓存命中与重新验证正确")
+
+
+def test_offline_mode_and_eviction():
+    """测试 offline 模式只读缓存，超过大小上限时按 LRU 淘汰"""
+    def handler(request):
+        return httpx.Response(200, json={'data': [{'title': request.url.params['query'] * 100}]})
+
+    cache = ResponseCache(':memory:', max_bytes=400)
+    client = make_client(handler, cache)
+    for query in ('a', 'b', 'c'):
+        client.run(client.search, query)
+    client.run(client.search, 'a')  # 访问 a，使 b 成为最久未访问的条目
+    client.run(client.search, 'd')
+    assert len(cache) == 3 and cache.total_bytes <= 400 and cache.stats['evicted'] == 1
+
+    cache.mode = 'offline'
+    cache.conn.execute('UPDATE responses SET expires_at = 0')
+    assert client.run(client.search, 'a') == [{'title': 'a' * 100}]
+    try:
+        client.run(client.search, 'b')
+    except CacheMissError:
+        pass
+    else:
+        raise AssertionError("offline 模式未命中时应当抛出 CacheMissError")
+    print("✅ offline 模式与 LRU 淘汰正确")
+
+
+def test_requests_adapter():
+    """测试 requests.Session 挂载的缓存适配器（本地 HTTP 服务）"""
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            if self.headers.get('If-Modified-Since') == 'Mon, 01 Jan 2024 00:00:00 GMT':
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = b'<feed>arxiv</feed>'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/atom+xml')
+            self.send_header('Last-Modified', 'Mon, 01 Jan 2024 00:00:00 GMT')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f"127.0.0.1:{server.server_port}"
+    try:
+        cache = ResponseCache(':memory:')
+        session = requests.Session()
+        install_cache(session, cache, hosts=(host,))
+
+        url = f"http://{host}/api/query"
+        first = session.get(url, params={'search_query': 'cat:cond-mat', 'start': 0})
+        second = session.get(url, params={'start': 0, 'search_query': 'cat:cond-mat'})
+        assert first.text == second.text == '<feed>arxiv</feed>'
+        assert second.headers['x-cache'] == 'HIT' and len(hits) == 1
+
+        streamed = session.get(url, params={'search_query': 'cat:cond-mat', 'start': 0}, stream=True)
+        assert b''.join(streamed.iter_content(chunk_size=4)) == b'<feed>arxiv</feed>'
+
+        uncached = session.get(url, params={'search_query': 'cat:cond-mat', 'start': 0},
+                               headers={'Cache-Control': 'no-store'})
+        assert 'x-cache' not in uncached.headers and len(hits) == 2
+
+        cache.conn.execute('UPDATE responses SET expires_at = 0')
+        third = session.get(url, params={'search_query': 'cat:cond-mat', 'start': 0})
+        assert third.text == '<feed>arxiv</feed>' and third.headers['x-cache'] == 'REVALIDATED'
+        assert len(hits) == 3
+    finally:
+        server.shutdown()
+    print("✅ requests 缓存适配器正确")
+
+
+if __name__ == "__main__":
+    test_cache_key_normalization()
+    test_client_hits_and_revalidates()
+    test_offline_mode_and_eviction()
+    test_requests_adapter()
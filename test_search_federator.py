@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+测试多源联合检索（离线，使用模拟的检索来源）
+"""
+
+import asyncio
+import threading
+import time
+
+from app.services.search_federator import RecordMerger, SearchFederator, SearchSource, default_sources
+from semantic_scholar_client import SemanticScholarClient
+
+
+TOPICS = ['Chemical vapor transport of MoTe2', 'Floating zone growth of cuprates', 'Bridgman growth of Bi2Se3',
+          'Hydrothermal synthesis of quartz', 'Czochralski pulling of silicon', 'Laser heated pedestal growth']
+
+
+def make_source(name, results_for, delay, max_concurrency, active):
+    """模拟的同步检索来源，记录同时执行的最大请求数"""
+    lock = threading.Lock()
+
+    def search(query):
+        with lock:
+            active[name] = active.get(name, 0) + 1
+            active[f"{name}_max"] = max(active.get(f"{name}_max", 0), active[name])
+        time.sleep(delay)
+        with lock:
+            active[name] -= 1
+        return results_for(query)
+
+    return SearchSource(name, search, max_concurrency=max_concurrency)
+
+
+def test_record_merger():
+    """测试按标识符、标题和近似重复在线合并"""
+    merger = RecordMerger()
+    published, new = merger.add({'title': 'Flux growth of CeCoIn5', 'doi': '10.1103/PhysRevB.1',
+                                 'year': 2020}, 'Semantic Scholar', 'flux')
+    assert new
+    preprint, new = merger.add({'title': 'Flux Growth of CeCoIn5.', 'arxiv_id': '2001.00001',
+                                'pdf_url': 'http://arxiv.org/pdf/2001.00001v1', 'abstract': 'Long abstract.'},
+                               'arXiv', 'CVT')
+    assert not new and preprint is published
+    assert published['pdf_url'] == 'http://arxiv.org/pdf/2001.00001v1'
+    assert published['abstract'] == 'Long abstract.' and published['source'] == 'Semantic Scholar'
+    assert published['sources'] == ['Semantic Scholar', 'arXiv'] and published['queries'] == ['flux', 'CVT']
+
+    # 补全的 arXiv ID 可以直接命中
+    _, new = merger.add({'title': 'A different title', 'arxiv_id': 'arXiv:2001.00001v2'}, 'PubMed')
+    assert not new
+
+    # 同名但 DOI 不同的是不同论文
+    erratum, new = merger.add({'title': 'Flux growth of CeCoIn5', 'doi': '10.1103/PhysRevB.2'}, 'PubMed')
+    assert new and erratum is not published
+
+    # 标题+摘要近似重复
+    abstract = 'Single crystals of CeCoIn5 were grown from indium flux and characterized by x-ray diffraction.'
+    first, _ = merger.add({'title': 'Heavy fermion superconductivity in CeCoIn5 crystals', 'abstract': abstract},
+                          'arXiv')
+    second, new = merger.add({'title': 'Heavy-fermion superconductivity in CeCoIn5 crystals',
+                              'abstract': abstract, 'pmid': '123'}, 'PubMed')
+    assert not new and second is first and first['pmid'] == '123'
+    assert len(merger.records) == 3
+    merger.close()
+    print("✅ 在线合并去重正确")
+
+
+def test_federated_search_runs_concurrently():
+    """测试 来源 × 检索词 并发执行、每个来源的并发上限和失败隔离"""
+    active = {}
+    queries = [f"q{i}" for i in range(6)]
+    fast = make_source('fast', lambda q: [{'title': f'Paper {q}', 'doi': f'10.1/{q}'}], 0.1, 6, active)
+    slow = make_source('slow', lambda q: [{'title': f'Paper {q}', 'doi': f'10.1/{q}', 'pdf_url': f'http://x/{q}.pdf'},
+                                          {'title': TOPICS[int(q[1:])]}], 0.2, 2, active)
+
+    async def broken(query):
+        raise RuntimeError("服务不可用")
+
+    federator = SearchFederator([fast, slow, SearchSource('broken', broken)])
+
+    start = time.monotonic()
+    records = federator.search_sync(queries + ['q0'])
+    elapsed = time.monotonic() - start
+
+    # 串行需要 6 × 0.3 秒；并发时由 slow 的 3 轮 (6 个请求 / 并发 2) 决定
+    assert elapsed < 1.0, elapsed
+    assert active['fast_max'] > 2 and active['slow_max'] == 2
+    assert len(records) == 12
+    merged = {r['doi']: r for r in records if r['doi']}
+    assert all(r['pdf_url'] == f"http://x/{r['doi'][5:]}.pdf" for r in merged.values())
+    assert all(sorted(r['sources']) == ['fast', 'slow'] for r in merged.values())
+    print("✅ 并发联合检索正确")
+
+
+def test_stream_yields_as_results_arrive():
+    """测试异步迭代器在最慢的来源返回前就产出结果"""
+    async def quick(query):
+        return [{'title': f'Quick {query}'}]
+
+    async def sluggish(query):
+        await asyncio.sleep(0.3)
+        return [{'title': f'Sluggish {query}'}]
+
+    async def consume():
+        federator = SearchFederator([SearchSource('quick', quick), SearchSource('sluggish', sluggish)])
+        start = time.monotonic()
+        arrivals = []
+        async for record in federator.stream(['a', 'b']):
+            arrivals.append((record['title'], time.monotonic() - start))
+        return arrivals
+
+    arrivals = asyncio.run(consume())
+    assert [title for title, _ in arrivals[:2]] == ['Quick a', 'Quick b']
+    assert arrivals[0][1] < 0.2 and arrivals[-1][1] >= 0.3
+    print("✅ 流式产出正确")
+
+
+def test_semantic_scholar_source_shares_client_quota():
+    """测试联合检索的 Semantic Scholar 来源与客户端共用一个限速器"""
+    class Bypass:
+        def __getattr__(self, name):
+            return lambda query: []
+
+    source = next(s for s in default_sources(Bypass()) if s.name == 'Semantic Scholar')
+    assert source.limiter is SemanticScholarClient().limiter
+    print("✅ 共享配额正确")
+
+
+if __name__ == "__main__":
+    test_record_merger()
+    test_federated_search_runs_concurrently()
+    test_stream_yields_as_results_arrive()
+    test_semantic_scholar_source_shares_client_quota()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+测试 Semantic Scholar 异步客户端（离线，使用 httpx.MockTransport）
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+
+from enhanced_literature_system import EnhancedLiteratureSystem
+from semantic_scholar_client import (
+    SemanticScholarClient, SemanticScholarError, TokenBucket, batch_paper_id, parse_retry_after
+)
+from test_literature_database import make_database, make_paper
+
+
+def make_client(handler, **options) -> SemanticScholarClient:
+    """构造使用模拟传输层、无退避等待的客户端"""
+    options.setdefault('rate', 1000.0)
+    options.setdefault('burst', 1000.0)
+    return SemanticScholarClient(api_key='test-key', backoff_base=0.001,
+                                 transport=httpx.MockTransport(handler), **options)
+
+
+def test_token_bucket_rate():
+    """测试令牌桶：突发额度用完后按速率等待，暂停期间不发放令牌"""
+    bucket = TokenBucket(rate=10.0, capacity=2.0)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[0] == waits[1] == 0.0
+    assert 0.05 < waits[2] <= 0.1 and 0.15 < waits[3] <= 0.2
+
+    paused = TokenBucket(rate=100.0, capacity=5.0)
+    paused.pause(0.5)
+    assert 0.45 < paused.reserve() <= 0.5
+
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+    print("✅ 令牌桶限速正确")
+
+
+def test_default_clients_share_limiter():
+    """测试未指定速率的客户端共用进程内同一个限速器，指定速率时使用独立的限速器"""
+    first, second = SemanticScholarClient(), SemanticScholarClient(api_key='other')
+    assert first.limiter is second.limiter
+    assert SemanticScholarClient(rate=5.0).limiter is not first.limiter
+    print("✅ 共享限速器正确")
+
+
+def test_retry_after_then_success():
+    """测试 429 按 Retry-After 重试，并携带 API 密钥"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(429, headers={'Retry-After': '0.01'})
+        return httpx.Response(200, json={'data': [{'paperId': 'p1', 'title': 'Flux growth'}]})
+
+    client = make_client(handler)
+    papers = client.run(client.search, 'flux growth', 5, year='2020-2024')
+    assert papers == [{'paperId': 'p1', 'title': 'Flux growth'}]
+    assert len(calls) == 3
+    assert calls[-1].headers['x-api-key'] == 'test-key'
+    assert calls[-1].url.params['year'] == '2020-2024'
+    assert calls[-1].url.path == '/graph/v1/paper/search'
+    print("✅ Retry-After 重试正确")
+
+
+def test_errors_are_raised():
+    """测试不可重试的错误立即失败，可重试的错误在重试耗尽后失败"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400 if request.url.params['query'] == 'bad' else 503)
+
+    client = make_client(handler, max_retries=2)
+    for query, status, attempts in (('bad', 400, 1), ('down', 503, 3)):
+        calls.clear()
+        try:
+            client.run(client.search, query)
+        except SemanticScholarError as e:
+            assert e.status_code == status
+        else:
+            raise AssertionError("应当抛出 SemanticScholarError")
+        assert len(calls) == attempts
+    print("✅ 错误处理正确")
+
+
+def test_search_many_fans_out_concurrently():
+    """测试多个查询并发检索，单个查询失败不影响其他查询"""
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        query = request.url.params['query']
+        if query == 'broken':
+            return httpx.Response(404)
+        return httpx.Response(200, json={'data': [{'title': query}]})
+
+    client = make_client(handler, max_concurrency=4)
+    queries = ['a', 'b', 'broken', 'c', 'd', 'a']
+    started = time.monotonic()
+    results = client.run(client.search_many, queries)
+    assert time.monotonic() - started < 0.25
+    assert list(results) == ['a', 'b', 'broken', 'c', 'd']
+    assert results['broken'] == [] and results['c'] == [{'title': 'c'}]
+    assert peak == 4
+    print("✅ 并发检索正确")
+
+
+def test_search_bulk_follows_tokens():
+    """测试 bulk 检索按 continuation token 逐页产出，并在达到上限时停止"""
+    pages = {None: ([{'title': 'a'}, {'title': 'b'}], 't1'),
+             't1': ([{'title': 'c'}, {'title': 'd'}], 't2'),
+             't2': ([{'title': 'e'}], None)}
+    tokens = []
+
+    def handler(request):
+        assert request.url.path == '/graph/v1/paper/search/bulk'
+        token = request.url.params.get('token')
+        tokens.append(token)
+        data, next_token = pages[token]
+        return httpx.Response(200, json={'total': 5, 'data': data, 'token': next_token})
+
+    async def collect(client, **options):
+        return [page async for page in client.search_bulk('flux', **options)]
+
+    client = make_client(handler)
+    assert client.run(collect) == [[{'title': 'a'}, {'title': 'b'}], [{'title': 'c'}, {'title': 'd'}],
+                                   [{'title': 'e'}]]
+    assert tokens == [None, 't1', 't2']
+
+    tokens.clear()
+    assert client.run(collect, max_results=3) == [[{'title': 'a'}, {'title': 'b'}], [{'title': 'c'}]]
+    assert tokens == [None, 't1']
+    print("✅ bulk 分页检索正确")
+
+
+def test_paper_batch_chunks_ids():
+    """测试 /paper/batch 按 500 个 ID 分块，结果与输入顺序对应"""
+    posted = []
+
+    def handler(request):
+        ids = json.loads(request.content)['ids']
+        posted.append(len(ids))
+        assert request.url.params['fields'] == 'citationCount'
+        return httpx.Response(200, json=[None if i.endswith('7') else {'paperId': i} for i in ids])
+
+    client = make_client(handler)
+    ids = [f'DOI:10.1000/{i}' for i in range(1200)]
+    papers = client.run(client.get_papers_batch, ids, fields='citationCount')
+    assert sorted(posted) == [200, 500, 500]
+    assert papers[0] == {'paperId': 'DOI:10.1000/0'} and papers[7] is None
+    assert [p['paperId'] for p in papers if p] == [i for i in ids if not i.endswith('7')]
+
+    assert batch_paper_id({'paperId': 'A' * 40, 'doi': '10.1103/x.1'}) == 'a' * 40
+    assert batch_paper_id({'paper_id': 'paper-1', 'doi': 'https://doi.org/10.1103/X.1'}) == 'DOI:10.1103/x.1'
+    assert batch_paper_id({'arxiv_id': '2401.01234v2'}) == 'ARXIV:2401.01234'
+    assert batch_paper_id({'paper_id': 'paper-1'}) is None
+    print("✅ 批量获取论文正确")
+
+
+def test_refresh_citation_counts():
+    """测试按 DOI 批量刷新库中论文的引用数"""
+    def handler(request):
+        ids = json.loads(request.content)['ids']
+        return httpx.Response(200, json=[{'citationCount': 100 + int(i.rsplit('.', 1)[1])} for i in ids])
+
+    system = EnhancedLiteratureSystem(make_database().db_path, near_duplicate_threshold=None)
+    system.database.save_papers_bulk([make_paper(i) for i in range(7)] + [make_paper(7, doi='Unknown')])
+    system.database.update_citation_counts([('paper-3', 103)])
+    system.scorer.client = make_client(handler)
+
+    assert system.refresh_citation_counts(chunk_size=3) == {'requested': 7, 'updated': 6}
+    counts = {p['paper_id']: p['citation_count'] for p in system.database.iter_papers(order='id')}
+    assert counts['paper-6'] == 106 and counts['paper-7'] == 7
+    system.database.close()
+    print("✅ 引用数刷新正确")
+
+
+if __name__ == "__main__":
+    test_token_bucket_rate()
+    test_default_clients_share_limiter()
+    test_retry_after_then_success()
+    test_errors_are_raised()
+    test_search_many_fans_out_concurrently()
+    test_search_bulk_follows_tokens()
+    test_paper_batch_chunks_ids()
+    test_refresh_citation_counts()
@@ -12,6 +12,8 @@ import re
 import os
 import json
 
+from semantic_scholar_client import get_default_client
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,7 +22,6 @@ class ImprovedSemanticScholarSearcher:
     """改进版Semantic Scholar API搜索器"""
     
     def __init__(self):
-        self.base_url = "https://api.semanticscholar.org/graph/v1/paper/search"
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -28,31 +29,15 @@ class ImprovedSemanticScholarSearcher:
         })
     
     def search_papers(self, query, limit=20, year_start=2020, year_end=2024):
-        """搜索论文"""
+        """搜索论文（限速与 429 重试由共享客户端处理）"""
         try:
-            params = {
-                'query': query,
-                'limit': limit,
-                'year': f"{year_start}-{year_end}",
-                'fields': 'title,authors,year,abstract,openAccessPdf,externalIds,venue'
-            }
-            
             logger.info(f"搜索查询: {query}")
             logger.info(f"年份范围: {year_start}-{year_end}")
             
-            response = self.session.get(self.base_url, params=params, timeout=30)
-            
-            if response.status_code == 429:
-                logger.warning("API速率限制，等待60秒...")
-                time.sleep(60)
-                response = self.session.get(self.base_url, params=params, timeout=30)
-            
-            if response.status_code != 200:
-                logger.error(f"API请求失败，状态码: {response.status_code}")
-                return []
-            
-            data = response.json()
-            papers = data.get('data', [])
+            client = get_default_client()
+            papers = client.run(client.search, query, limit,
+                                fields='title,authors,year,abstract,openAccessPdf,externalIds,venue',
+                                year=f"{year_start}-{year_end}")
             
             logger.info(f"找到 {len(papers)} 篇论文")
             return papers
@@ -271,11 +256,6 @@ def test_improved_workflow():
         print(f"\n搜索查询 {i+1}/{len(search_queries)}: {query}")
         papers = searcher.search_papers(query, limit=5, year_start=2020, year_end=2024)
         all_papers.extend(papers)
-        
-        # 增加延迟避免速率限制
-        if i < len(search_queries) - 1:
-            print("等待30秒避免速率限制...")
-            time.sleep(30)
     
     # 去重
     unique_papers = []
@@ -3,37 +3,44 @@
 查看数据库内容的脚本
 """
 
-import sqlite3
+import argparse
 import json
 from tabulate import tabulate
 
-def view_database():
-    """查看数据库内容"""
-    print("文献数据库查看器")
-    print("=" * 60)
-    
-    # 连接数据库
-    conn = sqlite3.connect('literature_database.db')
-    cursor = conn.cursor()
-    
-    # 1. 数据库概览
+from literature_database import LiteratureDatabase
+
+def print_overview(stats: dict):
+    """打印数据库概览"""
     print("\n📊 数据库概览:")
-    cursor.execute("SELECT COUNT(*) FROM papers")
-    total_papers = cursor.fetchone()[0]
+    print(f"  总论文数: {stats.get('total_papers', 0)}")
+    print(f"  高分论文 (≥70分): {stats.get('high_score_papers', 0)}")
+    print(f"  中等论文 (50-69分): {stats.get('medium_score_papers', 0)}")
+    print(f"  低分论文 (<50分): {stats.get('low_score_papers', 0)}")
+
+def view_stats(db_path: str = 'literature_database.db', materialize: bool = False):
+    """只显示统计信息
     
-    cursor.execute("SELECT COUNT(*) FROM papers WHERE score >= 70")
-    high_score = cursor.fetchone()[0]
+    Args:
+        materialize: 创建（或读取）paper_stats 汇总表；默认扫描 papers，不改动数据库结构
+    """
+    with LiteratureDatabase(db_path, materialized_stats=materialize) as db:
+        stats = db.get_database_stats()
     
-    cursor.execute("SELECT COUNT(*) FROM papers WHERE score >= 50 AND score < 70")
-    medium_score = cursor.fetchone()[0]
+    print_overview(stats)
+    print(f"  总搜索次数: {stats.get('total_searches', 0)}")
+
+def view_database(db_path: str = 'literature_database.db', materialize: bool = False):
+    """查看数据库内容（materialize 同 view_stats）"""
+    print("文献数据库查看器")
+    print("=" * 60)
     
-    cursor.execute("SELECT COUNT(*) FROM papers WHERE score < 50")
-    low_score = cursor.fetchone()[0]
+    # 连接数据库
+    db = LiteratureDatabase(db_path, materialized_stats=materialize)
+    cursor = db.get_connection().cursor()
     
-    print(f"  总论文数: {total_papers}")
-    print(f"  高分论文 (≥70分): {high_score}")
-    print(f"  中等论文 (50-69分): {medium_score}")
-    print(f"  低分论文 (<50分): {low_score}")
+    # 1. 数据库概览（期刊/年份分布一并取得，避免重复扫描）
+    stats = db.get_database_stats(venue_limit=11)
+    print_overview(stats)
     
     # 2. 按评分排序的论文列表
     print(f"\n🏆 高分论文 (评分≥70分):")
@@ -67,16 +74,7 @@ def view_database():
     
     # 3. 期刊分布
     print(f"\n📚 期刊分布:")
-    cursor.execute("""
-        SELECT venue, COUNT(*) as count 
-        FROM papers 
-        WHERE venue != 'Unknown' 
-        GROUP BY venue 
-        ORDER BY count DESC 
-        LIMIT 10
-    """)
-    
-    venue_stats = cursor.fetchall()
+    venue_stats = [item for item in stats.get('venue_stats', []) if item[0] != 'Unknown'][:10]
     if venue_stats:
         headers = ["期刊", "论文数量"]
         print(tabulate(venue_stats, headers=headers, tablefmt="grid"))
@@ -85,16 +83,7 @@ def view_database():
     
     # 4. 年份分布
     print(f"\n📅 年份分布:")
-    cursor.execute("""
-        SELECT year, COUNT(*) as count 
-        FROM papers 
-        WHERE year IS NOT NULL 
-        GROUP BY year 
-        ORDER BY year DESC 
-        LIMIT 10
-    """)
-    
-    year_stats = cursor.fetchall()
+    year_stats = [item for item in stats.get('year_stats', []) if item[0] is not None][:10]
     if year_stats:
         headers = ["年份", "论文数量"]
         print(tabulate(year_stats, headers=headers, tablefmt="grid"))
@@ -146,8 +135,20 @@ def view_database():
     except KeyboardInterrupt:
         print("\n跳过详细查看")
     
-    conn.close()
+    db.close()
     print(f"\n✅ 数据库查看完成！")
 
 if __name__ == "__main__":
-    view_database()
+    parser = argparse.ArgumentParser(description='文献数据库查看器')
+    parser.add_argument('--db', type=str, default='literature_database.db',
+                       help='数据库文件路径 (默认: literature_database.db)')
+    parser.add_argument('--stats', action='store_true',
+                       help='只显示统计信息')
+    parser.add_argument('--materialize', action='store_true',
+                       help='创建并使用 paper_stats 汇总表（之后的统计与论文总数无关）')
+    args = parser.parse_args()
+    
+    if args.stats:
+        view_stats(args.db, args.materialize)
+    else:
+        view_database(args.db, args.materialize)